@@ -1,10 +1,12 @@
 from flask import Flask, request, send_file, render_template_string
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-from openpyxl.worksheet.datavalidation import DataValidation
-from datetime import datetime
 import io
-import json
+import os
+import sys
+
+# مولد الملفات المشترك في po_generator_v2 - Shared document engine
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'po_generator_v2'))
+from excel_template import render_excel_bytes
+from order_schema import from_legacy_payload
 
 app = Flask(__name__)
 
@@ -516,288 +518,6 @@ HTML_TEMPLATE = '''
 </html>
 '''
 
-def create_formatted_excel(data):
-    wb = Workbook()
-    sheet = wb.active
-    sheet.title = "طلب توريد"
-    sheet.sheet_view.rightToLeft = True
-    
-    thin_border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-    
-    # رأس الشركة
-    sheet.merge_cells('A1:G1')
-    sheet['A1'] = 'شركة الأمانة للتوريدات العامة'
-    sheet['A1'].font = Font(name='Arial', size=18, bold=True, color='FFFFFF')
-    sheet['A1'].alignment = Alignment(horizontal='center', vertical='center', readingOrder=2)
-    sheet['A1'].fill = PatternFill(start_color='4472C4', end_color='4472C4', fill_type='solid')
-    
-    sheet.merge_cells('A2:G2')
-    sheet['A2'] = 'طلب توريد'
-    sheet['A2'].font = Font(name='Arial', size=14, bold=True)
-    sheet['A2'].alignment = Alignment(horizontal='center', vertical='center', readingOrder=2)
-    sheet.row_dimensions[2].height = 25
-    
-    # بيانات الشركة
-    sheet['A4'] = 'بيانات الشركة:'
-    sheet['A4'].font = Font(name='Arial', size=11, bold=True, underline='single')
-    sheet['A4'].alignment = Alignment(horizontal='right', readingOrder=2)
-    sheet.merge_cells('A4:B4')
-    
-    sheet['A5'] = 'رقم الطلب:'
-    sheet['A5'].font = Font(name='Arial', size=10, bold=True)
-    sheet['A5'].alignment = Alignment(horizontal='right', readingOrder=2)
-    sheet['B5'] = data['poNumber']
-    sheet['B5'].font = Font(name='Arial', size=10, color='0000FF')
-    sheet['B5'].alignment = Alignment(horizontal='right', readingOrder=2)
-    sheet['B5'].fill = PatternFill(start_color='FFFF00', end_color='FFFF00', fill_type='solid')
-    
-    sheet['D5'] = 'التاريخ:'
-    sheet['D5'].font = Font(name='Arial', size=10, bold=True)
-    sheet['D5'].alignment = Alignment(horizontal='right', readingOrder=2)
-    sheet['E5'] = data['poDate']
-    sheet['E5'].font = Font(name='Arial', size=10, color='0000FF')
-    sheet['E5'].alignment = Alignment(horizontal='right', readingOrder=2)
-    sheet['E5'].fill = PatternFill(start_color='FFFF00', end_color='FFFF00', fill_type='solid')
-    
-    sheet['A6'] = 'الرقم الضريبي:'
-    sheet['A6'].font = Font(name='Arial', size=10, bold=True)
-    sheet['A6'].alignment = Alignment(horizontal='right', readingOrder=2)
-    sheet['B6'] = data['companyTaxId']
-    sheet['B6'].fill = PatternFill(start_color='FFFF00', end_color='FFFF00', fill_type='solid')
-    sheet['B6'].alignment = Alignment(horizontal='right', readingOrder=2)
-    
-    sheet['D6'] = 'السجل التجاري:'
-    sheet['D6'].font = Font(name='Arial', size=10, bold=True)
-    sheet['D6'].alignment = Alignment(horizontal='right', readingOrder=2)
-    sheet['E6'] = data['commercialReg']
-    sheet['E6'].fill = PatternFill(start_color='FFFF00', end_color='FFFF00', fill_type='solid')
-    sheet['E6'].alignment = Alignment(horizontal='right', readingOrder=2)
-    
-    # بيانات المورد
-    sheet['A8'] = 'بيانات المورد:'
-    sheet['A8'].font = Font(name='Arial', size=11, bold=True, underline='single')
-    sheet['A8'].alignment = Alignment(horizontal='right', readingOrder=2)
-    sheet.merge_cells('A8:B8')
-    
-    sheet['A9'] = 'اسم المورد:'
-    sheet['A9'].font = Font(name='Arial', size=10, bold=True)
-    sheet['A9'].alignment = Alignment(horizontal='right', readingOrder=2)
-    sheet['B9'] = data['supplierName']
-    sheet['B9'].fill = PatternFill(start_color='FFFF00', end_color='FFFF00', fill_type='solid')
-    sheet['B9'].alignment = Alignment(horizontal='right', readingOrder=2)
-    sheet.merge_cells('B9:C9')
-    
-    sheet['D9'] = 'الرقم الضريبي:'
-    sheet['D9'].font = Font(name='Arial', size=10, bold=True)
-    sheet['D9'].alignment = Alignment(horizontal='right', readingOrder=2)
-    sheet['E9'] = data['supplierTaxId']
-    sheet['E9'].fill = PatternFill(start_color='FFFF00', end_color='FFFF00', fill_type='solid')
-    sheet['E9'].alignment = Alignment(horizontal='right', readingOrder=2)
-    sheet.merge_cells('E9:F9')
-    
-    sheet['A10'] = 'العنوان:'
-    sheet['A10'].font = Font(name='Arial', size=10, bold=True)
-    sheet['A10'].alignment = Alignment(horizontal='right', readingOrder=2)
-    sheet['B10'] = data['supplierAddress']
-    sheet['B10'].fill = PatternFill(start_color='FFFF00', end_color='FFFF00', fill_type='solid')
-    sheet['B10'].alignment = Alignment(horizontal='right', readingOrder=2)
-    sheet.merge_cells('B10:F10')
-    
-    sheet['A11'] = 'رقم التليفون:'
-    sheet['A11'].font = Font(name='Arial', size=10, bold=True)
-    sheet['A11'].alignment = Alignment(horizontal='right', readingOrder=2)
-    sheet['B11'] = data['supplierPhone']
-    sheet['B11'].fill = PatternFill(start_color='FFFF00', end_color='FFFF00', fill_type='solid')
-    sheet['B11'].alignment = Alignment(horizontal='right', readingOrder=2)
-    sheet.merge_cells('B11:C11')
-    
-    sheet['D11'] = 'البريد الإلكتروني:'
-    sheet['D11'].font = Font(name='Arial', size=10, bold=True)
-    sheet['D11'].alignment = Alignment(horizontal='right', readingOrder=2)
-    sheet['E11'] = data['supplierEmail']
-    sheet['E11'].fill = PatternFill(start_color='FFFF00', end_color='FFFF00', fill_type='solid')
-    sheet['E11'].alignment = Alignment(horizontal='right', readingOrder=2)
-    sheet.merge_cells('E11:F11')
-    
-    # شروط التوريد
-    sheet['A13'] = 'شروط التوريد:'
-    sheet['A13'].font = Font(name='Arial', size=11, bold=True, underline='single')
-    sheet['A13'].alignment = Alignment(horizontal='right', readingOrder=2)
-    sheet.merge_cells('A13:B13')
-    
-    sheet['A14'] = 'مدة التوريد:'
-    sheet['A14'].font = Font(name='Arial', size=10, bold=True)
-    sheet['A14'].alignment = Alignment(horizontal='right', readingOrder=2)
-    sheet['B14'] = data['deliveryPeriod']
-    sheet['B14'].fill = PatternFill(start_color='FFFF00', end_color='FFFF00', fill_type='solid')
-    sheet['B14'].alignment = Alignment(horizontal='right', readingOrder=2)
-    sheet['C14'] = 'يوم من تاريخ الطلب'
-    sheet['C14'].font = Font(name='Arial', size=9, italic=True)
-    sheet['C14'].alignment = Alignment(horizontal='right', readingOrder=2)
-    
-    sheet['D14'] = 'مكان التسليم:'
-    sheet['D14'].font = Font(name='Arial', size=10, bold=True)
-    sheet['D14'].alignment = Alignment(horizontal='right', readingOrder=2)
-    sheet['E14'] = data['deliveryLocation']
-    sheet['E14'].fill = PatternFill(start_color='FFFF00', end_color='FFFF00', fill_type='solid')
-    sheet['E14'].alignment = Alignment(horizontal='right', readingOrder=2)
-    sheet.merge_cells('E14:F14')
-    
-    sheet['A15'] = 'شروط الدفع:'
-    sheet['A15'].font = Font(name='Arial', size=10, bold=True)
-    sheet['A15'].alignment = Alignment(horizontal='right', readingOrder=2)
-    sheet['B15'] = data['paymentTerms']
-    sheet['B15'].fill = PatternFill(start_color='FFFF00', end_color='FFFF00', fill_type='solid')
-    sheet['B15'].alignment = Alignment(horizontal='right', readingOrder=2)
-    sheet.merge_cells('B15:C15')
-    
-    # جدول الأصناف
-    headers = ['م', 'كود الصنف', 'اسم الصنف', 'الوصف', 'الكمية', 'سعر الوحدة', 'الإجمالي']
-    header_row = 17
-    for col_num, header in enumerate(headers, 1):
-        cell = sheet.cell(row=header_row, column=col_num)
-        cell.value = header
-        cell.font = Font(name='Arial', size=11, bold=True, color='FFFFFF')
-        cell.fill = PatternFill(start_color='4472C4', end_color='4472C4', fill_type='solid')
-        cell.alignment = Alignment(horizontal='center', vertical='center', readingOrder=2)
-        cell.border = thin_border
-    
-    # إضافة الأصناف
-    for idx, item in enumerate(data['items'], start=18):
-        sheet.cell(row=idx, column=1).value = idx - 17
-        sheet.cell(row=idx, column=1).alignment = Alignment(horizontal='center', readingOrder=2)
-        sheet.cell(row=idx, column=1).border = thin_border
-        
-        sheet.cell(row=idx, column=2).value = item['code']
-        sheet.cell(row=idx, column=2).fill = PatternFill(start_color='FFFF00', end_color='FFFF00', fill_type='solid')
-        sheet.cell(row=idx, column=2).alignment = Alignment(horizontal='right', readingOrder=2)
-        sheet.cell(row=idx, column=2).border = thin_border
-        
-        sheet.cell(row=idx, column=3).value = item['name']
-        sheet.cell(row=idx, column=3).fill = PatternFill(start_color='FFFF00', end_color='FFFF00', fill_type='solid')
-        sheet.cell(row=idx, column=3).alignment = Alignment(horizontal='right', readingOrder=2)
-        sheet.cell(row=idx, column=3).border = thin_border
-        
-        sheet.cell(row=idx, column=4).value = item['description']
-        sheet.cell(row=idx, column=4).fill = PatternFill(start_color='FFFF00', end_color='FFFF00', fill_type='solid')
-        sheet.cell(row=idx, column=4).alignment = Alignment(horizontal='right', readingOrder=2)
-        sheet.cell(row=idx, column=4).border = thin_border
-        
-        sheet.cell(row=idx, column=5).value = item['quantity']
-        sheet.cell(row=idx, column=5).font = Font(name='Arial', size=10, color='0000FF')
-        sheet.cell(row=idx, column=5).fill = PatternFill(start_color='FFFF00', end_color='FFFF00', fill_type='solid')
-        sheet.cell(row=idx, column=5).alignment = Alignment(horizontal='center', readingOrder=2)
-        sheet.cell(row=idx, column=5).border = thin_border
-        
-        sheet.cell(row=idx, column=6).value = item['price']
-        sheet.cell(row=idx, column=6).font = Font(name='Arial', size=10, color='0000FF')
-        sheet.cell(row=idx, column=6).number_format = '#,##0.00'
-        sheet.cell(row=idx, column=6).fill = PatternFill(start_color='FFFF00', end_color='FFFF00', fill_type='solid')
-        sheet.cell(row=idx, column=6).alignment = Alignment(horizontal='right', readingOrder=2)
-        sheet.cell(row=idx, column=6).border = thin_border
-        
-        sheet.cell(row=idx, column=7).value = f'=E{idx}*F{idx}'
-        sheet.cell(row=idx, column=7).number_format = '#,##0.00'
-        sheet.cell(row=idx, column=7).fill = PatternFill(start_color='E7E6E6', end_color='E7E6E6', fill_type='solid')
-        sheet.cell(row=idx, column=7).alignment = Alignment(horizontal='right', readingOrder=2)
-        sheet.cell(row=idx, column=7).border = thin_border
-    
-    # الإجماليات
-    total_row = 18 + len(data['items']) + 1
-    
-    sheet[f'F{total_row}'] = 'الإجمالي قبل الضريبة:'
-    sheet[f'F{total_row}'].font = Font(name='Arial', size=11, bold=True)
-    sheet[f'F{total_row}'].alignment = Alignment(horizontal='right', readingOrder=2)
-    sheet[f'G{total_row}'] = f'=SUM(G18:G{17+len(data["items"])})'
-    sheet[f'G{total_row}'].font = Font(name='Arial', size=11, bold=True)
-    sheet[f'G{total_row}'].number_format = '#,##0.00" ج.م"'
-    sheet[f'G{total_row}'].border = thin_border
-    sheet[f'G{total_row}'].alignment = Alignment(horizontal='right', readingOrder=2)
-    sheet[f'G{total_row}'].fill = PatternFill(start_color='E7E6E6', end_color='E7E6E6', fill_type='solid')
-    
-    sheet[f'F{total_row+1}'] = 'ضريبة القيمة المضافة (14%):'
-    sheet[f'F{total_row+1}'].font = Font(name='Arial', size=11, bold=True)
-    sheet[f'F{total_row+1}'].alignment = Alignment(horizontal='right', readingOrder=2)
-    sheet[f'G{total_row+1}'] = f'=G{total_row}*0.14'
-    sheet[f'G{total_row+1}'].font = Font(name='Arial', size=11, bold=True)
-    sheet[f'G{total_row+1}'].number_format = '#,##0.00" ج.م"'
-    sheet[f'G{total_row+1}'].border = thin_border
-    sheet[f'G{total_row+1}'].alignment = Alignment(horizontal='right', readingOrder=2)
-    sheet[f'G{total_row+1}'].fill = PatternFill(start_color='E7E6E6', end_color='E7E6E6', fill_type='solid')
-    
-    sheet[f'F{total_row+2}'] = 'الإجمالي النهائي:'
-    sheet[f'F{total_row+2}'].font = Font(name='Arial', size=12, bold=True, color='FFFFFF')
-    sheet[f'F{total_row+2}'].alignment = Alignment(horizontal='right', readingOrder=2)
-    sheet[f'F{total_row+2}'].fill = PatternFill(start_color='4472C4', end_color='4472C4', fill_type='solid')
-    sheet[f'G{total_row+2}'] = f'=G{total_row}+G{total_row+1}'
-    sheet[f'G{total_row+2}'].font = Font(name='Arial', size=12, bold=True, color='FFFFFF')
-    sheet[f'G{total_row+2}'].number_format = '#,##0.00" ج.م"'
-    sheet[f'G{total_row+2}'].fill = PatternFill(start_color='4472C4', end_color='4472C4', fill_type='solid')
-    sheet[f'G{total_row+2}'].border = thin_border
-    sheet[f'G{total_row+2}'].alignment = Alignment(horizontal='right', readingOrder=2)
-    
-    # ملاحظات
-    notes_row = total_row + 4
-    sheet[f'A{notes_row}'] = 'ملاحظات:'
-    sheet[f'A{notes_row}'].font = Font(name='Arial', size=11, bold=True)
-    sheet[f'A{notes_row}'].alignment = Alignment(horizontal='right', readingOrder=2)
-    sheet.merge_cells(f'A{notes_row+1}:G{notes_row+3}')
-    sheet[f'A{notes_row+1}'] = data['notes']
-    sheet[f'A{notes_row+1}'].border = thin_border
-    sheet[f'A{notes_row+1}'].alignment = Alignment(vertical='top', wrap_text=True, horizontal='right', readingOrder=2)
-    sheet[f'A{notes_row+1}'].fill = PatternFill(start_color='FFFF00', end_color='FFFF00', fill_type='solid')
-    
-    # التوقيعات
-    sig_row = notes_row + 5
-    sheet[f'A{sig_row}'] = 'المدير المسؤول'
-    sheet[f'A{sig_row}'].font = Font(name='Arial', size=11, bold=True)
-    sheet[f'A{sig_row}'].alignment = Alignment(horizontal='center', readingOrder=2)
-    sheet.merge_cells(f'A{sig_row}:C{sig_row}')
-    
-    sheet[f'E{sig_row}'] = 'المورد'
-    sheet[f'E{sig_row}'].font = Font(name='Arial', size=11, bold=True)
-    sheet[f'E{sig_row}'].alignment = Alignment(horizontal='center', readingOrder=2)
-    sheet.merge_cells(f'E{sig_row}:G{sig_row}')
-    
-    for i in range(1, 4):
-        sheet[f'A{sig_row+i}'] = f'{"الاسم" if i==1 else "التوقيع" if i==2 else "التاريخ"}: _______________'
-        sheet[f'A{sig_row+i}'].alignment = Alignment(horizontal='center', readingOrder=2)
-        sheet.merge_cells(f'A{sig_row+i}:C{sig_row+i}')
-        
-        sheet[f'E{sig_row+i}'] = f'{"الاسم" if i==1 else "التوقيع" if i==2 else "التاريخ"}: _______________'
-        sheet[f'E{sig_row+i}'].alignment = Alignment(horizontal='center', readingOrder=2)
-        sheet.merge_cells(f'E{sig_row+i}:G{sig_row+i}')
-    
-    # ختم
-    sheet[f'A{sig_row+4}'] = '(ختم الشركة)'
-    sheet[f'A{sig_row+4}'].font = Font(name='Arial', size=9, italic=True)
-    sheet[f'A{sig_row+4}'].alignment = Alignment(horizontal='center', readingOrder=2)
-    sheet.merge_cells(f'A{sig_row+4}:C{sig_row+4}')
-    
-    sheet[f'E{sig_row+4}'] = '(ختم المورد)'
-    sheet[f'E{sig_row+4}'].font = Font(name='Arial', size=9, italic=True)
-    sheet[f'E{sig_row+4}'].alignment = Alignment(horizontal='center', readingOrder=2)
-    sheet.merge_cells(f'E{sig_row+4}:G{sig_row+4}')
-    
-    # ضبط عرض الأعمدة
-    sheet.column_dimensions['A'].width = 8
-    sheet.column_dimensions['B'].width = 14
-    sheet.column_dimensions['C'].width = 18
-    sheet.column_dimensions['D'].width = 25
-    sheet.column_dimensions['E'].width = 12
-    sheet.column_dimensions['F'].width = 15
-    sheet.column_dimensions['G'].width = 15
-    
-    sheet.row_dimensions[1].height = 30
-    sheet.row_dimensions[17].height = 25
-    
-    return wb
-
 @app.route('/')
 def index():
     return render_template_string(HTML_TEMPLATE)
@@ -805,11 +525,8 @@ def index():
 @app.route('/generate', methods=['POST'])
 def generate():
     data = request.json
-    wb = create_formatted_excel(data)
-    
-    output = io.BytesIO()
-    wb.save(output)
-    output.seek(0)
+    # نفس مولد Excel في po_generator_v2 بعد تحويل بيانات الواجهة القديمة
+    output = io.BytesIO(render_excel_bytes(from_legacy_payload(data)))
     
     return send_file(
         output,
@@ -821,4 +538,10 @@ def generate():
 if __name__ == '__main__':
     print("🚀 السيرفر شغال على: http://localhost:5000")
     print("افتح المتصفح وروح على: http://localhost:5000")
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    # تشغيل السيرفر: waitress إن كان مثبتاً (pip install waitress)، وإلا خادم Flask المدمج
+    try:
+        from waitress import serve
+    except ImportError:
+        app.run(debug=False, host='0.0.0.0', port=5000, use_reloader=False)
+    else:
+        serve(app, host='0.0.0.0', port=5000, threads=8)
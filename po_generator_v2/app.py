@@ -4,36 +4,133 @@
 Main Flask Application for Purchase Order System v2
 """
 
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import (Blueprint, Flask, Response, current_app, render_template, request,
+                   jsonify, send_file)
 from models import db, Supplier, Product, Order, OrderItem
-from database import init_database, get_next_po_number
-from excel_generator import create_professional_excel
-from pdf_generator import create_pdf_from_order
+from config import get_config, DevelopmentConfig
+from database import init_database
+from db_engine import configure_engine, retry_on_busy, is_busy_error, busy_retry_stats
+from sequences import reserve_po_number, claim_po_number
+from queries import (filter_orders, list_order_graphs, list_export_order_graphs,
+                     get_order_graph_or_404, get_order_header_or_404,
+                     count_order_items, iter_order_items)
+from excel_generator import GENERATOR_VERSION as EXCEL_GENERATOR_VERSION
+from pdf_generator import GENERATOR_VERSION as PDF_GENERATOR_VERSION
+from money import calculate_totals, parse_amount, round_money, to_float, DEFAULT_TAX_RATE
+from reports import (add_orders_to_reports, remove_orders_from_reports, spend_report,
+                     top_products, parse_month, SPEND_GROUPINGS, PRODUCT_RANKINGS)
+from product_index import ProductIndex, DEFAULT_SEARCH_LIMIT, MAX_SEARCH_LIMIT
+from reference_data import (SUPPLIERS, PRODUCTS, bump_reference_version, reference_version,
+                            reference_response, register_reference_events, json_bytes)
+from document_cache import DocumentCache, document_key, register_invalidation_events, MIMETYPES
+from jobs import DocumentJobQueue, JOB_DONE
+from batch_export import EXPORT_FORMATS, MAX_EXPORT_ORDERS, MAX_MERGED_ORDERS, merged_timeout, stream_pdf_zip
+from renderer import (RendererBusy, RenderTimeout, configure_renderer, get_renderer, render_order_excel_file,
+                      render_merged_pdf)
+from bulk_import import (import_orders, iter_jsonl_records, iter_csv_rows,
+                         iter_xlsx_rows, iter_table_records)
+from sqlalchemy.exc import OperationalError
 from datetime import datetime
+from decimal import InvalidOperation
+import base64
+import binascii
+import csv
 import io
 import os
+import zipfile
 
-app = Flask(__name__)
+bp = Blueprint('po', __name__)
 
-# إعدادات التطبيق - Application Configuration
-app.config['SECRET_KEY'] = 'your-secret-key-here-change-in-production'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///po_system.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
-# تهيئة قاعدة البيانات - Initialize Database
-db.init_app(app)
-with app.app_context():
+def create_app(config=None):
+    """
+    إنشاء التطبيق - Application factory
+
+    config: صنف إعدادات أو اسمه (development / production)،
+    وبدونه يُقرأ من متغير البيئة PO_CONFIG.
+    """
+    app = Flask(__name__)
+    app.config.from_object(config if isinstance(config, type) else get_config(config))
+    if not app.config['DOCUMENT_CACHE_DIR']:
+        app.config['DOCUMENT_CACHE_DIR'] = os.path.join(app.instance_path, 'document_cache')
+
+    # تهيئة قاعدة البيانات - Initialize Database
+    db.init_app(app)
+    with app.app_context():
+        engine = db.engine
+        configure_engine(engine)
     init_database(app)
 
+    # كل عملية فرعية (عامل خادم أو عملية توليد) تفتح اتصالاتها بنفسها
+    # ولا تستخدم اتصالات SQLite الموروثة من العملية الأم
+    if hasattr(os, 'register_at_fork'):
+        os.register_at_fork(after_in_child=lambda: engine.dispose(close=False))
+
+    # إصدارات القوائم المرجعية - Reference list versions
+    register_reference_events()
+
+    # فهرس الإكمال التلقائي للأصناف - Product typeahead index
+    app.extensions['product_index'] = ProductIndex()
+    with app.app_context():
+        refresh_product_index()
+
+    # ذاكرة ملفات Excel و PDF المولدة - Generated documents cache
+    document_cache = DocumentCache(app.config['DOCUMENT_CACHE_DIR'], app.config['DOCUMENT_CACHE_MAX_BYTES'])
+    app.extensions['document_cache'] = document_cache
+    register_invalidation_events()
+
+    # خدمة التوليد في عمليات منفصلة (تبدأ عند أول ملف أو من serve.py)
+    configure_renderer(
+        workers=app.config['RENDER_WORKERS'],
+        max_pending=app.config['RENDER_MAX_PENDING'],
+        timeout=app.config['RENDER_TIMEOUT'],
+        queue_wait=app.config['RENDER_QUEUE_WAIT'],
+        max_tasks_per_child=app.config['RENDER_MAX_TASKS_PER_CHILD'],
+    )
+
+    # طابور توليد الملفات في الخلفية - Background document jobs
+    app.extensions['document_jobs'] = DocumentJobQueue(document_cache)
+
+    app.register_blueprint(bp)
+    return app
+
+
+def get_product_index():
+    """فهرس الأصناف للتطبيق الحالي - Product index of the current app"""
+    return current_app.extensions['product_index']
+
+
+def worker_database_url():
+    """رابط قاعدة البيانات لعمليات التوليد - Full database URL (with password) for render workers"""
+    return db.engine.url.render_as_string(hide_password=False)
+
 
-@app.route('/')
+def get_document_cache():
+    """ذاكرة الملفات للتطبيق الحالي - Document cache of the current app"""
+    return current_app.extensions['document_cache']
+
+
+def get_document_jobs():
+    """طابور المهام للتطبيق الحالي - Job queue of the current app"""
+    return current_app.extensions['document_jobs']
+
+
+def refresh_product_index():
+    """إعادة بناء فهرس الأصناف إذا تغيرت القائمة - Rebuild the index on a new products version"""
+    product_index = get_product_index()
+    version = reference_version(PRODUCTS)
+    if product_index.version != version:
+        product_index.build((p.to_dict() for p in Product.query.all()), version)
+
+
+@bp.route('/')
 def index():
     """الصفحة الرئيسية - Main page for creating new orders"""
-    next_po_number = get_next_po_number()
+    next_po_number = reserve_po_number()
     return render_template('index.html', next_po_number=next_po_number)
 
 
-@app.route('/orders')
+@bp.route('/orders')
 def orders():
     """صفحة الطلبات السابقة - Previous orders page"""
     return render_template('orders.html')
@@ -41,14 +138,18 @@ def orders():
 
 # === API للموردين - Suppliers API ===
 
-@app.route('/api/suppliers', methods=['GET'])
+@bp.route('/api/suppliers', methods=['GET'])
 def get_suppliers():
     """الحصول على جميع الموردين - Get all suppliers"""
-    suppliers = Supplier.query.order_by(Supplier.name).all()
-    return jsonify([s.to_dict() for s in suppliers])
+    def build():
+        suppliers = Supplier.query.order_by(Supplier.name).all()
+        return json_bytes([s.to_dict() for s in suppliers])
+
+    return reference_response(SUPPLIERS, build)
 
 
-@app.route('/api/suppliers', methods=['POST'])
+@bp.route('/api/suppliers', methods=['POST'])
+@retry_on_busy
 def create_supplier():
     """إضافة مورد جديد - Create new supplier"""
     data = request.json
@@ -62,6 +163,7 @@ def create_supplier():
     )
     
     db.session.add(supplier)
+    bump_reference_version(db.session, SUPPLIERS)
     db.session.commit()
     
     return jsonify({
@@ -71,7 +173,7 @@ def create_supplier():
     })
 
 
-@app.route('/api/suppliers/<int:supplier_id>', methods=['GET'])
+@bp.route('/api/suppliers/<int:supplier_id>', methods=['GET'])
 def get_supplier(supplier_id):
     """الحصول على بيانات مورد معين - Get specific supplier"""
     supplier = Supplier.query.get_or_404(supplier_id)
@@ -80,14 +182,18 @@ def get_supplier(supplier_id):
 
 # === API للأصناف - Products API ===
 
-@app.route('/api/products', methods=['GET'])
+@bp.route('/api/products', methods=['GET'])
 def get_products():
     """الحصول على جميع الأصناف - Get all products"""
-    products = Product.query.order_by(Product.name).all()
-    return jsonify([p.to_dict() for p in products])
+    def build():
+        products = Product.query.order_by(Product.name).all()
+        return json_bytes([p.to_dict() for p in products])
 
+    return reference_response(PRODUCTS, build)
 
-@app.route('/api/products', methods=['POST'])
+
+@bp.route('/api/products', methods=['POST'])
+@retry_on_busy
 def create_product():
     """إضافة صنف جديد - Create new product"""
     data = request.json
@@ -108,7 +214,9 @@ def create_product():
     )
     
     db.session.add(product)
+    version = bump_reference_version(db.session, PRODUCTS)
     db.session.commit()
+    get_product_index().add(product.to_dict(), version)
     
     return jsonify({
         'success': True,
@@ -117,7 +225,20 @@ def create_product():
     })
 
 
-@app.route('/api/products/<int:product_id>', methods=['GET'])
+@bp.route('/api/products/search', methods=['GET'])
+def search_products():
+    """
+    بحث الأصناف للإكمال التلقائي - Typeahead search by code or name prefix
+
+    q: بداية الكود أو بداية أي كلمة في الاسم، limit: عدد النتائج (حتى 50)
+    """
+    query = request.args.get('q', '').strip()
+    limit = min(max(request.args.get('limit', DEFAULT_SEARCH_LIMIT, type=int), 1), MAX_SEARCH_LIMIT)
+    refresh_product_index()
+    return jsonify(get_product_index().search(query, limit))
+
+
+@bp.route('/api/products/<int:product_id>', methods=['GET'])
 def get_product(product_id):
     """الحصول على بيانات صنف معين - Get specific product"""
     product = Product.query.get_or_404(product_id)
@@ -126,77 +247,124 @@ def get_product(product_id):
 
 # === API للطلبات - Orders API ===
 
-@app.route('/api/orders', methods=['GET'])
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_orders_cursor(created_at, order_id):
+    """ترميز مؤشر الصفحة التالية - Encode keyset cursor for the next page"""
+    raw = f'{created_at.isoformat()}|{order_id}'
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_orders_cursor(cursor):
+    """فك ترميز مؤشر الصفحة - Decode keyset cursor, raises ValueError if invalid"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        created_at, order_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(order_id)
+    except (UnicodeError, binascii.Error) as e:
+        raise ValueError(str(e))
+
+
+@bp.route('/api/orders', methods=['GET'])
 def get_orders():
-    """الحصول على جميع الطلبات - Get all orders"""
+    """
+    الحصول على الطلبات - Get orders
+
+    بدون limit: يرجع كل الطلبات بكامل بياناتها (السلوك القديم)
+    مع limit: يرجع صفحة مختصرة بترقيم keyset مع next_cursor
+    """
     # الفلترة حسب المعايير المطلوبة
     search = request.args.get('search', '').strip()
     status = request.args.get('status', '').strip()
-    
-    query = Order.query
-    
-    if search:
+
+    if request.args.get('limit'):
+        return get_orders_page(search, status)
+
+    orders = list_order_graphs(search, status)
+    return jsonify([o.to_dict() for o in orders])
+
+
+def get_orders_page(search, status):
+    """
+    صفحة مختصرة من الطلبات - Keyset-paginated summary page of orders
+
+    يجلب فقط الأعمدة التي يعرضها جدول الطلبات، ويرتب حسب (created_at, id)
+    تنازلياً حتى يبقى زمن الاستجابة ثابتاً مهما كبر جدول الطلبات.
+    """
+    try:
+        limit = min(max(int(request.args.get('limit', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        limit = DEFAULT_PAGE_SIZE
+
+    query = db.session.query(
+        Order.id,
+        Order.po_number,
+        Order.po_date,
+        Order.total,
+        Order.status,
+        Order.created_at,
+        Supplier.name.label('supplier_name')
+    ).outerjoin(Supplier, Order.supplier_id == Supplier.id)
+
+    query = filter_orders(query, search, status)
+
+    cursor = request.args.get('cursor', '').strip()
+    if cursor:
+        try:
+            cursor_created_at, cursor_id = decode_orders_cursor(cursor)
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'message': 'مؤشر الصفحة غير صالح'
+            }), 400
         query = query.filter(
-            (Order.po_number.contains(search)) |
-            (Order.supplier.has(Supplier.name.contains(search)))
+            (Order.created_at < cursor_created_at) |
+            ((Order.created_at == cursor_created_at) & (Order.id < cursor_id))
         )
-    
-    if status:
-        query = query.filter_by(status=status)
-    
-    orders = query.order_by(Order.created_at.desc()).all()
-    return jsonify([o.to_dict() for o in orders])
+
+    # نجلب صفاً زائداً لمعرفة وجود صفحة تالية
+    rows = query.order_by(Order.created_at.desc(), Order.id.desc()).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = encode_orders_cursor(last.created_at, last.id)
+
+    return jsonify({
+        'orders': [
+            {
+                'id': row.id,
+                'po_number': row.po_number,
+                'po_date': row.po_date.strftime('%Y-%m-%d'),
+                'supplier_name': row.supplier_name,
+                'total': to_float(row.total),
+                'status': row.status
+            }
+            for row in rows
+        ],
+        'next_cursor': next_cursor
+    })
 
 
-@app.route('/api/orders', methods=['POST'])
+@bp.route('/api/orders', methods=['POST'])
 def create_order():
     """إنشاء طلب جديد - Create new order"""
     data = request.json
+
+    try:
+        items_data, tax_rate = parse_order_amounts(data)
+    except (ValueError, InvalidOperation) as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
     
     try:
-        # إنشاء الطلب
-        order = Order(
-            po_number=data.get('po_number'),
-            po_date=datetime.strptime(data.get('po_date'), '%Y-%m-%d').date(),
-            company_tax_id=data.get('company_tax_id'),
-            company_commercial_reg=data.get('commercial_reg'),
-            supplier_id=data.get('supplier_id'),
-            delivery_period=data.get('delivery_period'),
-            delivery_location=data.get('delivery_location'),
-            payment_terms=data.get('payment_terms'),
-            notes=data.get('notes'),
-            status='مؤكد'
-        )
-        
-        # إضافة الأصناف
-        subtotal = 0.0
-        for idx, item_data in enumerate(data.get('items', []), start=1):
-            quantity = float(item_data.get('quantity', 0))
-            unit_price = float(item_data.get('unit_price', 0))
-            total_price = quantity * unit_price
-            subtotal += total_price
-            
-            item = OrderItem(
-                product_code=item_data.get('product_code'),
-                product_name=item_data.get('product_name'),
-                description=item_data.get('description'),
-                quantity=quantity,
-                unit_price=unit_price,
-                total_price=total_price,
-                item_order=idx
-            )
-            order.items.append(item)
-        
-        # حساب الإجماليات
-        tax_rate = float(data.get('tax_rate', 14))
-        tax_amount = subtotal * (tax_rate / 100)
-        order.subtotal = subtotal
-        order.tax_amount = tax_amount
-        order.total = subtotal + tax_amount
-        order.tax_rate = tax_rate
-        
-        db.session.add(order)
-        db.session.commit()
+        order = insert_order(data, items_data, tax_rate)
         
         return jsonify({
             'success': True,
@@ -206,23 +374,136 @@ def create_order():
     
     except Exception as e:
         db.session.rollback()
+        if is_busy_error(e):
+            raise
         return jsonify({
             'success': False,
             'message': f'حدث خطأ: {str(e)}'
         }), 500
 
 
-@app.route('/api/orders/<int:order_id>', methods=['GET'])
+def parse_order_amounts(data):
+    """
+    التحقق من الكميات والأسعار قبل الحفظ - Validate amounts and round unit prices
+
+    السعر يُقرب لأقرب قرش قبل حساب الإجماليات كما في الاستيراد بالجملة، فيكون
+    إجمالي الصنف المحفوظ = الكمية × السعر المحفوظ. يرفع ValueError برسالة عربية.
+    """
+    items_data = []
+    for idx, item_data in enumerate(data.get('items') or [], start=1):
+        if not isinstance(item_data, dict):
+            raise ValueError(f'الصنف {idx} غير صالح')
+        items_data.append(dict(
+            item_data,
+            quantity=parse_amount(item_data.get('quantity'), f'كمية الصنف {idx}', default=0.0),
+            unit_price=round_money(parse_amount(item_data.get('unit_price'), f'سعر الصنف {idx}', default=0.0)),
+        ))
+    tax_rate = parse_amount(data.get('tax_rate'), 'نسبة الضريبة', default=float(DEFAULT_TAX_RATE))
+    return items_data, tax_rate
+
+
+@retry_on_busy
+def insert_order(data, items_data, tax_rate):
+    """حفظ الطلب وأصنافه في معاملة واحدة - Insert an order (retried on SQLITE_BUSY)"""
+    # الرقم المحجوز في النموذج، أو رقم جديد إذا استُخدم بالفعل
+    po_number = claim_po_number(data.get('po_number'))
+    
+    # إنشاء الطلب
+    order = Order(
+        po_number=po_number,
+        po_date=datetime.strptime(data.get('po_date'), '%Y-%m-%d').date(),
+        company_tax_id=data.get('company_tax_id'),
+        company_commercial_reg=data.get('commercial_reg'),
+        supplier_id=data.get('supplier_id'),
+        delivery_period=data.get('delivery_period'),
+        delivery_location=data.get('delivery_location'),
+        payment_terms=data.get('payment_terms'),
+        notes=data.get('notes'),
+        status='مؤكد'
+    )
+    
+    # إضافة الأصناف والإجماليات بدقة ثابتة (money.py)
+    totals = calculate_totals(items_data, tax_rate)
+    
+    for idx, (item_data, total_price) in enumerate(zip(items_data, totals.line_totals), start=1):
+        item = OrderItem(
+            product_code=item_data.get('product_code'),
+            product_name=item_data.get('product_name'),
+            description=item_data.get('description'),
+            quantity=item_data['quantity'],
+            unit_price=item_data['unit_price'],
+            total_price=total_price,
+            item_order=idx
+        )
+        order.items.append(item)
+    
+    order.subtotal = totals.subtotal
+    order.tax_amount = totals.tax_amount
+    order.total = totals.total
+    order.tax_rate = tax_rate
+    
+    db.session.add(order)
+    db.session.flush()
+    add_orders_to_reports(db.session.connection(), [order.id])
+    db.session.commit()
+    return order
+
+
+@bp.route('/api/orders/bulk', methods=['POST'])
+def bulk_import_orders():
+    """
+    استيراد طلبات بالجملة - Bulk order import
+
+    ملف مرفوع باسم file (.jsonl أو .csv أو .xlsx)، أو محتوى الطلب مباشرة
+    بنوع application/x-ndjson أو text/csv. يرجع عدد الطلبات المستوردة
+    وقائمة بأخطاء الصفوف المرفوضة.
+    """
+    upload = request.files.get('file')
+    if upload is not None:
+        stream = upload.stream
+        file_type = os.path.splitext(upload.filename or '')[1].lower().lstrip('.')
+    else:
+        stream = request.stream
+        file_type = {
+            'application/x-ndjson': 'jsonl',
+            'application/jsonl': 'jsonl',
+            'text/csv': 'csv',
+        }.get(request.mimetype)
+
+    if file_type in ('jsonl', 'ndjson'):
+        records = iter_jsonl_records(stream)
+    elif file_type == 'csv':
+        records = iter_table_records(iter_csv_rows(stream))
+    elif file_type == 'xlsx':
+        records = iter_table_records(iter_xlsx_rows(stream))
+    else:
+        return jsonify({
+            'success': False,
+            'message': 'صيغة الملف غير مدعومة (JSON Lines أو CSV أو XLSX)'
+        }), 400
+
+    try:
+        result = import_orders(records)
+    except (UnicodeDecodeError, csv.Error, zipfile.BadZipFile) as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': f'تعذرت قراءة الملف: {str(e)}'}), 400
+
+    return jsonify(result.to_dict())
+
+
+@bp.route('/api/orders/<int:order_id>', methods=['GET'])
 def get_order(order_id):
     """الحصول على بيانات طلب معين - Get specific order"""
-    order = Order.query.get_or_404(order_id)
+    order = get_order_graph_or_404(order_id)
     return jsonify(order.to_dict())
 
 
-@app.route('/api/orders/<int:order_id>', methods=['DELETE'])
+@bp.route('/api/orders/<int:order_id>', methods=['DELETE'])
+@retry_on_busy
 def delete_order(order_id):
     """حذف طلب - Delete order"""
     order = Order.query.get_or_404(order_id)
+    remove_orders_from_reports(db.session.connection(), [order_id])
     db.session.delete(order)
     db.session.commit()
     
@@ -234,53 +515,312 @@ def delete_order(order_id):
 
 # === API لتوليد الملفات - File Generation API ===
 
-@app.route('/api/orders/<int:order_id>/excel', methods=['GET'])
+# عدد الأصناف الذي يبدأ عنده التصدير المتدفق لملفات Excel
+STREAMING_EXCEL_MIN_ITEMS = 500
+
+
+def send_document(path, key, mimetype, filename):
+    """
+    إرسال ملف مخزن مع ETag - Send a cached document with ETag support
+
+    conditional=True يجعل Werkzeug يرد بـ 304 إذا طابق If-None-Match المفتاح.
+    """
+    return send_file(
+        path,
+        mimetype=mimetype,
+        as_attachment=True,
+        download_name=filename,
+        etag=key,
+        conditional=True
+    )
+
+
+@bp.route('/api/orders/<int:order_id>/excel', methods=['GET'])
 def generate_excel(order_id):
     """توليد ملف Excel للطلب - Generate Excel for order"""
-    order = Order.query.get_or_404(order_id)
-    order_dict = order.to_dict()
-    
-    wb = create_professional_excel(order_dict)
-    
-    output = io.BytesIO()
-    wb.save(output)
-    output.seek(0)
+    if count_order_items(order_id) > STREAMING_EXCEL_MIN_ITEMS:
+        # الطلبات الكبيرة: البصمة تُحسب من مؤشر الأصناف، والأصناف تُحمّل فقط إذا لزم التوليد
+        order = get_order_header_or_404(order_id)
+        order_dict = order.to_dict(include_items=False)
+        key = document_key(order_dict, 'excel', EXCEL_GENERATOR_VERSION, iter_order_items(order_id))
+        # عملية التوليد تقرأ الأصناف وتكتب الملف المؤقت بنفسها
+        renderer = get_renderer()
+        path = get_document_cache().get_or_render_file(
+            order_id, 'excel', key,
+            lambda tmp_path: renderer.result(renderer.submit(
+                render_order_excel_file, worker_database_url(), order_id, order_dict, tmp_path
+            ))
+        )
+    else:
+        order = get_order_graph_or_404(order_id)
+        order_dict = order.to_dict()
+        key = document_key(order_dict, 'excel', EXCEL_GENERATOR_VERSION)
+        path = get_document_cache().get_or_render(
+            order_id, 'excel', key,
+            lambda output: output.write(get_renderer().render('excel', order_dict))
+        )
     
     filename = f'طلب_توريد_{order.po_number}.xlsx'
     
-    return send_file(
-        output,
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-        as_attachment=True,
-        download_name=filename
-    )
+    return send_document(path, key, MIMETYPES['excel'], filename)
 
 
-@app.route('/api/orders/<int:order_id>/pdf', methods=['GET'])
+@bp.route('/api/orders/<int:order_id>/pdf', methods=['GET'])
 def generate_pdf(order_id):
     """توليد ملف PDF للطلب - Generate PDF for order"""
-    order = Order.query.get_or_404(order_id)
+    order = get_order_graph_or_404(order_id)
     order_dict = order.to_dict()
+    key = document_key(order_dict, 'pdf', PDF_GENERATOR_VERSION)
     
-    pdf_buffer = create_pdf_from_order(order_dict)
+    path = get_document_cache().get_or_render(
+        order_id, 'pdf', key,
+        lambda output: output.write(get_renderer().render('pdf', order_dict))
+    )
     
     filename = f'طلب_توريد_{order.po_number}.pdf'
     
-    return send_file(
-        pdf_buffer,
-        mimetype='application/pdf',
-        as_attachment=True,
-        download_name=filename
+    return send_document(path, key, MIMETYPES['pdf'], filename)
+
+
+# === مهام التوليد في الخلفية - Background render jobs ===
+
+def load_job_document(order_id, kind):
+    """
+    بيانات الطلب وبصمة الملف لمهمة - (order_data, key, streaming) for a render job
+
+    البصمة تُحسب بنفس طريقة نقاط التحميل المباشر حتى تتشارك نفس الملفات المخزنة.
+    """
+    if kind == 'excel' and count_order_items(order_id) > STREAMING_EXCEL_MIN_ITEMS:
+        # الأصناف لا تُحمّل هنا؛ عملية التوليد تقرأها من قاعدة البيانات
+        order_data = get_order_header_or_404(order_id).to_dict(include_items=False)
+        key = document_key(order_data, kind, EXCEL_GENERATOR_VERSION, iter_order_items(order_id))
+        return order_data, key, True
+
+    order_data = get_order_graph_or_404(order_id).to_dict()
+    version = EXCEL_GENERATOR_VERSION if kind == 'excel' else PDF_GENERATOR_VERSION
+    return order_data, document_key(order_data, kind, version), False
+
+
+@bp.route('/api/orders/<int:order_id>/<kind>/jobs', methods=['POST'])
+def submit_document_job(order_id, kind):
+    """طلب توليد ملف في الخلفية - Submit a background render (kind: excel | pdf)"""
+    if kind not in MIMETYPES:
+        return jsonify({'success': False, 'message': 'نوع الملف غير مدعوم'}), 404
+
+    order_data, key, streaming = load_job_document(order_id, kind)
+    extension = 'xlsx' if kind == 'excel' else 'pdf'
+    filename = f"طلب_توريد_{order_data['po_number']}.{extension}"
+
+    database_url = worker_database_url() if streaming else None
+    job = get_document_jobs().submit(order_id, kind, key, filename, order_data, database_url)
+    return jsonify({'success': True, **job.to_dict()}), 202
+
+
+@bp.route('/api/jobs/<job_id>', methods=['GET'])
+def get_document_job(job_id):
+    """حالة مهمة - Job status"""
+    job = get_document_jobs().get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'message': 'المهمة غير موجودة'}), 404
+    return jsonify({'success': True, **job.to_dict()})
+
+
+@bp.route('/api/jobs/<job_id>/download', methods=['GET'])
+def download_document_job(job_id):
+    """تحميل ناتج مهمة منتهية - Download a finished job's document"""
+    job = get_document_jobs().get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'message': 'المهمة غير موجودة'}), 404
+    if job.current_status != JOB_DONE:
+        return jsonify({'success': False, 'message': 'الملف لم يكتمل بعد', **job.to_dict()}), 409
+
+    path = get_document_cache().get(job.order_id, job.kind, job.key)
+    if path is None:
+        return jsonify({'success': False, 'message': 'الملف لم يعد متاحاً، برجاء إعادة الطلب'}), 410
+    return send_document(path, job.key, MIMETYPES[job.kind], job.filename)
+
+
+def parse_export_request(args):
+    """
+    قراءة معايير التصدير من الرابط - Parse batch export criteria from query args
+
+    ids=1,2,3 أو فلتر: date_from, date_to (YYYY-MM-DD), status, supplier_id, search.
+    يرفع ValueError برسالة عربية إذا كانت القيم غير صالحة.
+    """
+    criteria = {
+        'status': args.get('status', '').strip(),
+        'search': args.get('search', '').strip(),
+    }
+
+    try:
+        ids = [int(value) for value in args.get('ids', '').split(',') if value.strip()]
+    except ValueError:
+        raise ValueError('أرقام الطلبات غير صالحة')
+    if len(ids) > MAX_EXPORT_ORDERS:
+        raise ValueError(f'الحد الأقصى للتصدير {MAX_EXPORT_ORDERS} طلب')
+    criteria['order_ids'] = ids
+
+    for name in ('date_from', 'date_to'):
+        value = args.get(name, '').strip()
+        try:
+            criteria[name] = datetime.strptime(value, '%Y-%m-%d').date() if value else None
+        except ValueError:
+            raise ValueError('صيغة التاريخ غير صالحة (YYYY-MM-DD)')
+
+    supplier_id = args.get('supplier_id', '').strip()
+    try:
+        criteria['supplier_id'] = int(supplier_id) if supplier_id else None
+    except ValueError:
+        raise ValueError('رقم المورد غير صالح')
+
+    return criteria
+
+
+@bp.route('/api/orders/export/pdf', methods=['GET'])
+def export_orders_pdf():
+    """
+    تصدير PDF لعدة طلبات - Batch PDF export
+
+    format=zip (افتراضي): ملف ZIP بملف لكل طلب، يُولّد بالتوازي ويُرسل أولاً بأول
+    format=merged: ملف PDF واحد، كل طلب يبدأ في صفحة جديدة (حتى MAX_MERGED_ORDERS طلب)
+    """
+    export_format = request.args.get('format', 'zip')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'success': False, 'message': 'صيغة التصدير غير مدعومة'}), 400
+
+    try:
+        criteria = parse_export_request(request.args)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+    orders = list_export_order_graphs(limit=MAX_EXPORT_ORDERS + 1, **criteria)
+    if not orders:
+        return jsonify({'success': False, 'message': 'لا توجد طلبات مطابقة للتصدير'}), 404
+    if len(orders) > MAX_EXPORT_ORDERS:
+        return jsonify({
+            'success': False,
+            'message': f'الحد الأقصى للتصدير {MAX_EXPORT_ORDERS} طلب، برجاء تضييق الفلتر'
+        }), 400
+
+    # البيانات تُجهّز قبل الإرسال لأن التوليد يستمر بعد انتهاء سياق الطلب
+    orders_data = [order.to_dict() for order in orders]
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+
+    if export_format == 'merged':
+        if len(orders_data) > MAX_MERGED_ORDERS:
+            return jsonify({
+                'success': False,
+                'message': f'الحد الأقصى للملف المدمج {MAX_MERGED_ORDERS} طلب، استخدم format=zip للأكثر'
+            }), 400
+        renderer = get_renderer()
+        merged = renderer.result(renderer.submit(render_merged_pdf, orders_data),
+                                 merged_timeout(len(orders_data), renderer.timeout))
+        return send_file(
+            io.BytesIO(merged),
+            mimetype='application/pdf',
+            as_attachment=True,
+            download_name=f'طلبات_التوريد_{stamp}.pdf'
+        )
+
+    response = Response(stream_pdf_zip(orders_data), mimetype='application/zip')
+    response.headers['Content-Disposition'] = f'attachment; filename=purchase_orders_{stamp}.zip'
+    return response
+
+
+# === التقارير - Reports API ===
+
+@bp.route('/api/reports/spend', methods=['GET'])
+def get_spend_report():
+    """
+    تقرير المشتريات من الجداول الملخصة - Spend report from the summary tables
+
+    group_by=supplier|month|status، مع فلاتر اختيارية:
+    from و to (YYYY-MM)، status، supplier_id
+    """
+    group_by = request.args.get('group_by', 'supplier')
+    if group_by not in SPEND_GROUPINGS:
+        return jsonify({'success': False, 'message': 'نوع التجميع غير مدعوم'}), 400
+
+    try:
+        month_from = parse_month(request.args.get('from'))
+        month_to = parse_month(request.args.get('to'))
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+    rows = spend_report(
+        group_by,
+        month_from,
+        month_to,
+        request.args.get('status', '').strip(),
+        request.args.get('supplier_id', type=int)
     )
+    return jsonify({'success': True, 'group_by': group_by, 'rows': rows})
+
+
+@bp.route('/api/reports/top-products', methods=['GET'])
+def get_top_products_report():
+    """أكثر الأصناف شراءً - Top products (by=value|quantity, from, to, limit)"""
+    rank_by = request.args.get('by', 'value')
+    if rank_by not in PRODUCT_RANKINGS:
+        return jsonify({'success': False, 'message': 'نوع الترتيب غير مدعوم'}), 400
+
+    try:
+        month_from = parse_month(request.args.get('from'))
+        month_to = parse_month(request.args.get('to'))
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 100)
+    rows = top_products(rank_by, month_from, month_to, limit)
+    return jsonify({'success': True, 'by': rank_by, 'rows': rows})
+
+
+@bp.app_errorhandler(OperationalError)
+def database_busy(error):
+    """قاعدة البيانات مشغولة بعد كل المحاولات - 503 after the busy retries ran out"""
+    if not is_busy_error(error):
+        raise error
+    response = jsonify({
+        'success': False,
+        'message': 'قاعدة البيانات مشغولة حالياً، حاول مرة أخرى'
+    })
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+
+@bp.app_errorhandler(RendererBusy)
+def renderer_busy(error):
+    """طابور توليد الملفات ممتلئ - 503 when the render queue is full"""
+    response = jsonify({'success': False, 'message': str(error)})
+    response.headers['Retry-After'] = '2'
+    return response, 503
+
+
+@bp.app_errorhandler(RenderTimeout)
+def render_timeout(error):
+    """توليد الملف تجاوز المهلة - 504 when a render takes too long"""
+    return jsonify({'success': False, 'message': str(error)}), 504
 
 
-@app.route('/api/next-po-number', methods=['GET'])
+@bp.route('/api/next-po-number', methods=['GET'])
 def next_po_number():
     """الحصول على رقم الطلب التالي - Get next PO number"""
     return jsonify({
-        'po_number': get_next_po_number()
+        'po_number': reserve_po_number()
+    })
+
+
+@bp.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """مؤشرات الأداء الداخلية للمراقبة - Internal performance counters"""
+    return jsonify({
+        'arabic_shaping': get_renderer().shaping_stats(),
+        'document_jobs': get_document_jobs().stats(),
+        'database_busy': busy_retry_stats(),
+        'renderer': get_renderer().stats()
     })
 
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    # خادم التطوير فقط؛ للإنتاج استخدم serve.py
+    create_app(DevelopmentConfig).run(host='0.0.0.0', port=5000)
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+قياس سرعة الاستيراد بالجملة مقارنة بإنشاء الطلبات واحداً واحداً
+Bulk import throughput vs the per-order POST /api/orders path
+
+نفس الطلبات التجريبية تُحفظ في قاعدة SQLite مؤقتة جديدة لكل طريقة
+(أو DATABASE_URL فارغة مع --database-url):
+- per-order: طلب POST /api/orders لكل طلب (المسار القديم؛ معاملة لكل طلب)
+- jsonl: import_orders على ملف JSON Lines (طلب لكل سطر)
+- csv: import_orders على ملف CSV (صنف لكل صف، order_ref يجمع الطلب)
+
+المسار القديم أبطأ بكثير، لذلك يُقاس على أول --per-order طلب فقط.
+
+الاستخدام - Usage:
+    python benchmark_bulk_import.py [--orders 5000] [--items 5] [--per-order 500]
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import random
+import tempfile
+import time
+from sqlalchemy import MetaData
+from benchmark_queries import make_config
+from bulk_import import ITEM_COLUMNS, import_orders, iter_csv_rows, iter_jsonl_records, iter_table_records
+from config import database_url
+
+
+def synthetic_records(order_count, item_count, supplier_ids):
+    """طلبات تجريبية بشكل POST /api/orders - Synthetic order records"""
+    rng = random.Random(5)
+    return [{
+        'po_date': f'2026-{index % 12 + 1:02d}-{index % 28 + 1:02d}',
+        'supplier_id': rng.choice(supplier_ids),
+        'delivery_location': 'المخزن الرئيسي',
+        'items': [{'product_code': f'P{item:04d}', 'product_name': f'صنف {item}',
+                   'quantity': rng.randint(1, 50), 'unit_price': round(rng.uniform(5, 500), 2)}
+                  for item in range(item_count)],
+    } for index in range(order_count)]
+
+
+def to_jsonl(records):
+    return '\n'.join(json.dumps(record, ensure_ascii=False) for record in records).encode('utf-8')
+
+
+def to_csv(records):
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(('order_ref', 'po_date', 'supplier_id', 'delivery_location') + ITEM_COLUMNS)
+    for ref, record in enumerate(records, start=1):
+        for item in record['items']:
+            writer.writerow((ref, record['po_date'], record['supplier_id'], record['delivery_location'])
+                            + tuple(item.get(name, '') for name in ITEM_COLUMNS))
+    return output.getvalue().encode('utf-8')
+
+
+def run_per_order(app, records):
+    client = app.test_client()
+    for record in records:
+        response = client.post('/api/orders', json=record)
+        assert response.status_code == 200, response.json
+    return len(records)
+
+
+def run_jsonl(app, records):
+    body = to_jsonl(records)
+    with app.app_context():
+        result = import_orders(iter_jsonl_records(io.BytesIO(body)))
+    assert not result.errors, result.errors[:3]
+    return len(result.created)
+
+
+def run_csv(app, records):
+    body = to_csv(records)
+    with app.app_context():
+        result = import_orders(iter_table_records(iter_csv_rows(io.BytesIO(body))))
+    assert not result.errors, result.errors[:3]
+    return len(result.created)
+
+
+MODES = {
+    'per-order': run_per_order,
+    'jsonl': run_jsonl,
+    'csv': run_csv,
+}
+
+
+def measure(mode, order_count, item_count, url_override):
+    """(الطلبات المحفوظة، الزمن) على قاعدة جديدة - (imported, seconds) on a fresh database"""
+    from app import create_app
+    from models import db, Supplier
+
+    with tempfile.TemporaryDirectory() as directory:
+        url = url_override or 'sqlite:///' + os.path.join(directory, 'po_system.db')
+        app = create_app(make_config(directory, url))
+        try:
+            with app.app_context():
+                supplier_ids = [supplier.id for supplier in Supplier.query.all()]
+            records = synthetic_records(order_count, item_count, supplier_ids)
+            start = time.perf_counter()
+            imported = MODES[mode](app, records)
+            return imported, time.perf_counter() - start
+        finally:
+            with app.app_context():
+                if url_override:
+                    tables = MetaData()
+                    tables.reflect(bind=db.engine)
+                    tables.drop_all(bind=db.engine)
+                db.engine.dispose()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='قياس سرعة الاستيراد بالجملة')
+    parser.add_argument('--orders', type=int, default=5000)
+    parser.add_argument('--items', type=int, default=5)
+    parser.add_argument('--per-order', type=int, default=500, help='عدد الطلبات للمسار القديم')
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    parser.add_argument('--database-url', help='قاعدة فارغة للقياس بدلاً من SQLite مؤقت')
+    args = parser.parse_args(argv)
+
+    from renderer import shutdown_renderer
+
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    url_override = database_url() if args.database_url else None
+
+    baseline = None
+    try:
+        for mode in args.modes:
+            order_count = min(args.orders, args.per_order) if mode == 'per-order' else args.orders
+            imported, elapsed = measure(mode, order_count, args.items, url_override)
+            rate = imported / elapsed
+            baseline = baseline or rate
+            print(f'{mode:>9}: {imported} orders in {elapsed:.2f} s, {rate:.0f} orders/s, '
+                  f'{rate * args.items:.0f} item rows/s, x{rate / baseline:.1f} vs {args.modes[0]}')
+    finally:
+        shutdown_renderer()
+
+
+if __name__ == '__main__':
+    main()
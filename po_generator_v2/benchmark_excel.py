@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+قياس سرعة توليد Excel وحجم الذاكرة لكل ملف
+Excel per-workbook time and allocation microbenchmark
+
+نفس التخطيط (iter_sheet_rows) يُكتب بثلاث طرق:
+- inline: كائنات Font و Alignment و PatternFill و Border جديدة لكل خلية
+  (الطريقة القديمة؛ openpyxl يحسب بصمة كل كائن ويزيل المكرر)
+- named: أنماط السجل مسجلة مرة في الملف (NamedStyle) والخلايا تشير لها بالاسم
+- template: القالب الثابت في excel_template (مسار التوليد الفعلي)
+
+الذاكرة هي أعلى حجم مخصص أثناء توليد ملف واحد (tracemalloc).
+
+الاستخدام - Usage:
+    python benchmark_excel.py [--orders 200] [--max-items 20]
+"""
+
+import argparse
+import io
+import random
+import time
+import tracemalloc
+from copy import copy
+from openpyxl import Workbook
+from benchmark_pdf import synthetic_order
+from excel_generator import STYLE_REGISTRY, iter_sheet_rows, register_styles, _setup_sheet
+from excel_template import get_skeleton, write_template_excel
+
+
+def _write_workbook(wb, order, apply_style):
+    """كتابة التخطيط بـ openpyxl - Fill a workbook from the sheet layout"""
+    sheet = wb.active
+    _setup_sheet(sheet)
+    for row in iter_sheet_rows(order):
+        if row.height:
+            sheet.row_dimensions[row.number].height = row.height
+        for column, value, style in row.cells:
+            apply_style(sheet.cell(row=row.number, column=column, value=value), style)
+        for ref in row.merges:
+            sheet.merge_cells(ref)
+    return wb
+
+
+def _inline_style(cell, style):
+    for attribute, value in STYLE_REGISTRY[style].items():
+        setattr(cell, attribute, value if isinstance(value, str) else copy(value))
+
+
+def _named_style(cell, style):
+    cell.style = style
+
+
+def render_inline(order, output):
+    """كائنات تنسيق جديدة لكل خلية - Fresh style objects on every cell (before)"""
+    _write_workbook(Workbook(), order, _inline_style).save(output)
+
+
+def render_named(order, output):
+    """أنماط مسجلة مرة في الملف - Named styles registered once per workbook"""
+    wb = Workbook()
+    register_styles(wb)
+    _write_workbook(wb, order, _named_style).save(output)
+
+
+def render_template(order, output):
+    """القالب الثابت - Cached skeleton + sheet XML (current path)"""
+    write_template_excel(order, output)
+
+
+MODES = {
+    'inline': render_inline,
+    'named': render_named,
+    'template': render_template,
+}
+
+
+def run(render, orders):
+    """متوسط الزمن وأعلى ذاكرة لكل ملف - (ms per workbook, peak KB per workbook)"""
+    render(orders[0], io.BytesIO())  # تسخين - warm-up
+
+    start = time.perf_counter()
+    for order in orders:
+        render(order, io.BytesIO())
+    elapsed = time.perf_counter() - start
+
+    peaks = []
+    tracemalloc.start()
+    for order in orders[:20]:
+        tracemalloc.reset_peak()
+        render(order, io.BytesIO())
+        peaks.append(tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+    return elapsed / len(orders) * 1000, sum(peaks) / len(peaks) / 1024
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='قياس سرعة توليد Excel')
+    parser.add_argument('--orders', type=int, default=200)
+    parser.add_argument('--max-items', type=int, default=20)
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    args = parser.parse_args(argv)
+
+    rng = random.Random(7)
+    orders = [synthetic_order(number, rng.randint(1, args.max_items), rng) for number in range(1, args.orders + 1)]
+    get_skeleton()
+
+    baseline = None
+    for mode in args.modes:
+        ms, peak_kb = run(MODES[mode], orders)
+        baseline = baseline or ms
+        print(f'{mode:>8}: {ms:.2f} ms/workbook, {1000 / ms:.1f} workbooks/s, '
+              f'peak {peak_kb:.0f} KB, x{baseline / ms:.2f} vs {args.modes[0]}')
+
+
+if __name__ == '__main__':
+    main()
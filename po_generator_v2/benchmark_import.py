@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+قياس زمن استيراد pdf_generator و app وتكلفة تسجيل الخطوط
+Startup benchmark: import time of pdf_generator / app and the deferred font cost
+
+كل قياس في عملية Python جديدة (بدون ذاكرة استيراد) ويُعاد --runs مرة،
+ويُطبع الوسيط. زمن تسجيل الخطوط وتشكيل العناوين (preload) يُقاس بعد الاستيراد
+في نفس العملية: هذا ما كان يُدفع عند الاستيراد قبل التأجيل، وتوفره الآن كل
+عملية لا تولد PDF (الأوامر والاختبارات وعمليات الخادم قبل أول ملف).
+
+الاستخدام - Usage:
+    python benchmark_import.py [--runs 10]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# (الاستيراد، ما يُقاس بعده) - (import, deferred step timed right after it)
+SCENARIOS = {
+    'pdf_generator': ('import pdf_generator', None),
+    'pdf_generator + fonts': ('import pdf_generator', 'pdf_generator.ensure_fonts_registered()'),
+    'pdf_generator + preload': ('import pdf_generator', 'pdf_generator.preload_pdf_resources()'),
+    'app': ('import app', None),
+}
+
+_TIMER = (
+    'import time; start = time.perf_counter()\n'
+    '{imports}\n'
+    'imported = time.perf_counter()\n'
+    '{step}\n'
+    'print(imported - start, time.perf_counter() - imported)\n'
+)
+
+
+def time_snippet(imports, step=None):
+    """
+    زمن الاستيراد ثم الخطوة في عملية جديدة - (import s, step s) in a fresh interpreter
+    """
+    output = subprocess.run(
+        [sys.executable, '-c', _TIMER.format(imports=imports, step=step or 'pass')],
+        cwd=PACKAGE_DIR, check=True, capture_output=True, text=True,
+    ).stdout
+    import_time, step_time = output.strip().splitlines()[-1].split()
+    return float(import_time), float(step_time)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='قياس زمن الاستيراد وتسجيل الخطوط')
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args(argv)
+
+    time_snippet('import app')  # تسخين ملفات pyc - warm the bytecode cache
+    for name, (imports, step) in SCENARIOS.items():
+        runs = [time_snippet(imports, step) for _ in range(args.runs)]
+        import_ms = statistics.median(import_time for import_time, _ in runs) * 1000
+        line = f'{name:>24}: import {import_ms:.1f} ms'
+        if step:
+            step_ms = statistics.median(step_time for _, step_time in runs) * 1000
+            line += f', then {step_ms:.1f} ms (cost moved from import to first PDF)'
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
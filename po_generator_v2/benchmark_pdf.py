@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+قياس سرعة توليد ملفات PDF على طلبات تجريبية
+PDF rendering throughput benchmark on synthetic orders
+
+لا يحتاج قاعدة بيانات؛ الطلبات تُولد عشوائياً (بنفس البذرة في كل تشغيل)
+بنفس شكل Order.to_dict.
+
+الاستخدام - Usage:
+    python benchmark_pdf.py [--orders 1000] [--max-items 20] [--merged 200]
+    python benchmark_pdf.py --lines 10 1000 10000    # طلب واحد كبير لكل عدد أصناف
+"""
+
+import argparse
+import random
+import time
+from pdf_generator import build_order_elements, create_merged_pdf, create_pdf_from_order, preload_pdf_resources
+
+PRODUCT_NAMES = (
+    'مواسير بلاستيك', 'كابلات كهرباء 4 مم', 'مفاتيح إضاءة', 'دهانات حوائط',
+    'أسمنت بورتلاندي', 'حديد تسليح 12 مم', 'بلاط سيراميك', 'خلاطات مياه',
+)
+
+
+def synthetic_order(number, item_count, rng):
+    """طلب تجريبي - A synthetic order dict"""
+    items = []
+    for index in range(item_count):
+        quantity = rng.randint(1, 50)
+        unit_price = round(rng.uniform(5, 500), 2)
+        items.append({
+            'product_code': f'P{index:05d}',
+            'product_name': rng.choice(PRODUCT_NAMES),
+            'quantity': quantity,
+            'unit_price': unit_price,
+            'total_price': round(quantity * unit_price, 2),
+        })
+    return {
+        'po_number': f'PO-2026-{number:04d}',
+        'po_date': '2026-01-15',
+        'company_tax_id': '123-456-789',
+        'company_commercial_reg': '98765',
+        'supplier': {'name': 'مؤسسة الأمل للتجارة', 'tax_id': '555-111', 'phone': '01000000000',
+                     'email': 'sales@example.com', 'address': 'القاهرة - مدينة نصر'},
+        'items': items,
+        'tax_rate': 14,
+        'delivery_period': 'أسبوعان',
+        'delivery_location': 'المخزن الرئيسي',
+        'payment_terms': 'نقدي عند الاستلام',
+        'notes': 'يرجى الالتزام بمواعيد التسليم',
+    }
+
+
+def _timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def run_throughput(order_count, max_items, merged_count):
+    """ملفات منفصلة ثم ملف مدمج - Per-order PDFs, then one merged PDF"""
+    rng = random.Random(7)
+    orders = [synthetic_order(number, rng.randint(1, max_items), rng) for number in range(1, order_count + 1)]
+
+    preload_pdf_resources()
+    create_pdf_from_order(orders[0])  # تسخين - warm-up
+
+    _, elapsed = _timed(lambda: [create_pdf_from_order(order) for order in orders])
+    print(f'{order_count} orders: {elapsed:.2f} s, {order_count / elapsed:.1f} PDF/s, '
+          f'{elapsed / order_count * 1000:.2f} ms/PDF')
+
+    _, elapsed = _timed(lambda: [build_order_elements(order) for order in orders])
+    print(f'build_order_elements: {elapsed / order_count * 1000:.3f} ms/order')
+
+    if merged_count:
+        merged, elapsed = _timed(lambda: create_merged_pdf(orders[:merged_count]))
+        print(f'merged {merged_count} orders: {elapsed:.2f} s, {len(merged.getvalue()) / 1024:.0f} KB')
+
+
+def run_large_orders(line_counts):
+    """طلب واحد بعدد أصناف كبير - One order per line count; time should grow linearly"""
+    preload_pdf_resources()
+    create_pdf_from_order(synthetic_order(0, 5, random.Random(0)))  # تسخين - warm-up
+
+    for line_count in line_counts:
+        order = synthetic_order(1, line_count, random.Random(line_count))
+        pdf, elapsed = _timed(lambda: create_pdf_from_order(order))
+        print(f'{line_count} lines: {elapsed:.3f} s, {elapsed / line_count * 1000:.3f} ms/line, '
+              f'{len(pdf.getvalue()) / 1024:.0f} KB')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='قياس سرعة توليد PDF')
+    parser.add_argument('--orders', type=int, default=1000)
+    parser.add_argument('--max-items', type=int, default=20)
+    parser.add_argument('--merged', type=int, default=200)
+    parser.add_argument('--lines', type=int, nargs='+', help='قياس طلبات كبيرة بهذه الأعداد من الأصناف')
+    args = parser.parse_args(argv)
+    if args.lines:
+        run_large_orders(args.lines)
+    else:
+        run_throughput(args.orders, args.max_items, args.merged)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+اختبار تحمّل خدمة التوليد بعدد مختلف من العمليات
+Renderer load test: throughput vs number of worker processes
+
+يولد نفس الطلبات التجريبية (PDF و Excel بالتبادل) داخل العملية الحالية
+مرة، ثم عبر Renderer بـ 1 و 2 و ... حتى --max-workers عملية، ويطبع
+السرعة ونسبة التحسن لكل عدد. على جهاز بـ N نواة يُتوقع تحسن قريب من N.
+
+الاستخدام - Usage:
+    python benchmark_renderer.py [--orders 400] [--max-workers 8]
+"""
+
+import argparse
+import os
+import random
+import time
+from benchmark_pdf import synthetic_order
+from renderer import RENDER_KINDS, Renderer, render_document, warm_worker
+
+
+def _jobs(order_count):
+    rng = random.Random(11)
+    return [(RENDER_KINDS[number % 2], synthetic_order(number, rng.randint(1, 20), rng))
+            for number in range(order_count)]
+
+
+def run_in_process(jobs):
+    """الأساس: التوليد في العملية الحالية - Baseline without worker processes"""
+    warm_worker()
+    start = time.perf_counter()
+    for kind, order in jobs:
+        render_document(kind, order)
+    return time.perf_counter() - start
+
+
+def run_renderer(jobs, workers):
+    """كل المهام عبر Renderer بعدد عمليات معين - All jobs through a renderer"""
+    renderer = Renderer(workers=workers)
+    renderer.start()
+    try:
+        start = time.perf_counter()
+        futures = [renderer.submit(render_document, kind, order, wait=60) for kind, order in jobs]
+        for future in futures:
+            renderer.result(future)
+        return time.perf_counter() - start
+    finally:
+        renderer.shutdown()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='اختبار تحمّل خدمة التوليد')
+    parser.add_argument('--orders', type=int, default=400)
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args(argv)
+
+    jobs = _jobs(args.orders)
+    print(f'cpu_count={os.cpu_count()}, {args.orders} documents (PDF/Excel)')
+
+    baseline = run_in_process(jobs)
+    print(f'in-process: {args.orders / baseline:.1f} docs/s')
+
+    for workers in range(1, args.max_workers + 1):
+        elapsed = run_renderer(jobs, workers)
+        speedup = baseline / elapsed
+        print(f'{workers} workers: {args.orders / elapsed:.1f} docs/s, '
+              f'x{speedup:.2f} vs in-process ({speedup / workers:.0%} per worker)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+قياس أثر ذاكرة التشكيل العربي على سرعة توليد PDF
+Arabic shaping cache benchmark: single-threaded PDFs/sec with and without the cache
+
+- uncached: كل نص يُشكّل (reshape + get_display) في كل مرة، والأقسام الثابتة
+  تُبنى من جديد لكل طلب (مثل ما كان قبل ذاكرة التشكيل)
+- cached: ذاكرة LRU للنصوص والعناوين المشكّلة مسبقاً (الوضع الحالي)
+
+الطلبات نفسها في الحالتين (من benchmark_pdf بنفس البذرة)، وأسماء الأصناف
+والموردين تتكرر بينها كما في البيانات الحقيقية.
+
+الاستخدام - Usage:
+    python benchmark_shaping.py [--orders 300] [--max-items 20]
+"""
+
+import argparse
+import random
+import time
+from contextlib import contextmanager
+import pdf_generator
+from benchmark_pdf import synthetic_order
+from pdf_generator import (STATIC_BLOCKS, build_order_elements, create_pdf_from_order,
+                           preload_pdf_resources, shaping_cache_stats)
+
+
+@contextmanager
+def shaping_cache_disabled():
+    """بدون ذاكرة التشكيل - Shape every string on every call"""
+    cached = pdf_generator._shape_cached
+    pdf_generator._shape_cached = pdf_generator._shape
+    try:
+        yield
+    finally:
+        pdf_generator._shape_cached = cached
+
+
+def _reset_static_blocks():
+    for block in STATIC_BLOCKS:
+        block._flowables = None
+        block._layouts = {}
+
+
+def run(orders, rebuild_static):
+    """الزمن لكل الطلبات - (PDF/s, ms to build the flowables per order)"""
+    def render(func, order):
+        if rebuild_static:
+            _reset_static_blocks()
+        return func(order)
+
+    render(create_pdf_from_order, orders[0])  # تسخين - warm-up
+    start = time.perf_counter()
+    for order in orders:
+        render(create_pdf_from_order, order)
+    elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for order in orders:
+        render(build_order_elements, order)
+    build_elapsed = time.perf_counter() - start
+    return len(orders) / elapsed, build_elapsed / len(orders) * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='قياس أثر ذاكرة التشكيل العربي')
+    parser.add_argument('--orders', type=int, default=300)
+    parser.add_argument('--max-items', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(7)
+    orders = [synthetic_order(number, rng.randint(1, args.max_items), rng) for number in range(1, args.orders + 1)]
+    preload_pdf_resources()
+
+    with shaping_cache_disabled():
+        before, before_build = run(orders, rebuild_static=True)
+    print(f'uncached: {before:.1f} PDF/s, build_order_elements {before_build:.3f} ms/order')
+
+    _reset_static_blocks()
+    preload_pdf_resources()
+    after, after_build = run(orders, rebuild_static=False)
+    print(f'  cached: {after:.1f} PDF/s, build_order_elements {after_build:.3f} ms/order, '
+          f'x{after / before:.2f}')
+    print(f'shaping cache: {shaping_cache_stats()}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,395 @@
+# -*- coding: utf-8 -*-
+"""
+استيراد الطلبات بالجملة
+Bulk order import
+
+لترحيل الطلبات القديمة من ملفات Excel أو CSV أو JSON Lines دفعة واحدة:
+- الملف يُقرأ ويُتحقق منه صفاً صفاً (بدون تحميله كله في الذاكرة)
+- أرقام الطلبات تُخصص لكل دفعة بأمر واحد (allocate_po_numbers)
+- الإدخال يتم بـ executemany من SQLAlchemy Core في معاملة لكل دفعة
+- الصفوف غير الصالحة تُسجّل كأخطاء ولا توقف باقي الاستيراد
+
+صيغ الملفات:
+- JSON Lines: كل سطر طلب بنفس شكل POST /api/orders (مع قائمة items)
+- CSV / XLSX: صف لكل صنف؛ الصفوف المتتالية بنفس order_ref (أو po_number)
+  تكوّن طلباً واحداً، وبيانات الطلب تؤخذ من أول صف فيه
+"""
+
+import codecs
+import csv
+import json
+import re
+from datetime import date, datetime
+from decimal import InvalidOperation
+from itertools import groupby
+from openpyxl import load_workbook
+from sqlalchemy import insert, select
+from sqlalchemy.exc import SQLAlchemyError
+from models import db, Supplier, Order, OrderItem
+from money import calculate_totals, parse_amount, round_money, DEFAULT_TAX_RATE
+from sequences import allocate_po_numbers, ensure_sequence_at_least
+from search_index import is_search_index_enabled, index_orders
+from reports import add_orders_to_reports
+from reference_data import SUPPLIERS, bump_reference_version
+
+# عدد الطلبات في كل معاملة - Orders per transaction
+IMPORT_CHUNK_SIZE = 500
+
+ORDER_STATUSES = ('مسودة', 'مؤكد', 'ملغي')
+
+# أعمدة بيانات الطلب في ملفات CSV / XLSX (الباقي أعمدة الصنف)
+ORDER_COLUMNS = (
+    'order_ref', 'po_number', 'po_date', 'supplier_id', 'supplier_name',
+    'company_tax_id', 'commercial_reg', 'delivery_period', 'delivery_location',
+    'payment_terms', 'notes', 'tax_rate', 'status',
+)
+ITEM_COLUMNS = ('product_code', 'product_name', 'description', 'quantity', 'unit_price')
+
+_PO_NUMBER_PATTERN = re.compile(r'^PO-(\d{4})-(\d+)$')
+
+
+# === قراءة الملفات - Readers ===
+
+def iter_jsonl_records(stream):
+    """
+    طلبات ملف JSON Lines - Yield (line_number, order_dict_or_error) from a binary stream
+
+    السطر غير الصالح يُرجع كرسالة خطأ (str) بدلاً من قاموس.
+    """
+    for line_number, line in enumerate(codecs.getreader('utf-8-sig')(stream), start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield line_number, 'سطر JSON غير صالح'
+            continue
+        if not isinstance(record, dict):
+            yield line_number, 'كل سطر يجب أن يكون طلباً (JSON object)'
+            continue
+        yield line_number, record
+
+
+def iter_csv_rows(stream):
+    """صفوف ملف CSV (أول صف العناوين) - Rows of a CSV file, header first"""
+    return csv.reader(codecs.getreader('utf-8-sig')(stream))
+
+
+def iter_xlsx_rows(stream):
+    """صفوف أول ورقة في ملف Excel - Rows of the first worksheet, header first"""
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        yield from workbook.worksheets[0].iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def iter_table_records(rows):
+    """
+    تجميع صفوف الأصناف في طلبات - Group item rows into orders
+
+    يُرجع (رقم أول صف، قاموس الطلب) لكل مجموعة صفوف متتالية بنفس order_ref
+    (أو po_number إذا لم يوجد order_ref).
+    """
+    rows = iter(rows)
+    header = next(rows, None)
+    if header is None:
+        return
+    columns = [str(name or '').strip().lower() for name in header]
+
+    def numbered_rows():
+        for row_number, row in enumerate(rows, start=2):
+            values = dict(zip(columns, row))
+            if any(value not in (None, '') for value in values.values()):
+                yield row_number, values
+
+    def group_key(numbered_row):
+        values = numbered_row[1]
+        return values.get('order_ref') or values.get('po_number') or f'row-{numbered_row[0]}'
+
+    for _, group in groupby(numbered_rows(), key=group_key):
+        group = list(group)
+        first_row, first_values = group[0]
+        record = {name: first_values.get(name) for name in ORDER_COLUMNS if name in first_values}
+        record['items'] = [
+            {name: values.get(name) for name in ITEM_COLUMNS}
+            for _, values in group
+        ]
+        yield first_row, record
+
+
+# === التحقق - Validation ===
+
+def _text(value, max_length=None):
+    """نص منظف أو None - Cleaned optional text"""
+    if value is None:
+        return None
+    value = str(value).strip()
+    if max_length and len(value) > max_length:
+        raise ValueError(f'النص أطول من {max_length} حرف')
+    return value or None
+
+
+def _date(value):
+    """تاريخ الطلب - po_date as a date"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return datetime.strptime(str(value).strip(), '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        raise ValueError('صيغة تاريخ الطلب غير صالحة (YYYY-MM-DD)')
+
+
+def validate_order(record):
+    """
+    التحقق من طلب وتجهيزه للإدخال - Validate a raw record
+
+    يرجع (صف الطلب، صفوف الأصناف) أو يرفع ValueError برسالة عربية.
+    """
+    supplier_id = record.get('supplier_id')
+    if supplier_id in (None, ''):
+        supplier_id = None
+    else:
+        try:
+            supplier_id = int(supplier_id)
+        except (TypeError, ValueError):
+            raise ValueError('رقم المورد غير صالح')
+        if supplier_id < 1:
+            raise ValueError('رقم المورد غير صالح')
+
+    supplier_name = _text(record.get('supplier_name'), 200)
+    if supplier_id is None and supplier_name is None:
+        raise ValueError('المورد مطلوب (supplier_id أو supplier_name)')
+
+    status = _text(record.get('status')) or 'مؤكد'
+    if status not in ORDER_STATUSES:
+        raise ValueError(f'حالة الطلب غير صالحة: {status}')
+
+    raw_items = record.get('items') or []
+    if not isinstance(raw_items, list) or not raw_items:
+        raise ValueError('الطلب يجب أن يحتوي على صنف واحد على الأقل')
+
+    items = []
+    for idx, item_data in enumerate(raw_items, start=1):
+        if not isinstance(item_data, dict):
+            raise ValueError(f'الصنف {idx} غير صالح')
+        product_name = _text(item_data.get('product_name'), 200)
+        if not product_name:
+            raise ValueError(f'اسم الصنف {idx} مطلوب')
+        items.append({
+            'product_code': _text(item_data.get('product_code'), 100),
+            'product_name': product_name,
+            'description': _text(item_data.get('description')),
+            'quantity': parse_amount(item_data.get('quantity'), f'كمية الصنف {idx}'),
+            'unit_price': round_money(parse_amount(item_data.get('unit_price'), f'سعر الصنف {idx}')),
+            'item_order': idx,
+        })
+
+    tax_rate = parse_amount(record.get('tax_rate'), 'نسبة الضريبة', default=float(DEFAULT_TAX_RATE))
+    totals = calculate_totals(items, tax_rate)
+    for item, total_price in zip(items, totals.line_totals):
+        item['total_price'] = total_price
+
+    order = {
+        'po_number': _text(record.get('po_number'), 50),
+        'po_date': _date(record.get('po_date')),
+        'company_tax_id': _text(record.get('company_tax_id'), 100),
+        'company_commercial_reg': _text(record.get('commercial_reg'), 100),
+        'supplier_id': supplier_id,
+        'supplier_name': supplier_name,
+        'delivery_period': _text(record.get('delivery_period'), 200),
+        'delivery_location': _text(record.get('delivery_location')),
+        'payment_terms': _text(record.get('payment_terms')),
+        'notes': _text(record.get('notes')),
+        'subtotal': totals.subtotal,
+        'tax_amount': totals.tax_amount,
+        'total': totals.total,
+        'tax_rate': tax_rate,
+        'status': status,
+    }
+    return order, items
+
+
+# === الإدخال - Insertion ===
+
+class BulkImportResult:
+    """نتيجة الاستيراد - Import summary with per-row errors"""
+
+    def __init__(self):
+        self.created = []
+        self.errors = []
+
+    def add_error(self, row, message, reference=None):
+        self.errors.append({'row': row, 'reference': reference, 'message': message})
+
+    def to_dict(self):
+        return {
+            'success': True,
+            'imported': len(self.created),
+            'failed': len(self.errors),
+            'orders': self.created,
+            'errors': sorted(self.errors, key=lambda error: error['row']),
+        }
+
+
+def _resolve_suppliers(conn, chunk, result):
+    """
+    تحديد رقم المورد لكل طلب - Fill supplier_id for every order in the chunk
+
+    الموردون بالاسم غير الموجودين يُضافون؛ أرقام الموردين غير الموجودة تُرفض.
+    """
+    suppliers = Supplier.__table__
+    supplier_ids = {order['supplier_id'] for _, order, _ in chunk if order['supplier_id'] is not None}
+    names = {order['supplier_name'] for _, order, _ in chunk
+             if order['supplier_id'] is None and order['supplier_name']}
+
+    existing_ids = set()
+    if supplier_ids:
+        existing_ids = set(conn.execute(
+            select(suppliers.c.id).where(suppliers.c.id.in_(supplier_ids))
+        ).scalars())
+
+    ids_by_name = {}
+    if names:
+        for supplier_id, name in conn.execute(
+            select(suppliers.c.id, suppliers.c.name).where(suppliers.c.name.in_(names))
+        ):
+            ids_by_name.setdefault(name, supplier_id)
+        missing = sorted(names - set(ids_by_name))
+        if missing:
+            new_ids = conn.execute(
+                insert(suppliers).returning(suppliers.c.id, sort_by_parameter_order=True),
+                [{'name': name} for name in missing]
+            ).scalars().all()
+            ids_by_name.update(zip(missing, new_ids))
+            bump_reference_version(db.session, SUPPLIERS)
+
+    resolved = []
+    for row, order, items in chunk:
+        if order['supplier_id'] is not None:
+            if order['supplier_id'] not in existing_ids:
+                result.add_error(row, f"المورد رقم {order['supplier_id']} غير موجود", order['po_number'])
+                continue
+        else:
+            order['supplier_id'] = ids_by_name[order['supplier_name']]
+        resolved.append((row, order, items))
+    return resolved
+
+
+def _assign_po_numbers(conn, chunk, result):
+    """
+    أرقام الطلبات للدفعة - Check imported numbers and allocate the missing ones
+
+    الأرقام الجديدة تُخصص حسب سنة تاريخ الطلب، والأرقام المستوردة بصيغة
+    PO-YYYY-NNN ترفع عداد السنة حتى لا يُخصص نفس الرقم لاحقاً.
+    """
+    orders = Order.__table__
+    imported = [order['po_number'] for _, order, _ in chunk if order['po_number']]
+    taken = set()
+    if imported:
+        taken = set(conn.execute(
+            select(orders.c.po_number).where(orders.c.po_number.in_(imported))
+        ).scalars())
+
+    accepted = []
+    seen = set()
+    needed_by_year = {}
+    highest_by_year = {}
+    for row, order, items in chunk:
+        po_number = order['po_number']
+        if po_number:
+            if po_number in taken or po_number in seen:
+                result.add_error(row, f'رقم الطلب {po_number} مستخدم بالفعل', po_number)
+                continue
+            seen.add(po_number)
+            match = _PO_NUMBER_PATTERN.match(po_number)
+            if match:
+                year, value = int(match.group(1)), int(match.group(2))
+                highest_by_year[year] = max(value, highest_by_year.get(year, 0))
+        else:
+            needed_by_year[order['po_date'].year] = needed_by_year.get(order['po_date'].year, 0) + 1
+        accepted.append((row, order, items))
+
+    for year, value in highest_by_year.items():
+        ensure_sequence_at_least(year, value)
+
+    allocated = {year: iter(allocate_po_numbers(count, year)) for year, count in needed_by_year.items()}
+    for _, order, _ in accepted:
+        if not order['po_number']:
+            order['po_number'] = next(allocated[order['po_date'].year])
+    return accepted
+
+
+def _insert_chunk(chunk, result):
+    """إدخال دفعة في معاملة واحدة - Insert one chunk of validated orders in one transaction"""
+    orders = Order.__table__
+    order_items = OrderItem.__table__
+    try:
+        conn = db.session.connection()
+        chunk = _resolve_suppliers(conn, chunk, result)
+        chunk = _assign_po_numbers(conn, chunk, result)
+        if not chunk:
+            db.session.commit()
+            return
+
+        order_rows = []
+        for _, order, _ in chunk:
+            order_row = dict(order)
+            del order_row['supplier_name']
+            order_rows.append(order_row)
+
+        order_ids = conn.execute(
+            insert(orders).returning(orders.c.id, sort_by_parameter_order=True),
+            order_rows
+        ).scalars().all()
+
+        item_rows = []
+        for order_id, (_, _, items) in zip(order_ids, chunk):
+            for item in items:
+                item_rows.append(dict(item, order_id=order_id))
+        conn.execute(insert(order_items), item_rows)
+
+        # الإدخال عبر Core لا يمر بمستمعي الجلسة، فيُحدّث فهرس البحث والتقارير يدوياً
+        if is_search_index_enabled(conn):
+            index_orders(conn, order_ids)
+        add_orders_to_reports(conn, order_ids)
+
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        for row, order, _ in chunk:
+            result.add_error(row, f'فشل حفظ الدفعة: {e.__class__.__name__}', order['po_number'])
+        return
+
+    for order_id, (row, order, _) in zip(order_ids, chunk):
+        result.created.append({'row': row, 'id': order_id, 'po_number': order['po_number']})
+
+
+def import_orders(records, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    استيراد الطلبات - Validate and insert (row_number, record) pairs chunk by chunk
+
+    record إما قاموس طلب أو رسالة خطأ من مرحلة القراءة.
+    """
+    result = BulkImportResult()
+    chunk = []
+    for row, record in records:
+        if isinstance(record, str):
+            result.add_error(row, record)
+            continue
+        try:
+            order, items = validate_order(record)
+        except (ValueError, InvalidOperation) as e:
+            result.add_error(row, str(e), record.get('po_number') or record.get('order_ref'))
+            continue
+        chunk.append((row, order, items))
+        if len(chunk) >= chunk_size:
+            _insert_chunk(chunk, result)
+            chunk = []
+
+    if chunk:
+        _insert_chunk(chunk, result)
+    return result
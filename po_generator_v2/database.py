@@ -5,13 +5,18 @@ Database setup for SQLite
 """
 
 from models import db, Supplier, Product, Order, OrderItem
-from datetime import datetime
+from migrations import apply_migrations
+from search_index import register_search_index_events
+from reference_data import SUPPLIERS, PRODUCTS, bump_reference_version
 
 
 def init_database(app):
     """تهيئة قاعدة البيانات - Initialize database"""
     with app.app_context():
+        register_search_index_events()
         db.create_all()
+        # تطبيق ترحيلات المخطط على قواعد البيانات الموجودة
+        apply_migrations()
         # إضافة بيانات تجريبية إذا كانت قاعدة البيانات فارغة
         add_sample_data()
 
@@ -47,6 +52,7 @@ def add_sample_data():
         ]
         for supplier in suppliers:
             db.session.add(supplier)
+        bump_reference_version(db.session, SUPPLIERS)
         db.session.commit()
     
     # التحقق من وجود أصناف
@@ -116,27 +122,5 @@ def add_sample_data():
         ]
         for product in products:
             db.session.add(product)
+        bump_reference_version(db.session, PRODUCTS)
         db.session.commit()
-
-
-def get_next_po_number():
-    """الحصول على رقم الطلب التالي - Get next PO number"""
-    current_year = datetime.now().year
-    
-    # البحث عن آخر طلب في السنة الحالية
-    last_order = Order.query.filter(
-        Order.po_number.like(f'PO-{current_year}-%')
-    ).order_by(Order.po_number.desc()).first()
-    
-    if last_order:
-        # استخراج الرقم التسلسلي من آخر طلب
-        try:
-            last_number = int(last_order.po_number.split('-')[-1])
-            next_number = last_number + 1
-        except:
-            next_number = 1
-    else:
-        next_number = 1
-    
-    # تنسيق الرقم: PO-2026-001
-    return f'PO-{current_year}-{next_number:03d}'
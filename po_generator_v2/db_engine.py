@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+ضبط اتصالات SQLite والتعامل مع انشغال قاعدة البيانات
+SQLite connection tuning and SQLITE_BUSY handling
+
+كل اتصال جديد يُضبط بـ PRAGMA:
+- journal_mode=WAL: القراءة لا تنتظر الكتابة والعكس (كاتب واحد في نفس الوقت).
+- synchronous=NORMAL: آمن مع WAL ويوفر fsync عند كل commit.
+- cache_size / mmap_size / temp_store: ذاكرة أكبر للصفحات والجداول المؤقتة.
+- busy_timeout: الكاتب الثاني ينتظر قفل الكتابة بدلاً من الفشل فوراً.
+
+إذا انتهت مهلة الانتظار (ضغط كتابة شديد) يُعاد تنفيذ المعاملة كاملة
+بـ retry_on_busy مع انتظار متزايد عشوائي بين المحاولات.
+"""
+
+import random
+import threading
+import time
+from functools import wraps
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from models import db
+
+# إعدادات كل اتصال - Per-connection PRAGMAs (ترتيبها مهم: journal_mode أولاً)
+SQLITE_PRAGMAS = (
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),
+    ('cache_size', -64 * 1024),          # بالكيلوبايت: 64 ميجا لكل اتصال
+    ('mmap_size', 256 * 1024 * 1024),
+    ('temp_store', 'MEMORY'),
+    ('busy_timeout', 10 * 1000),         # بالمللي ثانية
+)
+
+# إعادة المحاولة عند SQLITE_BUSY - Busy retry policy
+BUSY_RETRY_ATTEMPTS = 5
+BUSY_RETRY_BASE_DELAY = 0.05
+BUSY_RETRY_MAX_DELAY = 1.0
+
+# أكواد SQLite الأساسية للانشغال والقفل
+_SQLITE_BUSY = 5
+_SQLITE_LOCKED = 6
+
+# أكواد PostgreSQL: serialization_failure و deadlock_detected
+_PG_RETRYABLE_CODES = ('40001', '40P01')
+
+_retry_counters = {'retries': 0, 'gave_up': 0}
+_retry_lock = threading.Lock()
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in SQLITE_PRAGMAS:
+            cursor.execute(f'PRAGMA {name} = {value}')
+    finally:
+        cursor.close()
+
+
+def configure_engine(engine):
+    """تسجيل ضبط الاتصالات على محرك SQLite - Tune every new SQLite connection (idempotent)"""
+    if engine.dialect.name != 'sqlite':
+        return
+    if not event.contains(engine, 'connect', _apply_sqlite_pragmas):
+        event.listen(engine, 'connect', _apply_sqlite_pragmas)
+
+
+def is_busy_error(error):
+    """
+    هل الخطأ انشغال/قفل قاعدة البيانات؟ - True for transient lock conflicts
+
+    SQLite: SQLITE_BUSY / SQLITE_LOCKED. PostgreSQL: تعارض تسلسل (40001)
+    أو deadlock (40P01)، وكلاهما يُحل بإعادة المعاملة.
+    """
+    if not isinstance(error, OperationalError):
+        return False
+    if getattr(error.orig, 'sqlstate', None) in _PG_RETRYABLE_CODES:
+        return True
+    code = getattr(error.orig, 'sqlite_errorcode', None)
+    if code is not None:
+        return code & 0xFF in (_SQLITE_BUSY, _SQLITE_LOCKED)
+    return 'database is locked' in str(error.orig)
+
+
+def retry_on_busy(func):
+    """
+    إعادة تنفيذ معاملة عند انشغال قاعدة البيانات - Retry a whole transaction on SQLITE_BUSY
+
+    الدالة يجب أن تبدأ معاملتها وتنهيها (commit) بنفسها حتى تكون إعادتها آمنة؛
+    قبل كل محاولة جديدة يتم rollback للجلسة.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        for attempt in range(BUSY_RETRY_ATTEMPTS):
+            try:
+                return func(*args, **kwargs)
+            except OperationalError as e:
+                db.session.rollback()
+                if not is_busy_error(e):
+                    raise
+                if attempt == BUSY_RETRY_ATTEMPTS - 1:
+                    with _retry_lock:
+                        _retry_counters['gave_up'] += 1
+                    raise
+                with _retry_lock:
+                    _retry_counters['retries'] += 1
+                delay = min(BUSY_RETRY_MAX_DELAY, BUSY_RETRY_BASE_DELAY * 2 ** attempt)
+                time.sleep(delay * random.uniform(0.5, 1.0))
+    return wrapper
+
+
+def busy_retry_stats():
+    """عدادات إعادة المحاولة للمراقبة - Busy retry counters"""
+    with _retry_lock:
+        return dict(_retry_counters)
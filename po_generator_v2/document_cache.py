@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+"""
+ذاكرة الملفات المولدة (Excel و PDF) على القرص
+On-disk cache for generated Excel and PDF documents
+
+المفتاح هو بصمة SHA-256 لبيانات الطلب (to_dict) مع نوع الملف وإصدار المولد،
+فأي تعديل على الطلب أو على شكل الملف ينتج مفتاحاً جديداً تلقائياً.
+نفس المفتاح يُستخدم كـ ETag، وحجم المجلد محدود مع حذف الأقدم استخداماً (LRU).
+الحجم الكلي يُتابع بعداد في الذاكرة، والمجلد يُمسح فقط عند تجاوز الحد.
+
+ملفات كل طلب في مجلد فرعي باسم رقمه، فحذفها عند تعديل الطلب لا يمر على
+كل ملفات الذاكرة.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from models import db, Order, collect_touched_orders
+
+FILE_EXTENSIONS = {
+    'excel': 'xlsx',
+    'pdf': 'pdf',
+}
+
+MIMETYPES = {
+    'excel': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'pdf': 'application/pdf',
+}
+
+# الحذف عند تجاوز الحد ينزل بالحجم لهذه النسبة منه، فلا يتكرر المسح مع كل ملف جديد
+EVICT_TARGET_RATIO = 0.9
+
+
+def document_key(order_data, kind, generator_version, items=None):
+    """
+    بصمة محتوى الملف - Content hash identifying a rendered document
+
+    items (اختياري) تُمرر كـ iterable للطلبات الكبيرة التي لا تحمل أصنافها
+    في order_data، وتُقرأ صنفاً بصنف دون تحميلها كلها في الذاكرة.
+    """
+    hasher = hashlib.sha256()
+    hasher.update(f'{kind}:{generator_version}:'.encode('utf-8'))
+    hasher.update(json.dumps(order_data, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8'))
+    if items is not None:
+        for item in items:
+            hasher.update(json.dumps(item, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8'))
+    return hasher.hexdigest()
+
+
+class DocumentCache:
+    """
+    ذاكرة ملفات محدودة الحجم - Size-bounded LRU document cache
+
+    كل ملف يُحفظ في <order_id>/<kind>-<key>.<ext>؛ وقت التعديل (mtime)
+    يُحدّث عند كل استخدام ويُعتمد عليه في حذف الأقدم عند تجاوز الحجم.
+    _size هو الحجم الكلي: يُحسب بمسح واحد عند أول ملف، ثم يُحدّث مع كل
+    ملف يُضاف أو طلب يُحذف، ويُعاد حسابه من القرص عند كل حذف للأقدم.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size = None  # None = لم يُحسب بعد
+        os.makedirs(directory, exist_ok=True)
+
+    def order_directory(self, order_id):
+        """مجلد ملفات طلب - Directory holding one order's documents"""
+        return os.path.join(self.directory, str(order_id))
+
+    def path_for(self, order_id, kind, key):
+        """مسار الملف في الذاكرة - Path of a cached document"""
+        return os.path.join(self.order_directory(order_id), f'{kind}-{key}.{FILE_EXTENSIONS[kind]}')
+
+    def get(self, order_id, kind, key):
+        """المسار إذا كان الملف موجوداً، وإلا None - Cached path or None"""
+        path = self.path_for(order_id, kind, key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def temp_path(self):
+        """
+        ملف مؤقت داخل مجلد الذاكرة - New temp file in the cache directory
+
+        في نفس المجلد حتى يكون النقل بـ os.replace ذرياً.
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        os.close(fd)
+        return tmp_path
+
+    def commit(self, order_id, kind, key, tmp_path):
+        """نقل ملف مكتمل لمكانه في الذاكرة - Atomically publish a rendered temp file"""
+        path = self.path_for(order_id, kind, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        added = os.path.getsize(tmp_path) - _file_size(path)
+        os.replace(tmp_path, path)
+        self._add_size(added)
+        self.evict()
+        return path
+
+    def discard(self, tmp_path):
+        """حذف ملف مؤقت فشل توليده - Remove a failed temp file"""
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+
+    def get_or_render(self, order_id, kind, key, render):
+        """
+        الملف من الذاكرة أو توليده - Return the cached path, rendering on a miss
+
+        render(fileobj) يكتب الملف في ملف مؤقت يُنقل لمكانه بعملية ذرية،
+        فلا يرى طلب متزامن ملفاً نصف مكتوب.
+        """
+        def render_to(tmp_path):
+            with open(tmp_path, 'wb') as output:
+                render(output)
+
+        return self.get_or_render_file(order_id, kind, key, render_to)
+
+    def get_or_render_file(self, order_id, kind, key, render_to):
+        """
+        مثل get_or_render لكن render_to(tmp_path) يكتب الملف بنفسه
+        Like get_or_render, for renderers that write the file themselves (e.g. in a worker process)
+        """
+        path = self.get(order_id, kind, key)
+        if path is not None:
+            return path
+
+        tmp_path = self.temp_path()
+        try:
+            render_to(tmp_path)
+        except BaseException:
+            self.discard(tmp_path)
+            raise
+
+        return self.commit(order_id, kind, key, tmp_path)
+
+    def invalidate(self, order_id):
+        """حذف كل ملفات طلب - Drop every cached document of an order"""
+        directory = self.order_directory(order_id)
+        try:
+            removed = sum(_file_size(entry.path) for entry in os.scandir(directory))
+        except FileNotFoundError:
+            return
+        shutil.rmtree(directory, ignore_errors=True)
+        self._add_size(-removed)
+
+    def _add_size(self, delta):
+        with self._lock:
+            if self._size is not None:
+                self._size = max(0, self._size + delta)
+
+    def _iter_files(self):
+        for entry in os.scandir(self.directory):
+            if entry.is_dir():
+                try:
+                    yield from os.scandir(entry.path)
+                except FileNotFoundError:
+                    continue  # حُذف المجلد أثناء المرور (invalidate)
+            elif entry.is_file() and not entry.name.endswith('.tmp'):
+                # ملفات الإصدار السابق من الذاكرة (بدون مجلد لكل طلب)
+                yield entry
+
+    def evict(self):
+        """
+        حذف الأقدم استخداماً عند تجاوز الحد - LRU eviction once the running total crosses max_bytes
+
+        تحت الحد لا يُقرأ المجلد؛ فوقه يُمسح مرة ويُحذف الأقدم حتى
+        EVICT_TARGET_RATIO من الحد.
+        """
+        with self._lock:
+            if self._size is not None and self._size <= self.max_bytes:
+                return
+
+            entries = []
+            total = 0
+            for entry in self._iter_files():
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+            if total > self.max_bytes:
+                target = self.max_bytes * EVICT_TARGET_RATIO
+                entries.sort()
+                for _, size, path in entries:
+                    try:
+                        os.unlink(path)
+                    except FileNotFoundError:
+                        pass
+                    total -= size
+                    if total <= target:
+                        break
+            self._size = total
+
+
+def _file_size(path):
+    """حجم ملف أو 0 إذا لم يكن موجوداً - File size, 0 if missing"""
+    try:
+        return os.path.getsize(path)
+    except FileNotFoundError:
+        return 0
+
+
+def _invalidate_touched_orders(session, flush_context):
+    """حذف ملفات الطلبات المعدلة أو المحذوفة - Drop documents of orders changed by a flush"""
+    if not has_app_context():
+        return
+    cache = current_app.extensions.get('document_cache')
+    if cache is None:
+        return
+
+    order_ids, _ = collect_touched_orders(session)
+    # الطلب الجديد ليس له ملفات بعد
+    order_ids.difference_update(obj.id for obj in session.new if isinstance(obj, Order))
+    for order_id in order_ids:
+        cache.invalidate(order_id)
+
+
+def register_invalidation_events():
+    """حذف ملفات أي طلب يُعدّل أو يُحذف - Invalidate on any order mutation (idempotent)"""
+    if not event.contains(db.session, 'after_flush', _invalidate_touched_orders):
+        event.listen(db.session, 'after_flush', _invalidate_touched_orders)
@@ -1,13 +1,21 @@
 # -*- coding: utf-8 -*-
 """
-مولد ملفات Excel الاحترافية
-Professional Excel File Generator
+مولد ملفات Excel الاحترافية: الأنماط وتخطيط الورقة
+Professional Excel File Generator: style registry and sheet layout
+
+الملف نفسه يُكتب في excel_template.py (المسار الوحيد لتوليد Excel)؛
+هنا فقط ما يحدد شكله.
 """
 
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, NamedStyle
 from openpyxl.utils import get_column_letter
-from datetime import datetime
+from collections import namedtuple
+from types import MappingProxyType
+from money import ZERO, DEFAULT_TAX_RATE, round_money, tax_for, to_float
+
+# إصدار شكل الملف؛ يُزاد عند أي تغيير في التخطيط أو التنسيق حتى تُلغى الملفات المخزنة
+# Output format version; bump on any layout/style change to invalidate cached documents
+GENERATOR_VERSION = 4
 
 # Column width constants for Arabic text
 LABEL_COLUMN_WIDTH = 25       # For columns with Arabic labels (e.g., "رقم الطلب:")
@@ -16,415 +24,278 @@ WIDE_COLUMN_WIDTH = 35        # For wider content like names
 EXTRA_WIDE_COLUMN_WIDTH = 45  # For extra wide content like descriptions
 NARROW_COLUMN_WIDTH = 18      # For narrow columns like quantities
 
+# تعريف الألوان الاحترافية - Define professional colors
+HEADER_COLOR = '2B3E50'  # أزرق داكن
+SECTION_HEADER_COLOR = '5B7A99'  # أزرق متوسط
+LIGHT_GRAY = 'F2F2F2'  # رمادي فاتح جداً
+DATA_HIGHLIGHT = 'E8F0F8'  # أزرق فاتح جداً
+TOTAL_COLOR = 'D9E2F3'  # أزرق فاتح للإجماليات
+FINAL_TOTAL_COLOR = '2B3E50'  # أزرق داكن للإجمالي النهائي
+
+NUMBER_FORMAT = '#,##0.00'
+CURRENCY_FORMAT = '#,##0.00 "ج.م"'
+
+# تعريف الحدود - Define borders
+_THIN_SIDE = Side(style='thin', color='808080')
+_MEDIUM_SIDE = Side(style='medium', color='2B3E50')
+THIN_BORDER = Border(left=_THIN_SIDE, right=_THIN_SIDE, top=_THIN_SIDE, bottom=_THIN_SIDE)
+MEDIUM_BORDER = Border(left=_MEDIUM_SIDE, right=_MEDIUM_SIDE, top=_MEDIUM_SIDE, bottom=_MEDIUM_SIDE)
+
+# تعريف الخطوط - Define fonts
+TITLE_FONT = Font(name='Sakkal Majalla', size=22, bold=True, color='FFFFFF')
+SUBTITLE_FONT = Font(name='Sakkal Majalla', size=16, bold=True, color='FFFFFF')
+SECTION_FONT = Font(name='Traditional Arabic', size=14, bold=True, color='2B3E50')
+LABEL_FONT = Font(name='Traditional Arabic', size=12, bold=True)
+DATA_FONT = Font(name='Traditional Arabic', size=11)
+DATA_BOLD_FONT = Font(name='Traditional Arabic', size=11, bold=True)
+HEADER_TABLE_FONT = Font(name='Traditional Arabic', size=12, bold=True, color='FFFFFF')
+PO_NUMBER_FONT = Font(name='Traditional Arabic', size=12, bold=True, color='0066CC')
+TOTAL_FONT = Font(name='Traditional Arabic', size=12, bold=True)
+FINAL_LABEL_FONT = Font(name='Traditional Arabic', size=13, bold=True, color='FFFFFF')
+FINAL_VALUE_FONT = Font(name='Traditional Arabic', size=14, bold=True, color='FFFFFF')
+
+# تعريف المحاذاة - Define alignments (all right-to-left)
+RIGHT = Alignment(horizontal='right', readingOrder=2)
+RIGHT_WRAP = Alignment(horizontal='right', readingOrder=2, wrap_text=True)
+CENTER = Alignment(horizontal='center', readingOrder=2)
+MIDDLE_CENTER = Alignment(horizontal='center', vertical='center', readingOrder=2)
+MIDDLE_CENTER_WRAP = Alignment(horizontal='center', vertical='center', readingOrder=2, wrap_text=True)
+MIDDLE_RIGHT = Alignment(horizontal='right', vertical='center', readingOrder=2)
+MIDDLE_RIGHT_WRAP = Alignment(horizontal='right', vertical='center', readingOrder=2, wrap_text=True)
+TOP_RIGHT_WRAP = Alignment(horizontal='right', vertical='top', readingOrder=2, wrap_text=True)
+
+
+def _solid(color):
+    """تعبئة بلون واحد - Solid fill"""
+    return PatternFill(start_color=color, end_color=color, fill_type='solid')
+
+
+def _item_styles(suffix, color):
+    """أنماط صف الأصناف بلون معين - Item row styles for one row color"""
+    fill = _solid(color)
+    return {
+        f'po_item_center_{suffix}': dict(font=DATA_FONT, alignment=MIDDLE_CENTER, fill=fill, border=THIN_BORDER),
+        f'po_item_text_{suffix}': dict(font=DATA_FONT, alignment=MIDDLE_RIGHT_WRAP, fill=fill, border=THIN_BORDER),
+        f'po_item_number_{suffix}': dict(font=DATA_FONT, alignment=MIDDLE_CENTER, fill=fill, border=THIN_BORDER,
+                                         number_format=NUMBER_FORMAT),
+        f'po_item_total_{suffix}': dict(font=DATA_BOLD_FONT, alignment=MIDDLE_CENTER, fill=fill, border=THIN_BORDER,
+                                        number_format=NUMBER_FORMAT),
+    }
+
+
+# سجل الأنماط: كل تنسيق يُعرّف مرة واحدة ويُسجّل في كل ملف كـ NamedStyle
+# Style registry: each format is defined once and registered per workbook as a NamedStyle
+STYLE_REGISTRY = MappingProxyType({
+    'po_title': dict(font=TITLE_FONT, alignment=MIDDLE_CENTER, fill=_solid(HEADER_COLOR)),
+    'po_subtitle': dict(font=SUBTITLE_FONT, alignment=MIDDLE_CENTER, fill=_solid(SECTION_HEADER_COLOR)),
+    'po_label': dict(font=LABEL_FONT, alignment=RIGHT),
+    'po_number': dict(font=PO_NUMBER_FONT, alignment=CENTER, fill=_solid(DATA_HIGHLIGHT), border=THIN_BORDER),
+    'po_highlight': dict(font=DATA_FONT, alignment=CENTER, fill=_solid(DATA_HIGHLIGHT), border=THIN_BORDER),
+    'po_section': dict(font=SECTION_FONT, alignment=MIDDLE_CENTER, fill=_solid(LIGHT_GRAY), border=THIN_BORDER),
+    'po_data_right': dict(font=DATA_FONT, alignment=RIGHT, border=THIN_BORDER),
+    'po_data_center': dict(font=DATA_FONT, alignment=CENTER, border=THIN_BORDER),
+    'po_data_wrap': dict(font=DATA_FONT, alignment=RIGHT_WRAP, border=THIN_BORDER),
+    'po_table_header': dict(font=HEADER_TABLE_FONT, alignment=MIDDLE_CENTER, fill=_solid(HEADER_COLOR),
+                            border=MEDIUM_BORDER),
+    **_item_styles('odd', 'FFFFFF'),
+    **_item_styles('even', LIGHT_GRAY),
+    'po_total_label': dict(font=LABEL_FONT, alignment=MIDDLE_RIGHT, fill=_solid(TOTAL_COLOR), border=THIN_BORDER),
+    'po_total_value': dict(font=TOTAL_FONT, alignment=MIDDLE_CENTER, fill=_solid(TOTAL_COLOR), border=MEDIUM_BORDER,
+                           number_format=NUMBER_FORMAT),
+    'po_final_label': dict(font=FINAL_LABEL_FONT, alignment=MIDDLE_RIGHT, fill=_solid(FINAL_TOTAL_COLOR),
+                           border=MEDIUM_BORDER),
+    'po_final_value': dict(font=FINAL_VALUE_FONT, alignment=MIDDLE_CENTER, fill=_solid(FINAL_TOTAL_COLOR),
+                           border=MEDIUM_BORDER, number_format=CURRENCY_FORMAT),
+    'po_notes': dict(font=DATA_FONT, alignment=TOP_RIGHT_WRAP, border=THIN_BORDER),
+    'po_signature': dict(font=LABEL_FONT, alignment=MIDDLE_CENTER_WRAP),
+})
 
-def create_professional_excel(order_data):
+# رأس جدول الأصناف - Items table headers and widths
+ITEM_HEADERS = ['م', 'كود الصنف', 'اسم الصنف', 'الوصف', 'الكمية', 'سعر الوحدة', 'الإجمالي']
+ITEM_COLUMN_WIDTHS = [
+    LABEL_COLUMN_WIDTH,        # م - Number column
+    STANDARD_COLUMN_WIDTH,     # كود الصنف - Product code
+    WIDE_COLUMN_WIDTH,         # اسم الصنف - Product name
+    EXTRA_WIDE_COLUMN_WIDTH,   # الوصف - Description
+    NARROW_COLUMN_WIDTH,       # الكمية - Quantity
+    STANDARD_COLUMN_WIDTH,     # سعر الوحدة - Unit price
+    STANDARD_COLUMN_WIDTH      # الإجمالي - Total
+]
+
+SHEET_TITLE = "طلب توريد"
+
+# صف في تخطيط الورقة: رقمه، ارتفاعه، الخلايا [(العمود، القيمة، اسم النمط)] والدمج
+# A sheet layout row: number, height, cells [(column, value, style name)] and merged ranges
+SheetRow = namedtuple('SheetRow', ['number', 'height', 'cells', 'merges'])
+
+
+def register_styles(wb):
+    """تسجيل أنماط السجل في الملف - Register the style registry on a workbook"""
+    for name, spec in STYLE_REGISTRY.items():
+        wb.add_named_style(NamedStyle(name=name, **spec))
+
+
+def iter_sheet_rows(order_data, items=None):
     """
-    إنشاء ملف Excel احترافي لطلب التوريد
-    Create professional Excel file for purchase order
+    تخطيط ورقة طلب التوريد صفاً بصف - Purchase order sheet layout, row by row
+
+    excel_template يكتب الصفوف كما هي؛ أي تغيير في الشكل يكون هنا فقط.
+    items يمكن أن تكون أي iterable (مثلاً مؤشر قاعدة بيانات) وتُقرأ مرة واحدة.
     """
-    wb = Workbook()
-    sheet = wb.active
-    sheet.title = "طلب توريد"
-    sheet.sheet_view.rightToLeft = True
-    
-    # تعريف الحدود - Define borders
-    thin_border = Border(
-        left=Side(style='thin', color='808080'),
-        right=Side(style='thin', color='808080'),
-        top=Side(style='thin', color='808080'),
-        bottom=Side(style='thin', color='808080')
-    )
-    
-    medium_border = Border(
-        left=Side(style='medium', color='2B3E50'),
-        right=Side(style='medium', color='2B3E50'),
-        top=Side(style='medium', color='2B3E50'),
-        bottom=Side(style='medium', color='2B3E50')
-    )
-    
-    # تعريف الألوان الاحترافية - Define professional colors
-    HEADER_COLOR = '2B3E50'  # أزرق داكن
-    SECTION_HEADER_COLOR = '5B7A99'  # أزرق متوسط
-    LIGHT_GRAY = 'F2F2F2'  # رمادي فاتح جداً
-    DATA_HIGHLIGHT = 'E8F0F8'  # أزرق فاتح جداً
-    TOTAL_COLOR = 'D9E2F3'  # أزرق فاتح للإجماليات
-    FINAL_TOTAL_COLOR = '2B3E50'  # أزرق داكن للإجمالي النهائي
-    
-    # تعريف الخطوط - Define fonts
-    TITLE_FONT = Font(name='Sakkal Majalla', size=22, bold=True, color='FFFFFF')
-    SUBTITLE_FONT = Font(name='Sakkal Majalla', size=16, bold=True, color='FFFFFF')
-    SECTION_FONT = Font(name='Traditional Arabic', size=14, bold=True, color='2B3E50')
-    LABEL_FONT = Font(name='Traditional Arabic', size=12, bold=True)
-    DATA_FONT = Font(name='Traditional Arabic', size=11)
-    HEADER_TABLE_FONT = Font(name='Traditional Arabic', size=12, bold=True, color='FFFFFF')
-    
+    if items is None:
+        items = order_data.get('items', [])
+
     # === رأس الشركة - Company Header ===
-    sheet.merge_cells('A1:G1')
-    sheet['A1'] = 'شركة الأمانة للتوريدات العامة'
-    sheet['A1'].font = TITLE_FONT
-    sheet['A1'].alignment = Alignment(horizontal='center', vertical='center', readingOrder=2)
-    sheet['A1'].fill = PatternFill(start_color=HEADER_COLOR, end_color=HEADER_COLOR, fill_type='solid')
-    sheet.row_dimensions[1].height = 35
-    
-    sheet.merge_cells('A2:G2')
-    sheet['A2'] = 'طلب توريد - Purchase Order'
-    sheet['A2'].font = SUBTITLE_FONT
-    sheet['A2'].alignment = Alignment(horizontal='center', vertical='center', readingOrder=2)
-    sheet['A2'].fill = PatternFill(start_color=SECTION_HEADER_COLOR, end_color=SECTION_HEADER_COLOR, fill_type='solid')
-    sheet.row_dimensions[2].height = 28
-    
+    yield SheetRow(1, 35, [(1, 'شركة الأمانة للتوريدات العامة', 'po_title')], ['A1:G1'])
+    yield SheetRow(2, 28, [(1, 'طلب توريد - Purchase Order', 'po_subtitle')], ['A2:G2'])
+
     # === بيانات الطلب الأساسية - Basic Order Info ===
     current_row = 4
-    
+
     # رقم الطلب والتاريخ في صف واحد
-    sheet[f'A{current_row}'] = 'رقم الطلب:'
-    sheet[f'A{current_row}'].font = LABEL_FONT
-    sheet[f'A{current_row}'].alignment = Alignment(horizontal='right', readingOrder=2)
-    
-    sheet[f'B{current_row}'] = order_data.get('po_number', '')
-    sheet[f'B{current_row}'].font = Font(name='Traditional Arabic', size=12, bold=True, color='0066CC')
-    sheet[f'B{current_row}'].alignment = Alignment(horizontal='center', readingOrder=2)
-    sheet[f'B{current_row}'].fill = PatternFill(start_color=DATA_HIGHLIGHT, end_color=DATA_HIGHLIGHT, fill_type='solid')
-    sheet[f'B{current_row}'].border = thin_border
-    
-    sheet[f'D{current_row}'] = 'التاريخ:'
-    sheet[f'D{current_row}'].font = LABEL_FONT
-    sheet[f'D{current_row}'].alignment = Alignment(horizontal='right', readingOrder=2)
-    
-    sheet[f'E{current_row}'] = order_data.get('po_date', '')
-    sheet[f'E{current_row}'].font = DATA_FONT
-    sheet[f'E{current_row}'].alignment = Alignment(horizontal='center', readingOrder=2)
-    sheet[f'E{current_row}'].fill = PatternFill(start_color=DATA_HIGHLIGHT, end_color=DATA_HIGHLIGHT, fill_type='solid')
-    sheet[f'E{current_row}'].border = thin_border
-    
+    yield SheetRow(current_row, None, [
+        (1, 'رقم الطلب:', 'po_label'),
+        (2, order_data.get('po_number', ''), 'po_number'),
+        (4, 'التاريخ:', 'po_label'),
+        (5, order_data.get('po_date', ''), 'po_highlight'),
+    ], [])
     current_row += 1
-    
+
     # الرقم الضريبي والسجل التجاري
-    sheet[f'A{current_row}'] = 'الرقم الضريبي:'
-    sheet[f'A{current_row}'].font = LABEL_FONT
-    sheet[f'A{current_row}'].alignment = Alignment(horizontal='right', readingOrder=2)
-    
-    sheet[f'B{current_row}'] = order_data.get('company_tax_id', '')
-    sheet[f'B{current_row}'].font = DATA_FONT
-    sheet[f'B{current_row}'].alignment = Alignment(horizontal='center', readingOrder=2)
-    sheet[f'B{current_row}'].fill = PatternFill(start_color=DATA_HIGHLIGHT, end_color=DATA_HIGHLIGHT, fill_type='solid')
-    sheet[f'B{current_row}'].border = thin_border
-    
-    sheet[f'D{current_row}'] = 'السجل التجاري:'
-    sheet[f'D{current_row}'].font = LABEL_FONT
-    sheet[f'D{current_row}'].alignment = Alignment(horizontal='right', readingOrder=2)
-    
-    sheet[f'E{current_row}'] = order_data.get('commercial_reg', '')
-    sheet[f'E{current_row}'].font = DATA_FONT
-    sheet[f'E{current_row}'].alignment = Alignment(horizontal='center', readingOrder=2)
-    sheet[f'E{current_row}'].fill = PatternFill(start_color=DATA_HIGHLIGHT, end_color=DATA_HIGHLIGHT, fill_type='solid')
-    sheet[f'E{current_row}'].border = thin_border
-    
+    yield SheetRow(current_row, None, [
+        (1, 'الرقم الضريبي:', 'po_label'),
+        (2, order_data.get('company_tax_id', ''), 'po_highlight'),
+        (4, 'السجل التجاري:', 'po_label'),
+        (5, order_data.get('company_commercial_reg', ''), 'po_highlight'),
+    ], [])
     current_row += 2
-    
+
     # === بيانات المورد - Supplier Information ===
-    sheet.merge_cells(f'A{current_row}:G{current_row}')
-    sheet[f'A{current_row}'] = 'بيانات المورد - Supplier Information'
-    sheet[f'A{current_row}'].font = SECTION_FONT
-    sheet[f'A{current_row}'].alignment = Alignment(horizontal='center', vertical='center', readingOrder=2)
-    sheet[f'A{current_row}'].fill = PatternFill(start_color=LIGHT_GRAY, end_color=LIGHT_GRAY, fill_type='solid')
-    sheet[f'A{current_row}'].border = thin_border
-    sheet.row_dimensions[current_row].height = 25
+    yield SheetRow(current_row, 25, [(1, 'بيانات المورد - Supplier Information', 'po_section')],
+                   [f'A{current_row}:G{current_row}'])
     current_row += 1
-    
-    supplier = order_data.get('supplier', {})
-    
+
+    supplier = order_data.get('supplier') or {}
+
     # اسم المورد
-    sheet[f'A{current_row}'] = 'اسم المورد:'
-    sheet[f'A{current_row}'].font = LABEL_FONT
-    sheet[f'A{current_row}'].alignment = Alignment(horizontal='right', readingOrder=2)
-    sheet.merge_cells(f'B{current_row}:C{current_row}')
-    sheet[f'B{current_row}'] = supplier.get('name', '')
-    sheet[f'B{current_row}'].font = DATA_FONT
-    sheet[f'B{current_row}'].alignment = Alignment(horizontal='right', readingOrder=2)
-    sheet[f'B{current_row}'].border = thin_border
-    
-    sheet[f'D{current_row}'] = 'الرقم الضريبي:'
-    sheet[f'D{current_row}'].font = LABEL_FONT
-    sheet[f'D{current_row}'].alignment = Alignment(horizontal='right', readingOrder=2)
-    sheet[f'E{current_row}'] = supplier.get('tax_id', '')
-    sheet[f'E{current_row}'].font = DATA_FONT
-    sheet[f'E{current_row}'].alignment = Alignment(horizontal='center', readingOrder=2)
-    sheet[f'E{current_row}'].border = thin_border
-    
+    yield SheetRow(current_row, None, [
+        (1, 'اسم المورد:', 'po_label'),
+        (2, supplier.get('name', ''), 'po_data_right'),
+        (4, 'الرقم الضريبي:', 'po_label'),
+        (5, supplier.get('tax_id', ''), 'po_data_center'),
+    ], [f'B{current_row}:C{current_row}'])
     current_row += 1
-    
+
     # تليفون وإيميل
-    sheet[f'A{current_row}'] = 'التليفون:'
-    sheet[f'A{current_row}'].font = LABEL_FONT
-    sheet[f'A{current_row}'].alignment = Alignment(horizontal='right', readingOrder=2)
-    sheet[f'B{current_row}'] = supplier.get('phone', '')
-    sheet[f'B{current_row}'].font = DATA_FONT
-    sheet[f'B{current_row}'].alignment = Alignment(horizontal='center', readingOrder=2)
-    sheet[f'B{current_row}'].border = thin_border
-    
-    sheet[f'D{current_row}'] = 'البريد الإلكتروني:'
-    sheet[f'D{current_row}'].font = LABEL_FONT
-    sheet[f'D{current_row}'].alignment = Alignment(horizontal='right', readingOrder=2)
-    sheet.merge_cells(f'E{current_row}:F{current_row}')
-    sheet[f'E{current_row}'] = supplier.get('email', '')
-    sheet[f'E{current_row}'].font = DATA_FONT
-    sheet[f'E{current_row}'].alignment = Alignment(horizontal='right', readingOrder=2)
-    sheet[f'E{current_row}'].border = thin_border
-    
+    yield SheetRow(current_row, None, [
+        (1, 'التليفون:', 'po_label'),
+        (2, supplier.get('phone', ''), 'po_data_center'),
+        (4, 'البريد الإلكتروني:', 'po_label'),
+        (5, supplier.get('email', ''), 'po_data_right'),
+    ], [f'E{current_row}:F{current_row}'])
     current_row += 1
-    
+
     # العنوان
-    sheet[f'A{current_row}'] = 'العنوان:'
-    sheet[f'A{current_row}'].font = LABEL_FONT
-    sheet[f'A{current_row}'].alignment = Alignment(horizontal='right', readingOrder=2)
-    sheet.merge_cells(f'B{current_row}:G{current_row}')
-    sheet[f'B{current_row}'] = supplier.get('address', '')
-    sheet[f'B{current_row}'].font = DATA_FONT
-    sheet[f'B{current_row}'].alignment = Alignment(horizontal='right', readingOrder=2)
-    sheet[f'B{current_row}'].border = thin_border
-    
+    yield SheetRow(current_row, None, [
+        (1, 'العنوان:', 'po_label'),
+        (2, supplier.get('address', ''), 'po_data_right'),
+    ], [f'B{current_row}:G{current_row}'])
     current_row += 2
-    
+
     # === جدول الأصناف - Items Table ===
-    sheet.merge_cells(f'A{current_row}:G{current_row}')
-    sheet[f'A{current_row}'] = 'أصناف الطلب - Order Items'
-    sheet[f'A{current_row}'].font = SECTION_FONT
-    sheet[f'A{current_row}'].alignment = Alignment(horizontal='center', vertical='center', readingOrder=2)
-    sheet[f'A{current_row}'].fill = PatternFill(start_color=LIGHT_GRAY, end_color=LIGHT_GRAY, fill_type='solid')
-    sheet[f'A{current_row}'].border = thin_border
-    sheet.row_dimensions[current_row].height = 25
+    yield SheetRow(current_row, 25, [(1, 'أصناف الطلب - Order Items', 'po_section')],
+                   [f'A{current_row}:G{current_row}'])
     current_row += 1
-    
+
     # رأس الجدول - Table Headers
-    headers = ['م', 'كود الصنف', 'اسم الصنف', 'الوصف', 'الكمية', 'سعر الوحدة', 'الإجمالي']
-    header_widths = [
-        LABEL_COLUMN_WIDTH,        # م - Number column
-        STANDARD_COLUMN_WIDTH,     # كود الصنف - Product code
-        WIDE_COLUMN_WIDTH,         # اسم الصنف - Product name
-        EXTRA_WIDE_COLUMN_WIDTH,   # الوصف - Description
-        NARROW_COLUMN_WIDTH,       # الكمية - Quantity
-        STANDARD_COLUMN_WIDTH,     # سعر الوحدة - Unit price
-        STANDARD_COLUMN_WIDTH      # الإجمالي - Total
-    ]
-    
-    for col_idx, (header, width) in enumerate(zip(headers, header_widths), start=1):
-        cell = sheet.cell(row=current_row, column=col_idx)
-        cell.value = header
-        cell.font = HEADER_TABLE_FONT
-        cell.alignment = Alignment(horizontal='center', vertical='center', readingOrder=2)
-        cell.fill = PatternFill(start_color=HEADER_COLOR, end_color=HEADER_COLOR, fill_type='solid')
-        cell.border = medium_border
-        # Only set width if it's larger than what might already be set
-        current_width = sheet.column_dimensions[get_column_letter(col_idx)].width
-        if current_width is None or width > current_width:
-            sheet.column_dimensions[get_column_letter(col_idx)].width = width
-    
-    sheet.row_dimensions[current_row].height = 22
+    yield SheetRow(current_row, 22, [
+        (col_idx, header, 'po_table_header') for col_idx, header in enumerate(ITEM_HEADERS, start=1)
+    ], [])
     current_row += 1
-    
+
     # بيانات الأصناف - Items Data
-    items = order_data.get('items', [])
-    subtotal = 0.0
-    
+    subtotal = ZERO
+
     for idx, item in enumerate(items, start=1):
-        row_color = LIGHT_GRAY if idx % 2 == 0 else 'FFFFFF'
-        
-        # م - Number
-        cell = sheet.cell(row=current_row, column=1)
-        cell.value = idx
-        cell.font = DATA_FONT
-        cell.alignment = Alignment(horizontal='center', vertical='center', readingOrder=2)
-        cell.fill = PatternFill(start_color=row_color, end_color=row_color, fill_type='solid')
-        cell.border = thin_border
-        
-        # كود الصنف - Product Code
-        cell = sheet.cell(row=current_row, column=2)
-        cell.value = item.get('product_code', '')
-        cell.font = DATA_FONT
-        cell.alignment = Alignment(horizontal='center', vertical='center', readingOrder=2)
-        cell.fill = PatternFill(start_color=row_color, end_color=row_color, fill_type='solid')
-        cell.border = thin_border
-        
-        # اسم الصنف - Product Name
-        cell = sheet.cell(row=current_row, column=3)
-        cell.value = item.get('product_name', '')
-        cell.font = DATA_FONT
-        cell.alignment = Alignment(horizontal='right', vertical='center', readingOrder=2, wrap_text=True)
-        cell.fill = PatternFill(start_color=row_color, end_color=row_color, fill_type='solid')
-        cell.border = thin_border
-        
-        # الوصف - Description
-        cell = sheet.cell(row=current_row, column=4)
-        cell.value = item.get('description', '')
-        cell.font = DATA_FONT
-        cell.alignment = Alignment(horizontal='right', vertical='center', readingOrder=2, wrap_text=True)
-        cell.fill = PatternFill(start_color=row_color, end_color=row_color, fill_type='solid')
-        cell.border = thin_border
-        
-        # الكمية - Quantity
-        cell = sheet.cell(row=current_row, column=5)
-        cell.value = item.get('quantity', 0)
-        cell.font = DATA_FONT
-        cell.alignment = Alignment(horizontal='center', vertical='center', readingOrder=2)
-        cell.fill = PatternFill(start_color=row_color, end_color=row_color, fill_type='solid')
-        cell.border = thin_border
-        cell.number_format = '#,##0.00'
-        
-        # سعر الوحدة - Unit Price
-        cell = sheet.cell(row=current_row, column=6)
-        cell.value = item.get('unit_price', 0)
-        cell.font = DATA_FONT
-        cell.alignment = Alignment(horizontal='center', vertical='center', readingOrder=2)
-        cell.fill = PatternFill(start_color=row_color, end_color=row_color, fill_type='solid')
-        cell.border = thin_border
-        cell.number_format = '#,##0.00'
-        
-        # الإجمالي - Total
+        suffix = 'even' if idx % 2 == 0 else 'odd'
         item_total = item.get('total_price', 0)
-        subtotal += item_total
-        cell = sheet.cell(row=current_row, column=7)
-        cell.value = item_total
-        cell.font = Font(name='Traditional Arabic', size=11, bold=True)
-        cell.alignment = Alignment(horizontal='center', vertical='center', readingOrder=2)
-        cell.fill = PatternFill(start_color=row_color, end_color=row_color, fill_type='solid')
-        cell.border = thin_border
-        cell.number_format = '#,##0.00'
-        
-        sheet.row_dimensions[current_row].height = 20
+        subtotal += round_money(item_total)
+
+        yield SheetRow(current_row, 20, [
+            (1, idx, f'po_item_center_{suffix}'),
+            (2, item.get('product_code', ''), f'po_item_center_{suffix}'),
+            (3, item.get('product_name', ''), f'po_item_text_{suffix}'),
+            (4, item.get('description', ''), f'po_item_text_{suffix}'),
+            (5, item.get('quantity', 0), f'po_item_number_{suffix}'),
+            (6, item.get('unit_price', 0), f'po_item_number_{suffix}'),
+            (7, item_total, f'po_item_total_{suffix}'),
+        ], [])
         current_row += 1
-    
+
     # === الإجماليات - Totals ===
     current_row += 1
-    
+
     # المجموع الفرعي - Subtotal
-    sheet.merge_cells(f'A{current_row}:F{current_row}')
-    sheet[f'A{current_row}'] = 'المجموع الفرعي (قبل الضريبة):'
-    sheet[f'A{current_row}'].font = LABEL_FONT
-    sheet[f'A{current_row}'].alignment = Alignment(horizontal='right', vertical='center', readingOrder=2)
-    sheet[f'A{current_row}'].fill = PatternFill(start_color=TOTAL_COLOR, end_color=TOTAL_COLOR, fill_type='solid')
-    sheet[f'A{current_row}'].border = thin_border
-    
-    sheet[f'G{current_row}'] = subtotal
-    sheet[f'G{current_row}'].font = Font(name='Traditional Arabic', size=12, bold=True)
-    sheet[f'G{current_row}'].alignment = Alignment(horizontal='center', vertical='center', readingOrder=2)
-    sheet[f'G{current_row}'].fill = PatternFill(start_color=TOTAL_COLOR, end_color=TOTAL_COLOR, fill_type='solid')
-    sheet[f'G{current_row}'].border = medium_border
-    sheet[f'G{current_row}'].number_format = '#,##0.00'
-    sheet.row_dimensions[current_row].height = 22
+    yield SheetRow(current_row, 22, [
+        (1, 'المجموع الفرعي (قبل الضريبة):', 'po_total_label'),
+        (7, to_float(subtotal), 'po_total_value'),
+    ], [f'A{current_row}:F{current_row}'])
     current_row += 1
-    
+
     # الضريبة - Tax
-    tax_rate = order_data.get('tax_rate', 14)
-    tax_amount = subtotal * (tax_rate / 100)
-    sheet.merge_cells(f'A{current_row}:F{current_row}')
-    sheet[f'A{current_row}'] = f'ضريبة القيمة المضافة ({tax_rate}%):'
-    sheet[f'A{current_row}'].font = LABEL_FONT
-    sheet[f'A{current_row}'].alignment = Alignment(horizontal='right', vertical='center', readingOrder=2)
-    sheet[f'A{current_row}'].fill = PatternFill(start_color=TOTAL_COLOR, end_color=TOTAL_COLOR, fill_type='solid')
-    sheet[f'A{current_row}'].border = thin_border
-    
-    sheet[f'G{current_row}'] = tax_amount
-    sheet[f'G{current_row}'].font = Font(name='Traditional Arabic', size=12, bold=True)
-    sheet[f'G{current_row}'].alignment = Alignment(horizontal='center', vertical='center', readingOrder=2)
-    sheet[f'G{current_row}'].fill = PatternFill(start_color=TOTAL_COLOR, end_color=TOTAL_COLOR, fill_type='solid')
-    sheet[f'G{current_row}'].border = medium_border
-    sheet[f'G{current_row}'].number_format = '#,##0.00'
-    sheet.row_dimensions[current_row].height = 22
+    tax_rate = order_data.get('tax_rate', DEFAULT_TAX_RATE)
+    tax_amount = tax_for(subtotal, tax_rate)
+    yield SheetRow(current_row, 22, [
+        (1, f'ضريبة القيمة المضافة ({tax_rate}%):', 'po_total_label'),
+        (7, to_float(tax_amount), 'po_total_value'),
+    ], [f'A{current_row}:F{current_row}'])
     current_row += 1
-    
+
     # الإجمالي النهائي - Final Total
     final_total = subtotal + tax_amount
-    sheet.merge_cells(f'A{current_row}:F{current_row}')
-    sheet[f'A{current_row}'] = 'الإجمالي النهائي (شامل الضريبة):'
-    sheet[f'A{current_row}'].font = Font(name='Traditional Arabic', size=13, bold=True, color='FFFFFF')
-    sheet[f'A{current_row}'].alignment = Alignment(horizontal='right', vertical='center', readingOrder=2)
-    sheet[f'A{current_row}'].fill = PatternFill(start_color=FINAL_TOTAL_COLOR, end_color=FINAL_TOTAL_COLOR, fill_type='solid')
-    sheet[f'A{current_row}'].border = medium_border
-    
-    sheet[f'G{current_row}'] = final_total
-    sheet[f'G{current_row}'].font = Font(name='Traditional Arabic', size=14, bold=True, color='FFFFFF')
-    sheet[f'G{current_row}'].alignment = Alignment(horizontal='center', vertical='center', readingOrder=2)
-    sheet[f'G{current_row}'].fill = PatternFill(start_color=FINAL_TOTAL_COLOR, end_color=FINAL_TOTAL_COLOR, fill_type='solid')
-    sheet[f'G{current_row}'].border = medium_border
-    sheet[f'G{current_row}'].number_format = '#,##0.00 "ج.م"'
-    sheet.row_dimensions[current_row].height = 25
+    yield SheetRow(current_row, 25, [
+        (1, 'الإجمالي النهائي (شامل الضريبة):', 'po_final_label'),
+        (7, to_float(final_total), 'po_final_value'),
+    ], [f'A{current_row}:F{current_row}'])
     current_row += 2
-    
+
     # === شروط التوريد - Delivery Terms ===
     if order_data.get('delivery_period') or order_data.get('delivery_location') or order_data.get('payment_terms'):
-        sheet.merge_cells(f'A{current_row}:G{current_row}')
-        sheet[f'A{current_row}'] = 'شروط التوريد - Delivery Terms'
-        sheet[f'A{current_row}'].font = SECTION_FONT
-        sheet[f'A{current_row}'].alignment = Alignment(horizontal='center', vertical='center', readingOrder=2)
-        sheet[f'A{current_row}'].fill = PatternFill(start_color=LIGHT_GRAY, end_color=LIGHT_GRAY, fill_type='solid')
-        sheet[f'A{current_row}'].border = thin_border
-        sheet.row_dimensions[current_row].height = 25
+        yield SheetRow(current_row, 25, [(1, 'شروط التوريد - Delivery Terms', 'po_section')],
+                       [f'A{current_row}:G{current_row}'])
         current_row += 1
-        
-        if order_data.get('delivery_period'):
-            sheet[f'A{current_row}'] = 'مدة التوريد:'
-            sheet[f'A{current_row}'].font = LABEL_FONT
-            sheet[f'A{current_row}'].alignment = Alignment(horizontal='right', readingOrder=2)
-            sheet.merge_cells(f'B{current_row}:G{current_row}')
-            sheet[f'B{current_row}'] = order_data.get('delivery_period', '')
-            sheet[f'B{current_row}'].font = DATA_FONT
-            sheet[f'B{current_row}'].alignment = Alignment(horizontal='right', readingOrder=2, wrap_text=True)
-            sheet[f'B{current_row}'].border = thin_border
-            current_row += 1
-        
-        if order_data.get('delivery_location'):
-            sheet[f'A{current_row}'] = 'مكان التسليم:'
-            sheet[f'A{current_row}'].font = LABEL_FONT
-            sheet[f'A{current_row}'].alignment = Alignment(horizontal='right', readingOrder=2)
-            sheet.merge_cells(f'B{current_row}:G{current_row}')
-            sheet[f'B{current_row}'] = order_data.get('delivery_location', '')
-            sheet[f'B{current_row}'].font = DATA_FONT
-            sheet[f'B{current_row}'].alignment = Alignment(horizontal='right', readingOrder=2, wrap_text=True)
-            sheet[f'B{current_row}'].border = thin_border
-            current_row += 1
-        
-        if order_data.get('payment_terms'):
-            sheet[f'A{current_row}'] = 'شروط الدفع:'
-            sheet[f'A{current_row}'].font = LABEL_FONT
-            sheet[f'A{current_row}'].alignment = Alignment(horizontal='right', readingOrder=2)
-            sheet.merge_cells(f'B{current_row}:G{current_row}')
-            sheet[f'B{current_row}'] = order_data.get('payment_terms', '')
-            sheet[f'B{current_row}'].font = DATA_FONT
-            sheet[f'B{current_row}'].alignment = Alignment(horizontal='right', readingOrder=2, wrap_text=True)
-            sheet[f'B{current_row}'].border = thin_border
-            current_row += 1
-    
+
+        for key, label in (('delivery_period', 'مدة التوريد:'),
+                           ('delivery_location', 'مكان التسليم:'),
+                           ('payment_terms', 'شروط الدفع:')):
+            if order_data.get(key):
+                yield SheetRow(current_row, None, [
+                    (1, label, 'po_label'),
+                    (2, order_data.get(key, ''), 'po_data_wrap'),
+                ], [f'B{current_row}:G{current_row}'])
+                current_row += 1
+
     # === ملاحظات - Notes ===
     if order_data.get('notes'):
         current_row += 1
-        sheet.merge_cells(f'A{current_row}:G{current_row}')
-        sheet[f'A{current_row}'] = 'ملاحظات - Notes'
-        sheet[f'A{current_row}'].font = SECTION_FONT
-        sheet[f'A{current_row}'].alignment = Alignment(horizontal='center', vertical='center', readingOrder=2)
-        sheet[f'A{current_row}'].fill = PatternFill(start_color=LIGHT_GRAY, end_color=LIGHT_GRAY, fill_type='solid')
-        sheet[f'A{current_row}'].border = thin_border
-        sheet.row_dimensions[current_row].height = 25
+        yield SheetRow(current_row, 25, [(1, 'ملاحظات - Notes', 'po_section')],
+                       [f'A{current_row}:G{current_row}'])
         current_row += 1
-        
-        sheet.merge_cells(f'A{current_row}:G{current_row}')
-        sheet[f'A{current_row}'] = order_data.get('notes', '')
-        sheet[f'A{current_row}'].font = DATA_FONT
-        sheet[f'A{current_row}'].alignment = Alignment(horizontal='right', vertical='top', readingOrder=2, wrap_text=True)
-        sheet[f'A{current_row}'].border = thin_border
-        sheet.row_dimensions[current_row].height = 40
-    
+
+        yield SheetRow(current_row, 40, [(1, order_data.get('notes', ''), 'po_notes')],
+                       [f'A{current_row}:G{current_row}'])
+
     # === التوقيعات - Signatures ===
     current_row += 3
-    sheet.merge_cells(f'A{current_row}:C{current_row}')
-    sheet[f'A{current_row}'] = 'توقيع المورد\n___________________'
-    sheet[f'A{current_row}'].font = LABEL_FONT
-    sheet[f'A{current_row}'].alignment = Alignment(horizontal='center', vertical='center', readingOrder=2, wrap_text=True)
-    sheet.row_dimensions[current_row].height = 40
-    
-    sheet.merge_cells(f'E{current_row}:G{current_row}')
-    sheet[f'E{current_row}'] = 'توقيع الشركة\n___________________'
-    sheet[f'E{current_row}'].font = LABEL_FONT
-    sheet[f'E{current_row}'].alignment = Alignment(horizontal='center', vertical='center', readingOrder=2, wrap_text=True)
-    
-    return wb
+    yield SheetRow(current_row, 40, [
+        (1, 'توقيع المورد\n___________________', 'po_signature'),
+        (5, 'توقيع الشركة\n___________________', 'po_signature'),
+    ], [f'A{current_row}:C{current_row}', f'E{current_row}:G{current_row}'])
+
+
+def _setup_sheet(sheet):
+    """إعدادات الورقة الثابتة - Fixed sheet settings (RTL and column widths)"""
+    sheet.title = SHEET_TITLE
+    sheet.sheet_view.rightToLeft = True
+    for col_idx, width in enumerate(ITEM_COLUMN_WIDTHS, start=1):
+        sheet.column_dimensions[get_column_letter(col_idx)].width = width
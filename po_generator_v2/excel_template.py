@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+توليد Excel من قالب ثابت محفوظ في الذاكرة
+Template-based Excel rendering: cached skeleton workbook + per-order sheet XML
+
+الجزء الثابت من الملف (الأنماط، الثيم، إعدادات الورقة وعرض الأعمدة والاتجاه
+من اليمين لليسار) يُبنى بـ openpyxl مرة واحدة لكل عملية ويُحفظ كأجزاء XML
+جاهزة. عند كل طلب يُكتب فقط sheetData للورقة من نفس تخطيط iter_sheet_rows
+(نصوص مضمّنة، أرقام، ارتفاعات الصفوف والدمج) ثم تُضغط الأجزاء في ملف xlsx.
+
+الصفوف تُكتب مباشرة داخل ملف الـ zip أثناء قراءة الأصناف، فيبقى استهلاك
+الذاكرة ثابتاً للطلبات الكبيرة أيضاً. هذا هو المسار الوحيد لتوليد Excel:
+نقاط v2 ومهام الخلفية والواجهة القديمة (/generate عبر order_schema).
+"""
+
+import io
+import re
+import threading
+import time
+import zipfile
+from decimal import Decimal
+from xml.sax.saxutils import escape
+from openpyxl import Workbook
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.utils import get_column_letter
+from excel_generator import STYLE_REGISTRY, iter_sheet_rows, register_styles, _setup_sheet
+
+SHEET_PART = 'xl/worksheets/sheet1.xml'
+CORE_PART = 'docProps/core.xml'
+
+# عدد الصفوف المجمعة في كل كتابة للضغط - Rows per compressed write
+ROWS_PER_WRITE = 256
+
+_XML_DECLARATION = b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+_TIMESTAMP_RE = re.compile(r'(<dcterms:(?:created|modified)[^>]*>)[^<]*(</dcterms:)')
+
+_skeleton = None
+_skeleton_lock = threading.Lock()
+
+
+class Skeleton:
+    """
+    أجزاء الملف الثابتة - Static parts of the purchase order workbook
+
+    parts: [(اسم الجزء، المحتوى)] بترتيب openpyxl عدا الورقة وخصائص الملف.
+    style_ids: رقم التنسيق (cellXfs) لكل نمط في STYLE_REGISTRY.
+    sheet_head / sheet_tail: XML الورقة قبل وبعد sheetData.
+    """
+
+    def __init__(self, parts, core, style_ids, sheet_head, sheet_tail):
+        self.parts = parts
+        self.core = core
+        self.style_ids = style_ids
+        self.sheet_head = sheet_head
+        self.sheet_tail = sheet_tail
+
+
+def _build_skeleton():
+    """بناء القالب بـ openpyxl - Save an empty styled workbook once and split its parts"""
+    wb = Workbook()
+    register_styles(wb)
+    sheet = wb.active
+    _setup_sheet(sheet)
+
+    # خلية لكل نمط حتى يكتب openpyxl تنسيقاتها في styles.xml ونعرف أرقامها
+    style_ids = {}
+    for row, name in enumerate(STYLE_REGISTRY, start=1):
+        cell = sheet.cell(row=row, column=1)
+        cell.style = name
+        style_ids[name] = cell.style_id
+
+    buffer = io.BytesIO()
+    wb.save(buffer)
+
+    parts = []
+    core = sheet_xml = None
+    with zipfile.ZipFile(buffer) as archive:
+        for name in archive.namelist():
+            content = archive.read(name)
+            if name == SHEET_PART:
+                sheet_xml = content.decode('utf-8')
+            elif name == CORE_PART:
+                core = _TIMESTAMP_RE.sub(r'\1{timestamp}\2', content.decode('utf-8'))
+            else:
+                parts.append((name, content))
+
+    # الأبعاد اختيارية، وعدد الصفوف غير معروف قبل الكتابة المتدفقة
+    sheet_xml = re.sub(r'<dimension [^>]*/>', '', sheet_xml)
+    start = sheet_xml.index('<sheetData>')
+    end = sheet_xml.index('</sheetData>') + len('</sheetData>')
+    sheet_head = _XML_DECLARATION + sheet_xml[:start].encode('utf-8') + b'<sheetData>'
+    sheet_tail = sheet_xml[end:].encode('utf-8')
+
+    return Skeleton(parts, core, style_ids, sheet_head, sheet_tail)
+
+
+def get_skeleton():
+    """القالب الثابت (يُبنى مرة لكل عملية) - The per-process cached skeleton"""
+    global _skeleton
+    if _skeleton is None:
+        with _skeleton_lock:
+            if _skeleton is None:
+                _skeleton = _build_skeleton()
+    return _skeleton
+
+
+def _cell_xml(ref, value, style_id):
+    """خلية واحدة - One <c> element (inline string, number or empty)"""
+    if value is None or value == '':
+        return f'<c r="{ref}" s="{style_id}"/>'
+    if isinstance(value, bool):
+        return f'<c r="{ref}" s="{style_id}" t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float, Decimal)):
+        return f'<c r="{ref}" s="{style_id}"><v>{value}</v></c>'
+
+    text = ILLEGAL_CHARACTERS_RE.sub('', str(value))
+    space = ' xml:space="preserve"' if text != text.strip() else ''
+    return f'<c r="{ref}" s="{style_id}" t="inlineStr"><is><t{space}>{escape(text)}</t></is></c>'
+
+
+def _row_xml(row, style_ids):
+    """صف واحد من التخطيط - One <row> element from a SheetRow"""
+    height = f' ht="{row.height}" customHeight="1"' if row.height else ''
+    cells = ''.join(
+        _cell_xml(f'{get_column_letter(column)}{row.number}', value, style_ids[style])
+        for column, value, style in row.cells
+    )
+    return f'<row r="{row.number}"{height}>{cells}</row>'
+
+
+def write_template_excel(order_data, output, items=None):
+    """
+    كتابة ملف Excel من القالب - Render a purchase order workbook to `output`
+
+    items كما في iter_sheet_rows (الافتراضي order_data['items'])؛ أي iterable
+    ويُقرأ مرة واحدة. `output` مسار ملف أو كائن ملف قابل للكتابة.
+    """
+    skeleton = get_skeleton()
+    timestamp = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+
+    with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr(CORE_PART, skeleton.core.format(timestamp=timestamp))
+        for name, content in skeleton.parts:
+            archive.writestr(name, content)
+
+        merges = []
+        pending = []
+        with archive.open(SHEET_PART, 'w') as sheet:
+            sheet.write(skeleton.sheet_head)
+            for row in iter_sheet_rows(order_data, items):
+                merges.extend(row.merges)
+                pending.append(_row_xml(row, skeleton.style_ids))
+                if len(pending) >= ROWS_PER_WRITE:
+                    sheet.write(''.join(pending).encode('utf-8'))
+                    pending.clear()
+            pending.append('</sheetData>')
+            sheet.write(''.join(pending).encode('utf-8'))
+            if merges:
+                refs = ''.join(f'<mergeCell ref="{ref}"/>' for ref in merges)
+                sheet.write(f'<mergeCells count="{len(merges)}">{refs}</mergeCells>'.encode('utf-8'))
+            sheet.write(skeleton.sheet_tail)
+
+
+def render_excel_bytes(order_data, items=None):
+    """ملف Excel كـ bytes - Render a purchase order workbook in memory"""
+    output = io.BytesIO()
+    write_template_excel(order_data, output, items)
+    return output.getvalue()
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""
+طابور مهام توليد الملفات في الخلفية
+Background job queue for document generation
+
+توليد ملف PDF أو Excel كبير قد يستغرق ثوانٍ؛ بدلاً من حجز خيط الطلب
+يُرسل التوليد لمجموعة العمليات ويرجع رقم مهمة فوراً، والمتصفح يستعلم عن
+الحالة ثم يحمّل الملف. الملف الناتج يُحفظ في ذاكرة الملفات (DocumentCache)
+فالتحميل وأي طلب لاحق لنفس المحتوى يُقرأ منها مباشرة.
+لا يوجد وسيط خارجي؛ المهام في الذاكرة وتضيع عند إعادة تشغيل الخادم.
+"""
+
+import threading
+import time
+import uuid
+from collections import deque
+from renderer import RendererBusy, get_renderer, render_order_excel_file
+from excel_template import write_template_excel
+from pdf_generator import create_pdf_from_order
+
+# حالات المهمة - Job states
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+
+# مدة الاحتفاظ بالمهام المنتهية - How long finished jobs stay queryable
+JOB_RETENTION_SECONDS = 60 * 60
+
+# عدد المهام الأخيرة المستخدمة في حساب زمن التنفيذ
+LATENCY_SAMPLE_SIZE = 500
+
+
+def render_document_file(kind, order_data, path):
+    """توليد ملف داخل عملية منفصلة - Render a document to `path` (runs in a worker process)"""
+    with open(path, 'wb') as output:
+        if kind == 'pdf':
+            output.write(create_pdf_from_order(order_data).getvalue())
+        else:
+            write_template_excel(order_data, output)
+
+
+class DocumentJob:
+    """مهمة توليد ملف واحد - A single render job"""
+
+    def __init__(self, order_id, kind, key, filename):
+        self.id = uuid.uuid4().hex
+        self.order_id = order_id
+        self.kind = kind
+        self.key = key
+        self.filename = filename
+        self.status = JOB_QUEUED
+        self.error = None
+        self.future = None
+        self.submitted_at = time.time()
+        self.finished_at = None
+
+    @property
+    def current_status(self):
+        if self.status == JOB_QUEUED and self.future is not None and self.future.running():
+            return JOB_RUNNING
+        return self.status
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'order_id': self.order_id,
+            'kind': self.kind,
+            'status': self.current_status,
+            'error': self.error,
+        }
+
+
+class DocumentJobQueue:
+    """
+    طابور المهام - In-memory job registry backed by the renderer's worker processes
+
+    مهمتان لنفس المحتوى (نفس kind و key) لا تُولّدان مرتين؛ الثانية
+    ترجع نفس المهمة الجارية.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+        self._jobs = {}
+        self._in_flight = {}
+        self._latencies = deque(maxlen=LATENCY_SAMPLE_SIZE)
+        self._counters = {'submitted': 0, 'completed': 0, 'failed': 0, 'cache_hits': 0}
+        self._lock = threading.Lock()
+
+    def submit(self, order_id, kind, key, filename, order_data, database_url=None):
+        """
+        إضافة مهمة - Submit a render job, reusing the cache or an in-flight job
+
+        database_url لطلبات Excel الكبيرة: order_data بدون أصناف، وعملية
+        التوليد تقرأ الأصناف من قاعدة البيانات بنفسها.
+        """
+        with self._lock:
+            self._prune()
+            self._counters['submitted'] += 1
+
+            in_flight = self._in_flight.get((kind, key))
+            if in_flight is not None:
+                return in_flight
+
+            job = DocumentJob(order_id, kind, key, filename)
+            self._jobs[job.id] = job
+
+            if self.cache.get(order_id, kind, key) is not None:
+                self._counters['cache_hits'] += 1
+                job.status = JOB_DONE
+                job.finished_at = job.submitted_at
+                return job
+
+            self._in_flight[(kind, key)] = job
+
+        tmp_path = self.cache.temp_path()
+        try:
+            if database_url is not None:
+                future = get_renderer().submit(render_order_excel_file, database_url, order_id, order_data, tmp_path)
+            else:
+                future = get_renderer().submit(render_document_file, kind, order_data, tmp_path)
+        except RendererBusy:
+            # الطابور ممتلئ: المهمة لا تُسجّل والعميل يعيد المحاولة (503)
+            self.cache.discard(tmp_path)
+            with self._lock:
+                self._jobs.pop(job.id, None)
+                self._in_flight.pop((kind, key), None)
+            raise
+        except Exception as e:
+            self.cache.discard(tmp_path)
+            self._fail(job, e)
+            return job
+
+        job.future = future
+        future.add_done_callback(lambda future: self._finish(job, tmp_path, future))
+        return job
+
+    def _finish(self, job, tmp_path, future):
+        """نقل الملف للذاكرة وتسجيل النتيجة - Publish the file and record the outcome"""
+        # future.exception() يرفع CancelledError للمهمة الملغاة (مثلاً عند إيقاف الخدمة)
+        if future.cancelled():
+            error = 'أُلغيت مهمة التوليد قبل انتهائها'
+        else:
+            error = future.exception()
+        if error is None:
+            try:
+                self.cache.commit(job.order_id, job.kind, job.key, tmp_path)
+            except OSError as e:
+                error = e
+        if error is not None:
+            self.cache.discard(tmp_path)
+            self._fail(job, error)
+            return
+
+        with self._lock:
+            job.finished_at = time.time()
+            job.status = JOB_DONE
+            self._counters['completed'] += 1
+            self._latencies.append(job.finished_at - job.submitted_at)
+            self._in_flight.pop((job.kind, job.key), None)
+
+    def _fail(self, job, error):
+        """تسجيل فشل مهمة - Record a failed job"""
+        with self._lock:
+            job.finished_at = time.time()
+            job.status = JOB_FAILED
+            job.error = str(error)
+            self._counters['failed'] += 1
+            self._in_flight.pop((job.kind, job.key), None)
+
+    def get(self, job_id):
+        """المهمة برقمها أو None - Job by id or None"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _prune(self):
+        """حذف المهام المنتهية القديمة - Forget finished jobs past the retention window"""
+        cutoff = time.time() - JOB_RETENTION_SECONDS
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished_at is not None and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def stats(self):
+        """مؤشرات الطابور للمراقبة - Queue depth and job latency"""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            pending = list(self._in_flight.values())
+            counters = dict(self._counters)
+
+        running = sum(1 for job in pending if job.current_status == JOB_RUNNING)
+        stats = {
+            'queue_depth': len(pending),
+            'queued': len(pending) - running,
+            'running': running,
+        }
+        stats.update(counters)
+
+        if latencies:
+            stats['latency_ms'] = {
+                'samples': len(latencies),
+                'avg': round(sum(latencies) / len(latencies) * 1000, 1),
+                'p50': round(latencies[len(latencies) // 2] * 1000, 1),
+                'p95': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 1),
+                'max': round(latencies[-1] * 1000, 1),
+            }
+        return stats
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+ترحيلات مخطط قاعدة البيانات
+Versioned database schema migrations
+
+db.create_all() ينشئ الجداول الجديدة فقط ولا يعدّل قاعدة بيانات موجودة،
+لذلك كل تعديل على المخطط (فهارس، جداول مساعدة، تحويل بيانات) يُضاف هنا
+كترحيل برقم إصدار، ويُطبّق مرة واحدة عند بدء التشغيل من init_database.
+"""
+
+from sqlalchemy import text
+from models import db
+from search_index import create_search_index, reset_search_index_state
+from reports import rebuild_reports
+from money import (line_total, tax_for, to_minor_units, from_minor_units,
+                   DEFAULT_TAX_RATE)
+from datetime import datetime
+
+
+def _add_order_indexes(conn):
+    """فهارس فلاتر الطلبات - Indexes for the hot order filters and sorts"""
+    statements = [
+        # الترتيب الافتراضي لصفحة الطلبات + مؤشر keyset
+        'CREATE INDEX IF NOT EXISTS ix_orders_created_at_id ON orders (created_at, id)',
+        # فلترة الحالة مع نفس الترتيب
+        'CREATE INDEX IF NOT EXISTS ix_orders_status_created_at ON orders (status, created_at, id)',
+        # طلبات مورد معين
+        'CREATE INDEX IF NOT EXISTS ix_orders_supplier_created_at ON orders (supplier_id, created_at)',
+        # ترتيب وبحث الموردين بالاسم
+        'CREATE INDEX IF NOT EXISTS ix_suppliers_name ON suppliers (name)',
+        # تحميل أصناف الطلبات (selectinload ... WHERE order_id IN)
+        'CREATE INDEX IF NOT EXISTS ix_order_items_order_id ON order_items (order_id, item_order)',
+    ]
+    for statement in statements:
+        conn.execute(text(statement))
+
+
+# أعمدة المبالغ التي تحولت من float إلى قروش (أعداد صحيحة)
+MONEY_COLUMNS = {
+    'orders': ('subtotal', 'tax_amount', 'total'),
+    'order_items': ('unit_price', 'total_price'),
+}
+
+
+def _convert_money_to_minor_units(conn):
+    """
+    تحويل المبالغ إلى قروش - Convert float amounts to integer minor units
+
+    SQLite لا يغيّر نوع عمود موجود، فالقيم نفسها تُحوّل (القيم الصحيحة في عمود
+    REAL تُقرأ بدقة تامة حتى 2^53). باقي قواعد البيانات يتغير نوع العمود.
+    بعد التحويل يُعاد حساب إجماليات الأصناف والطلبات بقواعد التقريب في money.py
+    بدلاً من الاحتفاظ بانحرافات float القديمة.
+    """
+    for table, columns in MONEY_COLUMNS.items():
+        for column in columns:
+            if conn.dialect.name == 'sqlite':
+                conn.execute(text(
+                    f'UPDATE {table} SET {column} = CAST(ROUND({column} * 100) AS INTEGER) '
+                    f'WHERE {column} IS NOT NULL'
+                ))
+            else:
+                conn.execute(text(
+                    f'ALTER TABLE {table} ALTER COLUMN {column} TYPE BIGINT '
+                    f'USING ROUND({column} * 100)'
+                ))
+
+    item_updates = []
+    for item_id, quantity, unit_price, total_price in conn.execute(text(
+        'SELECT id, quantity, unit_price, total_price FROM order_items'
+    )):
+        expected = to_minor_units(line_total(quantity, from_minor_units(unit_price or 0)))
+        if expected != total_price:
+            item_updates.append({'id': item_id, 'total_price': expected})
+    if item_updates:
+        conn.execute(text('UPDATE order_items SET total_price = :total_price WHERE id = :id'), item_updates)
+
+    order_updates = []
+    for order_id, tax_rate, subtotal in conn.execute(text(
+        'SELECT o.id, o.tax_rate, COALESCE(SUM(i.total_price), 0) FROM orders o '
+        'LEFT JOIN order_items i ON i.order_id = o.id GROUP BY o.id, o.tax_rate'
+    )):
+        subtotal = from_minor_units(subtotal)
+        tax_amount = tax_for(subtotal, tax_rate if tax_rate is not None else DEFAULT_TAX_RATE)
+        order_updates.append({
+            'id': order_id,
+            'subtotal': to_minor_units(subtotal),
+            'tax_amount': to_minor_units(tax_amount),
+            'total': to_minor_units(subtotal + tax_amount),
+        })
+    if order_updates:
+        conn.execute(text(
+            'UPDATE orders SET subtotal = :subtotal, tax_amount = :tax_amount, total = :total '
+            'WHERE id = :id'
+        ), order_updates)
+
+
+# قائمة الترحيلات بالترتيب: (رقم الإصدار، الوصف، الدالة)
+# لا تعدّل ترحيلاً تم نشره؛ أضف ترحيلاً جديداً برقم أكبر
+MIGRATIONS = [
+    (1, 'order filter indexes', _add_order_indexes),
+    (2, 'order full-text search index', create_search_index),
+    (3, 'money columns to minor units', _convert_money_to_minor_units),
+    (4, 'reporting summary tables backfill', rebuild_reports),
+]
+
+
+def get_applied_versions(conn):
+    """إصدارات الترحيل المطبقة - Set of applied migration versions"""
+    conn.execute(text(
+        'CREATE TABLE IF NOT EXISTS schema_migrations ('
+        'version INTEGER PRIMARY KEY, '
+        'name VARCHAR(200) NOT NULL, '
+        'applied_at TIMESTAMP NOT NULL)'
+    ))
+    rows = conn.execute(text('SELECT version FROM schema_migrations'))
+    return {row[0] for row in rows}
+
+
+def apply_migrations():
+    """
+    تطبيق الترحيلات غير المطبقة - Apply pending migrations
+
+    كل ترحيل يعمل داخل معاملة مستقلة مع تسجيل رقمه، فإذا فشل
+    لا يُسجّل ويُعاد تطبيقه عند التشغيل التالي.
+    """
+    reset_search_index_state()
+    with db.engine.begin() as conn:
+        applied = get_applied_versions(conn)
+
+    for version, name, migrate in MIGRATIONS:
+        if version in applied:
+            continue
+        with db.engine.begin() as conn:
+            migrate(conn)
+            conn.execute(
+                text('INSERT INTO schema_migrations (version, name, applied_at) '
+                     'VALUES (:version, :name, :applied_at)'),
+                {'version': version, 'name': name, 'applied_at': datetime.utcnow()}
+            )
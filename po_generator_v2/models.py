@@ -5,6 +5,7 @@ Database models for Purchase Order System
 """
 
 from flask_sqlalchemy import SQLAlchemy
+from money import Money, to_float
 from datetime import datetime
 
 db = SQLAlchemy()
@@ -13,6 +14,9 @@ db = SQLAlchemy()
 class Supplier(db.Model):
     """موديل الموردين - Suppliers Model"""
     __tablename__ = 'suppliers'
+    __table_args__ = (
+        db.Index('ix_suppliers_name', 'name'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), nullable=False)
@@ -62,6 +66,12 @@ class Product(db.Model):
 class Order(db.Model):
     """موديل الطلبات - Orders Model"""
     __tablename__ = 'orders'
+    # الفهارس تُنشأ أيضاً لقواعد البيانات القديمة عبر migrations.py
+    __table_args__ = (
+        db.Index('ix_orders_created_at_id', 'created_at', 'id'),
+        db.Index('ix_orders_status_created_at', 'status', 'created_at', 'id'),
+        db.Index('ix_orders_supplier_created_at', 'supplier_id', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     po_number = db.Column(db.String(50), unique=True, nullable=False)
@@ -80,10 +90,10 @@ class Order(db.Model):
     payment_terms = db.Column(db.Text)
     notes = db.Column(db.Text)
     
-    # الإجماليات - Totals
-    subtotal = db.Column(db.Float, default=0.0)
-    tax_amount = db.Column(db.Float, default=0.0)
-    total = db.Column(db.Float, default=0.0)
+    # الإجماليات بالقروش - Totals, stored as integer minor units
+    subtotal = db.Column(Money, default=0)
+    tax_amount = db.Column(Money, default=0)
+    total = db.Column(Money, default=0)
     tax_rate = db.Column(db.Float, default=14.0)  # نسبة ضريبة القيمة المضافة
     
     # حالة الطلب - Order Status
@@ -95,9 +105,13 @@ class Order(db.Model):
     # علاقات - Relationships
     items = db.relationship('OrderItem', backref='order', lazy=True, cascade='all, delete-orphan')
     
-    def to_dict(self):
-        """تحويل الموديل إلى قاموس - Convert model to dictionary"""
-        return {
+    def to_dict(self, include_items=True):
+        """
+        تحويل الموديل إلى قاموس - Convert model to dictionary
+        
+        include_items=False يتجنب تحميل الأصناف (للتصدير المتدفق للطلبات الكبيرة)
+        """
+        data = {
             'id': self.id,
             'po_number': self.po_number,
             'po_date': self.po_date.strftime('%Y-%m-%d'),
@@ -108,18 +122,23 @@ class Order(db.Model):
             'delivery_location': self.delivery_location,
             'payment_terms': self.payment_terms,
             'notes': self.notes,
-            'subtotal': self.subtotal,
-            'tax_amount': self.tax_amount,
-            'total': self.total,
+            'subtotal': to_float(self.subtotal),
+            'tax_amount': to_float(self.tax_amount),
+            'total': to_float(self.total),
             'tax_rate': self.tax_rate,
-            'status': self.status,
-            'items': [item.to_dict() for item in self.items]
+            'status': self.status
         }
+        if include_items:
+            data['items'] = [item.to_dict() for item in self.items]
+        return data
 
 
 class OrderItem(db.Model):
     """موديل أصناف الطلب - Order Items Model"""
     __tablename__ = 'order_items'
+    __table_args__ = (
+        db.Index('ix_order_items_order_id', 'order_id', 'item_order'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=False)
@@ -129,8 +148,8 @@ class OrderItem(db.Model):
     product_name = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text)
     quantity = db.Column(db.Float, nullable=False)
-    unit_price = db.Column(db.Float, nullable=False)
-    total_price = db.Column(db.Float, nullable=False)
+    unit_price = db.Column(Money, nullable=False)
+    total_price = db.Column(Money, nullable=False)
     
     item_order = db.Column(db.Integer)  # ترتيب الصنف في الطلب
     
@@ -142,6 +161,96 @@ class OrderItem(db.Model):
             'product_name': self.product_name,
             'description': self.description,
             'quantity': self.quantity,
-            'unit_price': self.unit_price,
-            'total_price': self.total_price
+            'unit_price': to_float(self.unit_price),
+            'total_price': to_float(self.total_price)
         }
+
+
+class POSequence(db.Model):
+    """عداد أرقام الطلبات لكل سنة - Per-year PO number counter"""
+    __tablename__ = 'po_sequences'
+    
+    year = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    last_value = db.Column(db.Integer, nullable=False, default=0)
+
+
+class POReservation(db.Model):
+    """أرقام طلبات محجوزة لنماذج لم تُرسل بعد - PO numbers reserved by open forms"""
+    __tablename__ = 'po_reservations'
+    __table_args__ = (
+        db.Index('ix_po_reservations_year_expires_at', 'year', 'expires_at'),
+    )
+    
+    po_number = db.Column(db.String(50), primary_key=True)
+    year = db.Column(db.Integer, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+
+class ReferenceVersion(db.Model):
+    """
+    رقم إصدار بيانات مرجعية (الموردون، الأصناف) - Change counter per reference list
+
+    يزيد مع كل إضافة داخل نفس المعاملة؛ يُستخدم كـ ETag وللتحقق من صلاحية
+    النسخ المحفوظة في ذاكرة كل عملية.
+    """
+    __tablename__ = 'reference_versions'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+
+class SupplierMonthReport(db.Model):
+    """
+    ملخص المشتريات لكل مورد وشهر وحالة - Spend per supplier / month / status
+
+    يُحدّث تدريجياً من reports.py عند إضافة أو حذف طلب.
+    supplier_id = 0 للطلبات بدون مورد.
+    """
+    __tablename__ = 'report_supplier_month'
+    
+    supplier_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    month = db.Column(db.String(7), primary_key=True)  # YYYY-MM
+    status = db.Column(db.String(50), primary_key=True)
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+    subtotal = db.Column(Money, nullable=False, default=0)
+    tax_amount = db.Column(Money, nullable=False, default=0)
+    total = db.Column(Money, nullable=False, default=0)
+
+
+class ProductMonthReport(db.Model):
+    """
+    ملخص الأصناف لكل شهر - Quantity and value per product / month
+
+    product_key هو كود الصنف، أو اسمه إذا لم يكن له كود.
+    """
+    __tablename__ = 'report_product_month'
+    
+    product_key = db.Column(db.String(200), primary_key=True)
+    month = db.Column(db.String(7), primary_key=True)  # YYYY-MM
+    product_code = db.Column(db.String(100))
+    product_name = db.Column(db.String(200), nullable=False)
+    line_count = db.Column(db.Integer, nullable=False, default=0)
+    quantity = db.Column(db.Float, nullable=False, default=0.0)
+    value = db.Column(Money, nullable=False, default=0)
+
+
+def collect_touched_orders(session):
+    """
+    الطلبات المتأثرة بالـ flush الحالي - Order ids touched by the current flush
+    
+    يرجع (أرقام الطلبات، أرقام الموردين المعدلين) لمستمعي after_flush
+    مثل فهرس البحث وذاكرة الملفات المولدة.
+    """
+    order_ids = set()
+    supplier_ids = set()
+    
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Order):
+            order_ids.add(obj.id)
+        elif isinstance(obj, OrderItem):
+            order_ids.add(obj.order_id)
+        elif isinstance(obj, Supplier) and obj not in session.new:
+            supplier_ids.add(obj.id)
+    
+    order_ids.discard(None)
+    return order_ids, supplier_ids
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+حسابات المبالغ بدقة ثابتة
+Exact fixed-point money arithmetic
+
+المبالغ تُخزن في قاعدة البيانات كأعداد صحيحة بالقرش (1 جنيه = 100 قرش)
+وتُحسب في Python بـ Decimal، فلا يحدث انحراف بالقروش كما مع float،
+ويمكن جمعها في التقارير بـ SUM مباشرة في SQL.
+
+قواعد التقريب (ROUND_HALF_UP لأقرب قرش):
+- إجمالي الصنف = الكمية × السعر، مقرب
+- المجموع الفرعي = مجموع إجماليات الأصناف المقربة
+- الضريبة = المجموع الفرعي × النسبة / 100، مقربة
+- الإجمالي = المجموع الفرعي + الضريبة
+"""
+
+import math
+from collections import namedtuple
+from decimal import Decimal, ROUND_HALF_UP
+from sqlalchemy.types import BigInteger, TypeDecorator
+
+# عدد الخانات العشرية للعملة - Currency decimal places
+MINOR_UNIT_DIGITS = 2
+MINOR_UNITS = 10 ** MINOR_UNIT_DIGITS
+
+CENT = Decimal(1).scaleb(-MINOR_UNIT_DIGITS)
+ZERO = Decimal(0).quantize(CENT)
+
+DEFAULT_TAX_RATE = 14
+
+OrderTotals = namedtuple('OrderTotals', ['line_totals', 'subtotal', 'tax_amount', 'total'])
+
+
+def to_decimal(value):
+    """
+    تحويل قيمة إلى Decimal - Convert a number or numeric string to Decimal
+
+    float يُحوّل عبر str حتى تُقرأ 0.1 كما كُتبت وليس 0.1000000000000000055...
+    """
+    if value is None or value == '':
+        return Decimal(0)
+    if isinstance(value, Decimal):
+        return value
+    if isinstance(value, float):
+        return Decimal(repr(value))
+    return Decimal(str(value).strip())
+
+
+def parse_amount(value, field_name, default=None):
+    """
+    قراءة كمية أو سعر من المدخلات - Validate a non-negative finite number from user input
+
+    يرفع ValueError برسالة عربية باسم الحقل (nan و inf والنصوص والسالب مرفوضة).
+    """
+    if value in (None, ''):
+        if default is None:
+            raise ValueError(f'{field_name} مطلوب')
+        return default
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{field_name} غير صالح: {value}')
+    if not math.isfinite(number):
+        raise ValueError(f'{field_name} غير صالح: {value}')
+    if number < 0:
+        raise ValueError(f'{field_name} لا يمكن أن يكون سالباً')
+    return number
+
+
+def round_money(value):
+    """تقريب لأقرب قرش - Round half up to the currency's minor unit"""
+    return to_decimal(value).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def to_minor_units(value):
+    """جنيه إلى قروش - Amount to integer minor units"""
+    return int(round_money(value) * MINOR_UNITS)
+
+
+def from_minor_units(value):
+    """قروش إلى جنيه - Integer minor units (e.g. a SQL SUM) to an amount"""
+    if value is None:
+        return None
+    return (Decimal(int(value)) / MINOR_UNITS).quantize(CENT)
+
+
+def to_float(value):
+    """مبلغ إلى float للـ JSON - Amount as float for JSON / spreadsheets"""
+    return float(value) if value is not None else None
+
+
+def line_total(quantity, unit_price):
+    """إجمالي صنف - Rounded quantity × unit price"""
+    return round_money(to_decimal(quantity) * to_decimal(unit_price))
+
+
+def tax_for(subtotal, tax_rate):
+    """الضريبة على مجموع فرعي - Rounded tax at tax_rate percent"""
+    return round_money(to_decimal(subtotal) * to_decimal(tax_rate) / 100)
+
+
+def calculate_totals(items, tax_rate=DEFAULT_TAX_RATE):
+    """
+    إجماليات الطلب - Totals for a list of items in one pass
+
+    items: قواميس أو كائنات فيها quantity و unit_price.
+    """
+    line_totals = []
+    subtotal = ZERO
+    for item in items:
+        if isinstance(item, dict):
+            quantity, unit_price = item.get('quantity', 0), item.get('unit_price', 0)
+        else:
+            quantity, unit_price = item.quantity, item.unit_price
+        amount = line_total(quantity, unit_price)
+        line_totals.append(amount)
+        subtotal += amount
+
+    tax_amount = tax_for(subtotal, tax_rate)
+    return OrderTotals(line_totals, subtotal, tax_amount, subtotal + tax_amount)
+
+
+class Money(TypeDecorator):
+    """
+    عمود مبلغ بالقروش - Money column stored as integer minor units
+
+    يقبل Decimal أو float أو int أو نص ويرجع Decimal بخانتين عشريتين.
+    """
+    impl = BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return to_minor_units(value)
+
+    def process_result_value(self, value, dialect):
+        return from_minor_units(value)
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+شكل بيانات الطلب الموحد لمولدات الملفات
+Render input schema shared by every document generator
+
+كل المولدات (excel_template و excel_generator و pdf_generator) تقرأ نفس
+القاموس، وهو شكل Order.to_dict:
+
+    po_number, po_date, company_tax_id, company_commercial_reg, tax_rate,
+    supplier: {name, tax_id, phone, email, address},
+    items: [{product_code, product_name, description, quantity,
+             unit_price, total_price}],
+    delivery_period, delivery_location, payment_terms, notes
+
+أي مصدر آخر للبيانات يُحوّل إلى هذا الشكل بمحوّل هنا بدل مولد خاص به،
+فيبقى مسار توليد واحد تُحسّن سرعته مرة واحدة.
+"""
+
+from money import DEFAULT_TAX_RATE, line_total, to_float
+
+# النص بعد مدة التوريد بالأيام في الواجهة القديمة
+DELIVERY_DAYS_SUFFIX = 'يوم من تاريخ الطلب'
+
+
+def _text(value):
+    return '' if value is None else str(value).strip()
+
+
+def _delivery_period(value):
+    """الواجهة القديمة ترسل عدد الأيام فقط - Legacy form sends a bare day count"""
+    text = _text(value)
+    return f'{text} {DELIVERY_DAYS_SUFFIX}' if text.isdigit() else text
+
+
+def _legacy_item(item):
+    quantity = item.get('quantity') or 0
+    unit_price = item.get('price') or 0
+    return {
+        'product_code': _text(item.get('code')),
+        'product_name': _text(item.get('name')),
+        'description': _text(item.get('description')),
+        'quantity': quantity,
+        'unit_price': unit_price,
+        'total_price': to_float(line_total(quantity, unit_price)),
+    }
+
+
+def from_legacy_payload(data):
+    """
+    تحويل طلب الواجهة القديمة - Adapt the legacy /generate JSON (camelCase) to the schema
+
+    الواجهة القديمة (po_generator_app.py) ترسل poNumber و supplierName...
+    والضريبة فيها ثابتة 14%.
+    """
+    return {
+        'po_number': _text(data.get('poNumber')),
+        'po_date': _text(data.get('poDate')),
+        'company_tax_id': _text(data.get('companyTaxId')),
+        'company_commercial_reg': _text(data.get('commercialReg')),
+        'supplier': {
+            'name': _text(data.get('supplierName')),
+            'tax_id': _text(data.get('supplierTaxId')),
+            'phone': _text(data.get('supplierPhone')),
+            'email': _text(data.get('supplierEmail')),
+            'address': _text(data.get('supplierAddress')),
+        },
+        'items': [_legacy_item(item) for item in data.get('items') or []],
+        'tax_rate': DEFAULT_TAX_RATE,
+        'delivery_period': _delivery_period(data.get('deliveryPeriod')),
+        'delivery_location': _text(data.get('deliveryLocation')),
+        'payment_terms': _text(data.get('paymentTerms')),
+        'notes': _text(data.get('notes')),
+    }
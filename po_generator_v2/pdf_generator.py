@@ -7,52 +7,179 @@ PDF Generator with Arabic Support
 from reportlab.lib.pagesizes import A4
 from reportlab.lib import colors
 from reportlab.lib.units import mm
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak, Flowable
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen.canvas import Canvas
 from reportlab.lib.enums import TA_RIGHT, TA_CENTER
 from arabic_reshaper import reshape
 from bidi.algorithm import get_display
+from bisect import bisect_right
+from functools import lru_cache
+from money import ZERO, DEFAULT_TAX_RATE, round_money, tax_for
 import io
 import os
+import threading
 
-# Register Arabic fonts
+# إصدار شكل الملف؛ يُزاد عند أي تغيير في التخطيط أو التنسيق حتى تُلغى الملفات المخزنة
+# Output format version; bump on any layout/style change to invalidate cached documents
+GENERATOR_VERSION = 5
+
+# Arabic fonts, registered on first use (ensure_fonts_registered)
 FONTS_DIR = os.path.join(os.path.dirname(__file__), 'fonts')
 ARABIC_FONT_REGULAR = os.path.join(FONTS_DIR, 'NotoSansArabic-Regular.ttf')
 ARABIC_FONT_BOLD = os.path.join(FONTS_DIR, 'NotoSansArabic-Bold.ttf')
 
-# Verify font files exist before registering
-if not os.path.exists(ARABIC_FONT_REGULAR):
-    raise FileNotFoundError(f"Arabic regular font not found: {ARABIC_FONT_REGULAR}")
-if not os.path.exists(ARABIC_FONT_BOLD):
-    raise FileNotFoundError(f"Arabic bold font not found: {ARABIC_FONT_BOLD}")
+_fonts_registered = False
+_fonts_lock = threading.Lock()
+
+
+def ensure_fonts_registered():
+    """
+    تسجيل الخطوط العربية عند أول استخدام - Register the Arabic fonts once per process
+
+    تحليل ملفات TTF لا يتم عند استيراد الملف، بل قبل أول مستند فقط،
+    وبقفل حتى لا يسجلها خيطان معاً.
+    """
+    global _fonts_registered
+    if _fonts_registered:
+        return
+    with _fonts_lock:
+        if _fonts_registered:
+            return
+
+        # Verify font files exist before registering
+        if not os.path.exists(ARABIC_FONT_REGULAR):
+            raise FileNotFoundError(f"Arabic regular font not found: {ARABIC_FONT_REGULAR}")
+        if not os.path.exists(ARABIC_FONT_BOLD):
+            raise FileNotFoundError(f"Arabic bold font not found: {ARABIC_FONT_BOLD}")
+
+        pdfmetrics.registerFont(TTFont('ArabicFont', ARABIC_FONT_REGULAR))
+        pdfmetrics.registerFont(TTFont('ArabicFont-Bold', ARABIC_FONT_BOLD))
+        _fonts_registered = True
+
+# كائنات TTFont مشتركة بين الخيوط وتضمين الخط (subsetting) فيها غير آمن
+# مع التوازي؛ بناء المستندات داخل نفس العملية يتم واحداً تلو الآخر.
+# Shared TTFont objects are not thread-safe while subsetting on save
+_build_lock = threading.Lock()
+
 
-pdfmetrics.registerFont(TTFont('ArabicFont', ARABIC_FONT_REGULAR))
-pdfmetrics.registerFont(TTFont('ArabicFont-Bold', ARABIC_FONT_BOLD))
+# عدد النصوص المشكّلة المحفوظة (أسماء الأصناف والموردين تتكرر كثيراً بين الطلبات)
+# Bounded number of shaped strings kept in memory
+SHAPING_CACHE_SIZE = 4096
+
+
+def _shape(text):
+    """تشكيل النص وترتيبه للعرض - Reshape and reorder a string (uncached)"""
+    return get_display(reshape(text))
+
+
+_shape_cached = lru_cache(maxsize=SHAPING_CACHE_SIZE)(_shape)
 
 
 def prepare_arabic_text(text):
     """
     تحضير النص العربي للعرض الصحيح في PDF
     Prepare Arabic text for correct display in PDF
+
+    التشكيل مكلف (عدة ملي ثانية للنص)، لذلك النتائج محفوظة في ذاكرة LRU محدودة.
     """
     if not text:
         return ''
-    reshaped_text = reshape(str(text))
-    bidi_text = get_display(reshaped_text)
-    return bidi_text
+    return _shape_cached(str(text))
 
 
-def create_pdf_from_order(order_data):
+def shaping_cache_stats():
+    """إحصائيات ذاكرة التشكيل للمراقبة - Shaping cache counters for monitoring"""
+    info = _shape_cached.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        'hits': info.hits,
+        'misses': info.misses,
+        'size': info.currsize,
+        'max_size': info.maxsize,
+        'hit_rate': round(info.hits / lookups, 4) if lookups else 0.0,
+    }
+
+
+# === النصوص الثابتة - Static labels (تُشكّل عند أول استخدام وتبقى في ذاكرة التشكيل) ===
+COMPANY_NAME = 'شركة الأمانة للتوريدات العامة'
+PO_TITLE = 'طلب توريد - Purchase Order'
+LABEL_PO_NUMBER = 'رقم الطلب:'
+LABEL_DATE = 'التاريخ:'
+LABEL_TAX_ID = 'الرقم الضريبي:'
+LABEL_COMMERCIAL_REG = 'السجل التجاري:'
+SUPPLIER_HEADER = 'بيانات المورد - Supplier Information'
+LABEL_SUPPLIER_NAME = 'اسم المورد:'
+LABEL_PHONE = 'التليفون:'
+LABEL_EMAIL = 'البريد الإلكتروني:'
+LABEL_ADDRESS = 'العنوان:'
+ITEMS_HEADER = 'أصناف الطلب - Order Items'
+ITEM_TABLE_HEADERS = ('م', 'كود الصنف', 'اسم الصنف', 'الكمية', 'السعر', 'الإجمالي')
+LABEL_BROUGHT_FORWARD = 'المجموع المنقول من الصفحة السابقة:'
+LABEL_CARRIED_FORWARD = 'المجموع المنقول للصفحة التالية:'
+LABEL_SUBTOTAL = 'المجموع الفرعي (قبل الضريبة):'
+LABEL_FINAL_TOTAL = 'الإجمالي النهائي (شامل الضريبة):'
+TERMS_HEADER = 'شروط التوريد - Delivery Terms'
+LABEL_DELIVERY_PERIOD = 'مدة التوريد:'
+LABEL_DELIVERY_LOCATION = 'مكان التسليم:'
+LABEL_PAYMENT_TERMS = 'شروط الدفع:'
+NOTES_HEADER = 'ملاحظات - Notes'
+SUPPLIER_SIGNATURE = 'توقيع المورد\n___________________'
+COMPANY_SIGNATURE = 'توقيع الشركة\n___________________'
+LABEL_PAGE = 'صفحة'
+LABEL_PAGE_OF = 'من'
+
+STATIC_TEXTS = (
+    COMPANY_NAME,
+    PO_TITLE,
+    LABEL_PO_NUMBER,
+    LABEL_DATE,
+    LABEL_TAX_ID,
+    LABEL_COMMERCIAL_REG,
+    SUPPLIER_HEADER,
+    LABEL_SUPPLIER_NAME,
+    LABEL_PHONE,
+    LABEL_EMAIL,
+    LABEL_ADDRESS,
+    ITEMS_HEADER,
+    *ITEM_TABLE_HEADERS,
+    LABEL_BROUGHT_FORWARD,
+    LABEL_CARRIED_FORWARD,
+    LABEL_SUBTOTAL,
+    LABEL_FINAL_TOTAL,
+    TERMS_HEADER,
+    LABEL_DELIVERY_PERIOD,
+    LABEL_DELIVERY_LOCATION,
+    LABEL_PAYMENT_TERMS,
+    NOTES_HEADER,
+    SUPPLIER_SIGNATURE,
+    COMPANY_SIGNATURE,
+    LABEL_PAGE,
+    LABEL_PAGE_OF,
+)
+
+
+def preload_pdf_resources():
     """
-    إنشاء ملف PDF من بيانات الطلب
-    Create PDF from order data
+    تجهيز الخطوط والنصوص والأقسام الثابتة مسبقاً - Register fonts, shape labels, build static sections
+
+    تُستدعى مرة في كل عملية توليد من renderer.warm_worker (initializer الـ
+    ProcessPoolExecutor). العمليات تُنشأ بـ spawn فلا ترث شيئاً من العملية الأم،
+    لذلك تُجهَّز الموارد هناك قبل أول مهمة لا في الخادم.
     """
-    buffer = io.BytesIO()
-    
-    # إعداد المستند
-    doc = SimpleDocTemplate(
+    ensure_fonts_registered()
+    for text in STATIC_TEXTS:
+        prepare_arabic_text(text)
+    for block in STATIC_BLOCKS:
+        block.flowables()
+
+
+def _create_document(buffer):
+    """إعداد المستند - A4 document with the standard margins"""
+    ensure_fonts_registered()
+    return SimpleDocTemplate(
         buffer,
         pagesize=A4,
         rightMargin=20*mm,
@@ -60,132 +187,535 @@ def create_pdf_from_order(order_data):
         topMargin=20*mm,
         bottomMargin=20*mm
     )
-    
+
+# === الأنماط - Styles (تُنشأ مرة عند الاستيراد وتُشارك بين كل المستندات) ===
+_SAMPLE_STYLES = getSampleStyleSheet()
+
+# نمط العنوان الرئيسي
+TITLE_STYLE = ParagraphStyle(
+    'ArabicTitle',
+    parent=_SAMPLE_STYLES['Heading1'],
+    fontName='ArabicFont-Bold',
+    fontSize=20,
+    textColor=colors.HexColor('#2B3E50'),
+    alignment=TA_CENTER,
+    spaceAfter=10
+)
+
+# نمط العنوان الفرعي
+SUBTITLE_STYLE = ParagraphStyle(
+    'ArabicSubtitle',
+    parent=_SAMPLE_STYLES['Heading2'],
+    fontName='ArabicFont-Bold',
+    fontSize=16,
+    textColor=colors.HexColor('#2B3E50'),
+    alignment=TA_CENTER,
+    spaceAfter=15
+)
+
+# عرض الأعمدة - Column widths
+INFO_COLUMN_WIDTHS = [40*mm, 45*mm, 40*mm, 45*mm]
+ITEM_COLUMN_WIDTHS = [15*mm, 25*mm, 60*mm, 20*mm, 25*mm, 25*mm]
+TOTALS_COLUMN_WIDTHS = [120*mm, 50*mm]
+TERMS_COLUMN_WIDTHS = [40*mm, 130*mm]
+NOTES_COLUMN_WIDTHS = [170*mm]
+SIGNATURE_COLUMN_WIDTHS = [85*mm, 85*mm]
+
+BASIC_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#E8F0F8')),
+    ('BACKGROUND', (0, 1), (-1, 1), colors.HexColor('#E8F0F8')),
+    ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+    ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
+    ('FONTNAME', (0, 0), (-1, -1), 'ArabicFont'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('FONTNAME', (0, 0), (0, -1), 'ArabicFont-Bold'),
+    ('FONTNAME', (2, 0), (2, -1), 'ArabicFont-Bold'),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+    ('TOPPADDING', (0, 0), (-1, -1), 8),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.grey)
+])
+
+SUPPLIER_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#F2F2F2')),
+    ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+    ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
+    ('FONTNAME', (0, 0), (-1, -1), 'ArabicFont'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('FONTNAME', (0, 0), (0, -1), 'ArabicFont-Bold'),
+    ('FONTNAME', (2, 0), (2, 1), 'ArabicFont-Bold'),
+    ('SPAN', (1, 2), (3, 2)),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+    ('TOPPADDING', (0, 0), (-1, -1), 8),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.grey)
+])
+
+ITEMS_TABLE_STYLE = TableStyle([
+    # رأس الجدول
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2B3E50')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+    ('FONTNAME', (0, 0), (-1, 0), 'ArabicFont-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 11),
+    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+    # البيانات
+    ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+    ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
+    ('FONTNAME', (0, 1), (-1, -1), 'ArabicFont'),
+    ('FONTSIZE', (0, 1), (-1, -1), 9),
+    ('ALIGN', (0, 1), (0, -1), 'CENTER'),  # رقم الصنف
+    ('ALIGN', (1, 1), (1, -1), 'CENTER'),  # الكود
+    ('ALIGN', (2, 1), (2, -1), 'RIGHT'),   # الاسم
+    ('ALIGN', (3, 1), (-1, -1), 'CENTER'), # الأرقام
+    # التنسيق العام
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+    ('TOPPADDING', (0, 0), (-1, -1), 6),
+    ('GRID', (0, 0), (-1, -1), 1, colors.grey),
+    # الصفوف المتبادلة تُضاف لكل صفحة في ItemsTable
+])
+
+TOTALS_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 1), colors.HexColor('#D9E2F3')),
+    ('BACKGROUND', (0, 2), (-1, 2), colors.HexColor('#2B3E50')),
+    ('TEXTCOLOR', (0, 0), (-1, 1), colors.black),
+    ('TEXTCOLOR', (0, 2), (-1, 2), colors.white),
+    ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
+    ('ALIGN', (1, 0), (1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, -1), 'ArabicFont-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 1), 10),
+    ('FONTSIZE', (0, 2), (-1, 2), 12),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+    ('TOPPADDING', (0, 0), (-1, -1), 8),
+    ('GRID', (0, 0), (-1, -1), 1, colors.grey)
+])
+
+TERMS_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#F2F2F2')),
+    ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+    ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
+    ('FONTNAME', (0, 0), (0, -1), 'ArabicFont-Bold'),
+    ('FONTNAME', (1, 0), (1, -1), 'ArabicFont'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+    ('TOPPADDING', (0, 0), (-1, -1), 8),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.grey)
+])
+
+NOTES_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#F9F9F9')),
+    ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+    ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
+    ('FONTNAME', (0, 0), (-1, -1), 'ArabicFont'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
+    ('TOPPADDING', (0, 0), (-1, -1), 10),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.grey)
+])
+
+SIGNATURES_TABLE_STYLE = TableStyle([
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, -1), 'ArabicFont-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 11),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
+    ('TOPPADDING', (0, 0), (-1, -1), 10)
+])
+
+
+# === الأقسام الثابتة - Static sections ===
+
+# هامش حول حدود الـ Form حتى لا تُقص خطوط الإطار وأطراف الحروف
+_FORM_PADDING = 5*mm
+
+
+class StaticBlock:
+    """
+    قسم ثابت لا يتغير بين الطلبات - A static section laid out once per process
+
+    build: دالة ترجع عناصر القسم (Paragraph / Table). العناصر تُبنى وتُقاس
+    (wrap) مرة واحدة لكل عرض متاح، بنفس المسافات التي يضعها الـ Frame بينها،
+    ثم تُرسم في كل مستند مرة واحدة كـ Form XObject يُعاد استخدامه.
+    """
+
+    def __init__(self, name, build):
+        self.name = name
+        self._build = build
+        self._flowables = None
+        self._layouts = {}
+        self._lock = threading.Lock()
+
+    def flowables(self):
+        """عناصر القسم (تُبنى عند أول استخدام) - The section's flowables, built once"""
+        if self._flowables is None:
+            with self._lock:
+                if self._flowables is None:
+                    self._flowables = self._build()
+        return self._flowables
+
+    def layout(self, avail_width):
+        """
+        قياس القسم - (positions, height) for an available width
+
+        positions: [(العنصر، x، y من أسفل القسم)].
+        """
+        cached = self._layouts.get(avail_width)
+        if cached is not None:
+            return cached
+
+        flowables = self.flowables()
+        with self._lock:
+            placed = []
+            top = 0
+            previous_space = None
+            for flowable in flowables:
+                width, height = flowable.wrap(avail_width, 1 << 20)
+                if previous_space is not None:
+                    # الـ Frame يدمج المسافة بعد العنصر السابق مع المسافة قبل التالي
+                    top += max(previous_space, flowable.getSpaceBefore())
+                offset = {'CENTER': (avail_width - width) / 2, 'CENTRE': (avail_width - width) / 2,
+                          'RIGHT': avail_width - width}.get(getattr(flowable, 'hAlign', 'LEFT'), 0)
+                placed.append((flowable, offset, top + height))
+                top += height
+                previous_space = flowable.getSpaceAfter()
+
+            positions = [(flowable, offset, top - bottom) for flowable, offset, bottom in placed]
+            cached = self._layouts[avail_width] = (positions, top)
+        return cached
+
+
+class StaticSection(Flowable):
+    """
+    رسم قسم ثابت داخل مستند - Draws a pre-laid-out StaticBlock
+
+    as_form=True للمستندات التي يتكرر فيها القسم (الملف المدمج): أول ظهور
+    يعرّف Form XObject وكل ظهور بعده يعيد استخدامه بأمر واحد. في ملف الطلب
+    الواحد يُرسم القسم مباشرة، لأن Form يُستخدم مرة واحدة يضيف كائناً مضغوطاً
+    زائداً للملف بدون فائدة.
+    """
+
+    def __init__(self, block, as_form=False):
+        super().__init__()
+        self.block = block
+        self.as_form = as_form
+        flowables = block.flowables()
+        self.spaceBefore = flowables[0].getSpaceBefore()
+        self.spaceAfter = flowables[-1].getSpaceAfter()
+        self._positions = ()
+
+    def wrap(self, availWidth, availHeight):
+        self._positions, height = self.block.layout(availWidth)
+        self.width = availWidth
+        self.height = height
+        return self.width, self.height
+
+    def draw(self):
+        if not self.as_form:
+            for flowable, x, y in self._positions:
+                flowable.drawOn(self.canv, x, y)
+            return
+
+        form_name = f'po_static_{self.block.name}_{int(self.width)}'
+        if not self.canv.hasForm(form_name):
+            self.canv.beginForm(form_name, -_FORM_PADDING, -_FORM_PADDING,
+                                self.width + _FORM_PADDING, self.height + _FORM_PADDING)
+            for flowable, x, y in self._positions:
+                flowable.drawOn(self.canv, x, y)
+            self.canv.endForm()
+        self.canv.doForm(form_name)
+
+
+def _heading(text):
+    """عنوان قسم - Section heading block"""
+    return lambda: [Paragraph(prepare_arabic_text(text), SUBTITLE_STYLE)]
+
+
+def _signatures():
+    table = Table([[prepare_arabic_text(SUPPLIER_SIGNATURE), prepare_arabic_text(COMPANY_SIGNATURE)]],
+                  colWidths=SIGNATURE_COLUMN_WIDTHS)
+    table.setStyle(SIGNATURES_TABLE_STYLE)
+    return [table]
+
+
+COMPANY_HEADER_BLOCK = StaticBlock('company_header', lambda: [
+    Paragraph(prepare_arabic_text(COMPANY_NAME), TITLE_STYLE),
+    Paragraph(prepare_arabic_text(PO_TITLE), SUBTITLE_STYLE),
+])
+SUPPLIER_HEADER_BLOCK = StaticBlock('supplier_header', _heading(SUPPLIER_HEADER))
+ITEMS_HEADER_BLOCK = StaticBlock('items_header', _heading(ITEMS_HEADER))
+TERMS_HEADER_BLOCK = StaticBlock('terms_header', _heading(TERMS_HEADER))
+NOTES_HEADER_BLOCK = StaticBlock('notes_header', _heading(NOTES_HEADER))
+SIGNATURES_BLOCK = StaticBlock('signatures', _signatures)
+
+STATIC_BLOCKS = (
+    COMPANY_HEADER_BLOCK,
+    SUPPLIER_HEADER_BLOCK,
+    ITEMS_HEADER_BLOCK,
+    TERMS_HEADER_BLOCK,
+    NOTES_HEADER_BLOCK,
+    SIGNATURES_BLOCK,
+)
+
+
+# === جدول الأصناف متعدد الصفحات - Multi-page items table ===
+
+# لون صفوف المجموع المنقول - Carried-forward rows background
+FORWARD_ROW_COLOR = colors.HexColor('#D9E2F3')
+ITEM_ROW_COLORS = (colors.white, colors.HexColor('#F2F2F2'))
+
+_item_metrics = None
+
+
+def _forward_row(label, amount):
+    """صف المجموع المنقول - Brought/carried forward row"""
+    return [prepare_arabic_text(label), '', '', '', '', f"{amount:,.2f}"]
+
+
+def _forward_row_style(row):
+    return [
+        ('SPAN', (0, row), (4, row)),
+        ('BACKGROUND', (0, row), (-1, row), FORWARD_ROW_COLOR),
+        ('FONTNAME', (0, row), (-1, row), 'ArabicFont-Bold'),
+        ('ALIGN', (0, row), (4, row), 'RIGHT'),
+    ]
+
+
+def _items_table_metrics():
+    """
+    ارتفاعات صفوف جدول الأصناف - (header, row, extra line, forward row) heights
+
+    تُقاس مرة واحدة من جدول صغير بنفس التنسيق، فيُعرف ارتفاع أي جزء من
+    الجدول بالجمع بدلاً من قياس الجدول كله.
+    """
+    global _item_metrics
+    if _item_metrics is None:
+        sample = Table([
+            [prepare_arabic_text(header) for header in ITEM_TABLE_HEADERS],
+            ['1', '', '', '', '', ''],
+            ['2', '', '\n', '', '', ''],
+            _forward_row(LABEL_CARRIED_FORWARD, 0),
+        ], colWidths=ITEM_COLUMN_WIDTHS)
+        sample.setStyle(ITEMS_TABLE_STYLE)
+        sample.setStyle(_forward_row_style(3))
+        sample.wrap(0, 0)
+        header, row, two_lines, forward = sample._rowHeights
+        _item_metrics = (header, row, two_lines - row, forward)
+    return _item_metrics
+
+
+class ItemsTable(Flowable):
+    """
+    جدول الأصناف مقسماً على الصفحات - Items table laid out one page at a time
+
+    بدلاً من جدول واحد يقيسه ReportLab كاملاً ثم يقسمه مرة بعد مرة، يُبنى
+    لكل صفحة جدول بحجمها فقط: رأس الجدول (repeatRows)، "المجموع المنقول من
+    الصفحة السابقة"، أصناف الصفحة، ثم "المجموع المنقول للصفحة التالية".
+    ارتفاعات الصفوف محسوبة مسبقاً كمجاميع تراكمية، فاختيار عدد صفوف الصفحة
+    bisect، وزمن التخطيط يزيد خطياً مع عدد الأصناف.
+
+    rows: صفوف الأصناف الجاهزة للعرض، running: المجموع بعد كل صف.
+    """
+
+    def __init__(self, header, rows, running, start=0, offsets=None):
+        super().__init__()
+        self.hAlign = 'CENTER'
+        self.header = header
+        self.rows = rows
+        self.running = running
+        self.start = start
+        self._offsets = offsets
+        self._table = None
+
+    def _row_offsets(self):
+        """المسافة من أول صف حتى بداية كل صف - Cumulative row heights"""
+        if self._offsets is None:
+            _, row, extra_line, _ = _items_table_metrics()
+            offsets = [0]
+            total = 0
+            for cells in self.rows:
+                lines = max(str(cell).count('\n') for cell in cells) + 1
+                total += row + (lines - 1) * extra_line
+                offsets.append(total)
+            self._offsets = offsets
+        return self._offsets
+
+    def _fixed_height(self, carried):
+        header, _, _, forward = _items_table_metrics()
+        return header + (forward if self.start else 0) + (forward if carried else 0)
+
+    def _page_table(self, end, carried):
+        """جدول أصناف صفحة واحدة - Table for rows[start:end]"""
+        data = [self.header]
+        style = []
+        if self.start:
+            style.extend(_forward_row_style(len(data)))
+            data.append(_forward_row(LABEL_BROUGHT_FORWARD, self.running[self.start - 1]))
+
+        first = len(data)
+        data.extend(self.rows[self.start:end])
+        if end > self.start:
+            # تبادل الألوان يكمل من الصفحة السابقة
+            shift = self.start % 2
+            style.append(('ROWBACKGROUNDS', (0, first), (-1, first + end - self.start - 1),
+                          list(ITEM_ROW_COLORS[shift:] + ITEM_ROW_COLORS[:shift])))
+
+        if carried:
+            style.extend(_forward_row_style(len(data)))
+            data.append(_forward_row(LABEL_CARRIED_FORWARD, self.running[end - 1]))
+
+        table = Table(data, colWidths=ITEM_COLUMN_WIDTHS, repeatRows=1)
+        table.setStyle(ITEMS_TABLE_STYLE)
+        table.setStyle(style)
+        return table
+
+    def wrap(self, availWidth, availHeight):
+        offsets = self._row_offsets()
+        self.width = sum(ITEM_COLUMN_WIDTHS)
+        self.height = self._fixed_height(False) + offsets[-1] - offsets[self.start]
+        return self.width, self.height
+
+    def split(self, availWidth, availHeight):
+        offsets = self._row_offsets()
+        space = availHeight - self._fixed_height(True)
+        end = bisect_right(offsets, offsets[self.start] + space) - 1
+        if end <= self.start:
+            return []  # لا يتسع ولا صف واحد؛ الصفحة التالية
+        return [
+            self._page_table(end, carried=True),
+            ItemsTable(self.header, self.rows, self.running, end, offsets),
+        ]
+
+    def draw(self):
+        table = self._page_table(len(self.rows), carried=False)
+        table.wrapOn(self.canv, self.width, self.height)
+        table.drawOn(self.canv, 0, 0)
+
+
+# === أرقام الصفحات - Page numbers ===
+
+PAGE_NUMBER_FONT_SIZE = 8
+
+
+class NumberedCanvas(Canvas):
+    """
+    لوحة رسم تضيف "صفحة س من ص" - Canvas that stamps "page X of Y" on save
+
+    عدد الصفحات لا يُعرف إلا في النهاية، لذلك تُحفظ حالة كل صفحة عند
+    showPage وتُرسم الأرقام عند save. في الملف المدمج يبدأ الترقيم من جديد
+    عند بداية كل طلب (PageGroupStart)، فيُرقّم كل طلب كأنه ملف مستقل.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._page_states = []
+        self._group_starts = {0}
+
+    def showPage(self):
+        self._page_states.append(dict(self.__dict__))
+        self._startPage()
+
+    def start_page_group(self):
+        """الصفحة الحالية أول صفحة في مجموعة ترقيم جديدة - Restart numbering on this page"""
+        self._group_starts.add(len(self._page_states))
+
+    def _page_numbers(self):
+        """(رقم الصفحة، عدد صفحات مجموعتها) لكل صفحة - Per-page (number, group total)"""
+        page_count = len(self._page_states)
+        starts = sorted(start for start in self._group_starts if start < page_count)
+        numbers = []
+        for start, end in zip(starts, starts[1:] + [page_count]):
+            numbers.extend((number, end - start) for number in range(1, end - start + 1))
+        return numbers
+
+    def save(self):
+        # النص مرتب للعرض من اليسار: "ص من س صفحة" بعد التشكيل
+        page_word = prepare_arabic_text(LABEL_PAGE)
+        of_word = prepare_arabic_text(LABEL_PAGE_OF)
+        for (number, total), state in zip(self._page_numbers(), self._page_states):
+            self.__dict__.update(state)
+            self.setFont('ArabicFont', PAGE_NUMBER_FONT_SIZE)
+            self.setFillColor(colors.grey)
+            self.drawCentredString(self._pagesize[0] / 2, 10*mm, f'{total} {of_word} {number} {page_word}')
+            super().showPage()
+        super().save()
+
+
+class PageGroupStart(Flowable):
+    """
+    علامة بداية طلب في الملف المدمج - Zero-size marker restarting the page count
+
+    تُوضع بعد PageBreak فتُرسم على أول صفحة للطلب.
+    """
+
+    def wrap(self, availWidth, availHeight):
+        return 0, 0
+
+    def draw(self):
+        start_page_group = getattr(self.canv, 'start_page_group', None)
+        if start_page_group is not None:
+            start_page_group()
+
+
+def _table(data, col_widths, style):
+    table = Table(data, colWidths=col_widths)
+    table.setStyle(style)
+    return table
+
+
+def build_order_elements(order_data, static_forms=False):
+    """
+    عناصر صفحات طلب واحد - Flowables for a single order
+
+    تُستخدم في ملف الطلب الواحد وفي ملف الطلبات المدمج. الأقسام الثابتة
+    (StaticSection) مقاسة مسبقاً؛ ما يُبنى هنا هو الأجزاء المتغيرة فقط.
+    static_forms: رسم الأقسام الثابتة كـ Form XObject (عند تكرارها في المستند).
+    """
     # العناصر التي سيتم إضافتها للـ PDF
     elements = []
     
-    # الأنماط
-    styles = getSampleStyleSheet()
-    
-    # نمط العنوان الرئيسي
-    title_style = ParagraphStyle(
-        'ArabicTitle',
-        parent=styles['Heading1'],
-        fontName='ArabicFont-Bold',
-        fontSize=20,
-        textColor=colors.HexColor('#2B3E50'),
-        alignment=TA_CENTER,
-        spaceAfter=10
-    )
-    
-    # نمط العنوان الفرعي
-    subtitle_style = ParagraphStyle(
-        'ArabicSubtitle',
-        parent=styles['Heading2'],
-        fontName='ArabicFont-Bold',
-        fontSize=16,
-        textColor=colors.HexColor('#2B3E50'),
-        alignment=TA_CENTER,
-        spaceAfter=15
-    )
-    
-    # نمط النص العادي
-    normal_style = ParagraphStyle(
-        'ArabicNormal',
-        parent=styles['Normal'],
-        fontName='ArabicFont',
-        fontSize=11,
-        alignment=TA_RIGHT,
-        spaceAfter=8
-    )
-    
     # === رأس الشركة ===
-    company_name = prepare_arabic_text('شركة الأمانة للتوريدات العامة')
-    elements.append(Paragraph(company_name, title_style))
-    
-    po_title = prepare_arabic_text('طلب توريد - Purchase Order')
-    elements.append(Paragraph(po_title, subtitle_style))
+    elements.append(StaticSection(COMPANY_HEADER_BLOCK, static_forms))
     elements.append(Spacer(1, 10*mm))
     
     # === بيانات الطلب الأساسية ===
     basic_data = [
-        [prepare_arabic_text('رقم الطلب:'), order_data.get('po_number', ''), 
-         prepare_arabic_text('التاريخ:'), order_data.get('po_date', '')],
-        [prepare_arabic_text('الرقم الضريبي:'), order_data.get('company_tax_id', ''), 
-         prepare_arabic_text('السجل التجاري:'), order_data.get('commercial_reg', '')]
+        [prepare_arabic_text(LABEL_PO_NUMBER), order_data.get('po_number', ''), 
+         prepare_arabic_text(LABEL_DATE), order_data.get('po_date', '')],
+        [prepare_arabic_text(LABEL_TAX_ID), order_data.get('company_tax_id', ''), 
+         prepare_arabic_text(LABEL_COMMERCIAL_REG), order_data.get('company_commercial_reg', '')]
     ]
-    
-    basic_table = Table(basic_data, colWidths=[40*mm, 45*mm, 40*mm, 45*mm])
-    basic_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#E8F0F8')),
-        ('BACKGROUND', (0, 1), (-1, 1), colors.HexColor('#E8F0F8')),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-        ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
-        ('FONTNAME', (0, 0), (-1, -1), 'ArabicFont'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('FONTNAME', (0, 0), (0, -1), 'ArabicFont-Bold'),
-        ('FONTNAME', (2, 0), (2, -1), 'ArabicFont-Bold'),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ('TOPPADDING', (0, 0), (-1, -1), 8),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey)
-    ]))
-    elements.append(basic_table)
+    elements.append(_table(basic_data, INFO_COLUMN_WIDTHS, BASIC_TABLE_STYLE))
     elements.append(Spacer(1, 8*mm))
     
     # === بيانات المورد ===
     supplier = order_data.get('supplier', {})
     
-    supplier_header = prepare_arabic_text('بيانات المورد - Supplier Information')
-    elements.append(Paragraph(supplier_header, subtitle_style))
+    elements.append(StaticSection(SUPPLIER_HEADER_BLOCK, static_forms))
     
     supplier_data = [
-        [prepare_arabic_text('اسم المورد:'), prepare_arabic_text(supplier.get('name', '')), 
-         prepare_arabic_text('الرقم الضريبي:'), supplier.get('tax_id', '')],
-        [prepare_arabic_text('التليفون:'), supplier.get('phone', ''), 
-         prepare_arabic_text('البريد الإلكتروني:'), supplier.get('email', '')],
-        [prepare_arabic_text('العنوان:'), prepare_arabic_text(supplier.get('address', '')), '', '']
+        [prepare_arabic_text(LABEL_SUPPLIER_NAME), prepare_arabic_text(supplier.get('name', '')), 
+         prepare_arabic_text(LABEL_TAX_ID), supplier.get('tax_id', '')],
+        [prepare_arabic_text(LABEL_PHONE), supplier.get('phone', ''), 
+         prepare_arabic_text(LABEL_EMAIL), supplier.get('email', '')],
+        [prepare_arabic_text(LABEL_ADDRESS), prepare_arabic_text(supplier.get('address', '')), '', '']
     ]
-    
-    supplier_table = Table(supplier_data, colWidths=[40*mm, 45*mm, 40*mm, 45*mm])
-    supplier_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#F2F2F2')),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-        ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
-        ('FONTNAME', (0, 0), (-1, -1), 'ArabicFont'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('FONTNAME', (0, 0), (0, -1), 'ArabicFont-Bold'),
-        ('FONTNAME', (2, 0), (2, 1), 'ArabicFont-Bold'),
-        ('SPAN', (1, 2), (3, 2)),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ('TOPPADDING', (0, 0), (-1, -1), 8),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey)
-    ]))
-    elements.append(supplier_table)
+    elements.append(_table(supplier_data, INFO_COLUMN_WIDTHS, SUPPLIER_TABLE_STYLE))
     elements.append(Spacer(1, 8*mm))
     
     # === جدول الأصناف ===
-    items_header = prepare_arabic_text('أصناف الطلب - Order Items')
-    elements.append(Paragraph(items_header, subtitle_style))
+    elements.append(StaticSection(ITEMS_HEADER_BLOCK, static_forms))
     
     # رأس الجدول
-    items_data = [[
-        prepare_arabic_text('م'),
-        prepare_arabic_text('كود الصنف'),
-        prepare_arabic_text('اسم الصنف'),
-        prepare_arabic_text('الكمية'),
-        prepare_arabic_text('السعر'),
-        prepare_arabic_text('الإجمالي')
-    ]]
+    header = [prepare_arabic_text(header) for header in ITEM_TABLE_HEADERS]
     
-    # بيانات الأصناف
+    # بيانات الأصناف مع المجموع التراكمي (للمجموع المنقول بين الصفحات)
     items = order_data.get('items', [])
-    subtotal = 0.0
+    rows = []
+    running = []
+    subtotal = ZERO
     
     for idx, item in enumerate(items, start=1):
         item_total = item.get('total_price', 0)
-        subtotal += item_total
+        subtotal += round_money(item_total)
+        running.append(subtotal)
         
-        items_data.append([
+        rows.append([
             str(idx),
             item.get('product_code', ''),
             prepare_arabic_text(item.get('product_name', '')),
@@ -194,134 +724,92 @@ def create_pdf_from_order(order_data):
             f"{item_total:.2f}"
         ])
     
-    items_table = Table(items_data, colWidths=[15*mm, 25*mm, 60*mm, 20*mm, 25*mm, 25*mm])
-    items_table.setStyle(TableStyle([
-        # رأس الجدول
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2B3E50')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-        ('FONTNAME', (0, 0), (-1, 0), 'ArabicFont-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 11),
-        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-        # البيانات
-        ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-        ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-        ('FONTNAME', (0, 1), (-1, -1), 'ArabicFont'),
-        ('FONTSIZE', (0, 1), (-1, -1), 9),
-        ('ALIGN', (0, 1), (0, -1), 'CENTER'),  # رقم الصنف
-        ('ALIGN', (1, 1), (1, -1), 'CENTER'),  # الكود
-        ('ALIGN', (2, 1), (2, -1), 'RIGHT'),   # الاسم
-        ('ALIGN', (3, 1), (-1, -1), 'CENTER'), # الأرقام
-        # التنسيق العام
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-        ('TOPPADDING', (0, 0), (-1, -1), 6),
-        ('GRID', (0, 0), (-1, -1), 1, colors.grey),
-        # صفوف متبادلة
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F2F2F2')])
-    ]))
-    elements.append(items_table)
+    elements.append(ItemsTable(header, rows, running))
     elements.append(Spacer(1, 5*mm))
     
     # === الإجماليات ===
-    tax_rate = order_data.get('tax_rate', 14)
-    tax_amount = subtotal * (tax_rate / 100)
+    tax_rate = order_data.get('tax_rate', DEFAULT_TAX_RATE)
+    tax_amount = tax_for(subtotal, tax_rate)
     final_total = subtotal + tax_amount
     
     totals_data = [
-        [prepare_arabic_text('المجموع الفرعي (قبل الضريبة):'), f"{subtotal:,.2f} ج.م"],
+        [prepare_arabic_text(LABEL_SUBTOTAL), f"{subtotal:,.2f} ج.م"],
         [prepare_arabic_text(f'ضريبة القيمة المضافة ({tax_rate}%):'), f"{tax_amount:,.2f} ج.م"],
-        [prepare_arabic_text('الإجمالي النهائي (شامل الضريبة):'), f"{final_total:,.2f} ج.م"]
+        [prepare_arabic_text(LABEL_FINAL_TOTAL), f"{final_total:,.2f} ج.م"]
     ]
-    
-    totals_table = Table(totals_data, colWidths=[120*mm, 50*mm])
-    totals_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 1), colors.HexColor('#D9E2F3')),
-        ('BACKGROUND', (0, 2), (-1, 2), colors.HexColor('#2B3E50')),
-        ('TEXTCOLOR', (0, 0), (-1, 1), colors.black),
-        ('TEXTCOLOR', (0, 2), (-1, 2), colors.white),
-        ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
-        ('ALIGN', (1, 0), (1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, -1), 'ArabicFont-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 1), 10),
-        ('FONTSIZE', (0, 2), (-1, 2), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ('TOPPADDING', (0, 0), (-1, -1), 8),
-        ('GRID', (0, 0), (-1, -1), 1, colors.grey)
-    ]))
-    elements.append(totals_table)
+    elements.append(_table(totals_data, TOTALS_COLUMN_WIDTHS, TOTALS_TABLE_STYLE))
     
     # === شروط التوريد ===
     if order_data.get('delivery_period') or order_data.get('delivery_location') or order_data.get('payment_terms'):
         elements.append(Spacer(1, 8*mm))
-        terms_header = prepare_arabic_text('شروط التوريد - Delivery Terms')
-        elements.append(Paragraph(terms_header, subtitle_style))
+        elements.append(StaticSection(TERMS_HEADER_BLOCK, static_forms))
         
         terms_data = []
         if order_data.get('delivery_period'):
-            terms_data.append([prepare_arabic_text('مدة التوريد:'), 
+            terms_data.append([prepare_arabic_text(LABEL_DELIVERY_PERIOD), 
                              prepare_arabic_text(order_data.get('delivery_period', ''))])
         
         if order_data.get('delivery_location'):
-            terms_data.append([prepare_arabic_text('مكان التسليم:'), 
+            terms_data.append([prepare_arabic_text(LABEL_DELIVERY_LOCATION), 
                              prepare_arabic_text(order_data.get('delivery_location', ''))])
         
         if order_data.get('payment_terms'):
-            terms_data.append([prepare_arabic_text('شروط الدفع:'), 
+            terms_data.append([prepare_arabic_text(LABEL_PAYMENT_TERMS), 
                              prepare_arabic_text(order_data.get('payment_terms', ''))])
         
         if terms_data:
-            terms_table = Table(terms_data, colWidths=[40*mm, 130*mm])
-            terms_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#F2F2F2')),
-                ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-                ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
-                ('FONTNAME', (0, 0), (0, -1), 'ArabicFont-Bold'),
-                ('FONTNAME', (1, 0), (1, -1), 'ArabicFont'),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-                ('TOPPADDING', (0, 0), (-1, -1), 8),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey)
-            ]))
-            elements.append(terms_table)
+            elements.append(_table(terms_data, TERMS_COLUMN_WIDTHS, TERMS_TABLE_STYLE))
     
     # === ملاحظات ===
     if order_data.get('notes'):
         elements.append(Spacer(1, 8*mm))
-        notes_header = prepare_arabic_text('ملاحظات - Notes')
-        elements.append(Paragraph(notes_header, subtitle_style))
+        elements.append(StaticSection(NOTES_HEADER_BLOCK, static_forms))
         
         notes_data = [[prepare_arabic_text(order_data.get('notes', ''))]]
-        notes_table = Table(notes_data, colWidths=[170*mm])
-        notes_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#F9F9F9')),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
-            ('FONTNAME', (0, 0), (-1, -1), 'ArabicFont'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-            ('TOPPADDING', (0, 0), (-1, -1), 10),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey)
-        ]))
-        elements.append(notes_table)
+        elements.append(_table(notes_data, NOTES_COLUMN_WIDTHS, NOTES_TABLE_STYLE))
     
     # === التوقيعات ===
     elements.append(Spacer(1, 15*mm))
-    signatures_data = [[
-        prepare_arabic_text('توقيع المورد\n___________________'),
-        prepare_arabic_text('توقيع الشركة\n___________________')
-    ]]
+    elements.append(StaticSection(SIGNATURES_BLOCK, static_forms))
     
-    signatures_table = Table(signatures_data, colWidths=[85*mm, 85*mm])
-    signatures_table.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, -1), 'ArabicFont-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 11),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-        ('TOPPADDING', (0, 0), (-1, -1), 10)
-    ]))
-    elements.append(signatures_table)
+    return elements
+
+
+def create_pdf_from_order(order_data):
+    """
+    إنشاء ملف PDF من بيانات الطلب
+    Create PDF from order data
+    """
+    buffer = io.BytesIO()
     
     # بناء المستند
-    doc.build(elements)
+    doc = _create_document(buffer)
+    elements = build_order_elements(order_data)
+    with _build_lock:
+        doc.build(elements, canvasmaker=NumberedCanvas)
+    
+    buffer.seek(0)
+    return buffer
+
+
+def create_merged_pdf(orders_data):
+    """
+    ملف PDF واحد لعدة طلبات - Single PDF with every order starting on a new page
+
+    مستند واحد يعني أن الخطوط تُضمّن مرة واحدة فقط بدلاً من مرة لكل طلب.
+    """
+    buffer = io.BytesIO()
+    
+    elements = []
+    for order_data in orders_data:
+        if elements:
+            elements.append(PageBreak())
+            elements.append(PageGroupStart())
+        elements.extend(build_order_elements(order_data, static_forms=True))
+    
+    doc = _create_document(buffer)
+    with _build_lock:
+        doc.build(elements, canvasmaker=NumberedCanvas)
     
     buffer.seek(0)
     return buffer
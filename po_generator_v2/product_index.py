@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+فهرس بحث الأصناف بالبادئة (للإكمال التلقائي)
+Product prefix index for typeahead search
+
+قائمتان مرتبتان في الذاكرة: أكواد الأصناف، وبدايات كلمات أسماء الأصناف
+بعد توحيد الكتابة العربية. البحث بالبادئة يتم بـ bisect في O(log n)
+بدلاً من إرسال كتالوج الأصناف كله للمتصفح.
+"""
+
+import threading
+from bisect import bisect_left, insort
+from search_index import normalize_arabic
+
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 50
+
+
+def _name_keys(name):
+    """
+    مفاتيح اسم الصنف - Index keys for a product name
+
+    الاسم من بداية كل كلمة فيه، حتى يطابق "كابل" الصنف "سلك كابل نحاس".
+    """
+    words = normalize_arabic(name).split()
+    return {' '.join(words[i:]) for i in range(len(words))}
+
+
+class ProductIndex:
+    """
+    فهرس الأصناف - In-memory sorted prefix index over product codes and names
+
+    كل مدخل (مفتاح، رقم الصنف)؛ الأكواد تُعرض قبل الأسماء في النتائج.
+    version: إصدار قائمة الأصناف (reference_versions) الذي بُني منه الفهرس.
+    """
+
+    def __init__(self):
+        self.version = 0
+        self._products = {}
+        self._codes = []
+        self._names = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._products)
+
+    def build(self, products, version=0):
+        """بناء الفهرس من قائمة أصناف (قواميس) - Rebuild from product dicts"""
+        entries = {}
+        codes = []
+        names = []
+        for product in products:
+            entries[product['id']] = product
+            codes.append((normalize_arabic(product['code']), product['id']))
+            names.extend((key, product['id']) for key in _name_keys(product['name']))
+        codes.sort()
+        names.sort()
+
+        with self._lock:
+            self._products = entries
+            self._codes = codes
+            self._names = names
+            self.version = version
+
+    def add(self, product, version=None):
+        """
+        إضافة صنف جديد - Add a newly created product
+
+        version: الإصدار بعد هذه الإضافة؛ يُعتمد فقط إذا كان التالي مباشرة
+        لإصدار الفهرس، وإلا فهناك تغييرات من عملية أخرى تحتاج إعادة بناء.
+        """
+        with self._lock:
+            if version is not None and version == self.version + 1:
+                self.version = version
+            self._products[product['id']] = product
+            insort(self._codes, (normalize_arabic(product['code']), product['id']))
+            for key in _name_keys(product['name']):
+                insort(self._names, (key, product['id']))
+
+    @staticmethod
+    def _scan(entries, prefix, found, limit):
+        """جمع المطابقات بالبادئة - Collect ids whose key starts with prefix"""
+        position = bisect_left(entries, (prefix,))
+        while position < len(entries) and len(found) < limit:
+            key, product_id = entries[position]
+            if not key.startswith(prefix):
+                break
+            found.setdefault(product_id, None)
+            position += 1
+
+    def search(self, query, limit=DEFAULT_SEARCH_LIMIT):
+        """
+        البحث بالبادئة في الكود والاسم - Prefix search on code, then name
+
+        يرجع حتى limit صنف بدون تكرار.
+        """
+        prefix = ' '.join(normalize_arabic(query).split())
+        if not prefix:
+            return []
+
+        found = {}
+        with self._lock:
+            self._scan(self._codes, prefix, found, limit)
+            self._scan(self._names, prefix, found, limit)
+            return [self._products[product_id] for product_id in found]
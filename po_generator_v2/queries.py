@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+طبقة الاستعلامات للطلبات
+Order query layer
+
+كل نقطة تحتاج إلى تحويل الطلبات إلى قواميس (to_dict) تمر من هنا،
+حتى يتم تحميل المورد والأصناف مسبقاً بعدد ثابت من استعلامات SQL
+بدلاً من 1 + 2N استعلام (N+1 selects).
+"""
+
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload, selectinload
+from models import db, Order, OrderItem
+from search_index import search_filter
+
+
+def order_graph_query():
+    """
+    استعلام الطلبات مع المورد والأصناف - Orders query with supplier and items
+
+    المورد يُحمّل بـ JOIN في نفس الاستعلام، والأصناف باستعلام واحد إضافي
+    (SELECT ... WHERE order_id IN (...)) لكل الطلبات معاً.
+    """
+    return Order.query.options(
+        joinedload(Order.supplier),
+        selectinload(Order.items)
+    )
+
+
+def filter_orders(query, search='', status=''):
+    """تطبيق فلاتر البحث والحالة - Apply search and status filters"""
+    if search:
+        condition = search_filter(search)
+        if condition is not None:
+            query = query.filter(condition)
+
+    if status:
+        query = query.filter(Order.status == status)
+
+    return query
+
+
+def list_order_graphs(search='', status=''):
+    """كل الطلبات المطابقة بكامل بياناتها - All matching orders, fully loaded"""
+    query = filter_orders(order_graph_query(), search, status)
+    return query.order_by(Order.created_at.desc(), Order.id.desc()).all()
+
+
+def list_export_order_graphs(order_ids=None, date_from=None, date_to=None,
+                             status='', supplier_id=None, search='', limit=None):
+    """
+    الطلبات المطلوب تصديرها بكامل بياناتها - Fully loaded orders for a batch export
+
+    إما قائمة أرقام طلبات محددة أو فلتر (فترة تاريخ، حالة، مورد، بحث)،
+    مرتبة بتاريخ الطلب.
+    """
+    query = filter_orders(order_graph_query(), search, status)
+
+    if order_ids:
+        query = query.filter(Order.id.in_(order_ids))
+    if date_from:
+        query = query.filter(Order.po_date >= date_from)
+    if date_to:
+        query = query.filter(Order.po_date <= date_to)
+    if supplier_id:
+        query = query.filter(Order.supplier_id == supplier_id)
+
+    query = query.order_by(Order.po_date, Order.id)
+    if limit:
+        query = query.limit(limit)
+    return query.all()
+
+
+def get_order_graph_or_404(order_id):
+    """طلب واحد بكامل بياناته أو 404 - Single fully loaded order or 404"""
+    return order_graph_query().filter(Order.id == order_id).first_or_404()
+
+
+def get_order_header_or_404(order_id):
+    """طلب مع المورد فقط بدون الأصناف - Order with supplier only, items not loaded"""
+    return Order.query.options(
+        joinedload(Order.supplier)
+    ).filter(Order.id == order_id).first_or_404()
+
+
+def count_order_items(order_id):
+    """عدد أصناف طلب - Number of items in an order"""
+    return db.session.query(func.count(OrderItem.id)).filter(
+        OrderItem.order_id == order_id
+    ).scalar()
+
+
+def iter_order_items(order_id, batch_size=1000, session=None):
+    """
+    أصناف طلب كقواميس على دفعات - Stream an order's items as dicts in batches
+
+    لا تُحمّل كل الأصناف في الذاكرة مرة واحدة (yield_per).
+    session: جلسة خارج Flask (عمليات التوليد)؛ الافتراضي db.session.
+    """
+    query = (session or db.session).query(OrderItem).filter(
+        OrderItem.order_id == order_id
+    ).order_by(OrderItem.item_order, OrderItem.id).yield_per(batch_size)
+    for item in query:
+        yield item.to_dict()
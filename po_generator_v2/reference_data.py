@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+البيانات المرجعية المُصدّرة (الموردون، الأصناف) مع ETag
+Versioned reference-data responses with ETags
+
+قوائم الموردين والأصناف تتغير مرات قليلة في اليوم، لذلك:
+- لكل قائمة رقم إصدار في جدول reference_versions يزيد مع كل إضافة
+  داخل نفس المعاملة (bump_reference_version).
+- نص JSON لكل قائمة يُبنى مرة لكل إصدار ويُحفظ في ذاكرة العملية
+  مع ETag قوي (بصمة المحتوى).
+- المتصفح يرسل If-None-Match فيرجع 304 بدون جسم.
+
+رقم الإصدار نفسه يُقرأ من قاعدة البيانات مرة كل REFERENCE_VERSION_TTL
+ثانية على الأكثر، فالطلب المتكرر لا يلمس قاعدة البيانات. في نفس العملية
+التغيير يظهر فور الـ commit؛ بين العمليات المختلفة بعد TTL على الأكثر.
+"""
+
+import hashlib
+import threading
+import time
+from flask import Response, current_app, request
+from sqlalchemy import event, text
+from models import db
+
+# أسماء القوائم المرجعية - Reference list names
+SUPPLIERS = 'suppliers'
+PRODUCTS = 'products'
+
+# أقصى مدة لاستخدام رقم إصدار محفوظ قبل إعادة قراءته
+REFERENCE_VERSION_TTL = 2.0
+
+# المتصفح يحتفظ بالنسخة لكن يتحقق منها عند كل استخدام
+REFERENCE_CACHE_CONTROL = 'no-cache'
+
+_BUMP_VERSION = text(
+    'INSERT INTO reference_versions (name, version) VALUES (:name, 1) '
+    'ON CONFLICT (name) DO UPDATE SET version = reference_versions.version + 1 '
+    'RETURNING version'
+)
+
+_SELECT_VERSION = text('SELECT version FROM reference_versions WHERE name = :name')
+
+_versions = {}
+_bodies = {}
+_lock = threading.Lock()
+
+
+def bump_reference_version(session, name):
+    """
+    زيادة رقم إصدار قائمة - Bump a list's version inside the current transaction
+
+    يرجع الإصدار الجديد. النسخة المحلية تُلغى بعد الـ commit
+    (register_reference_events).
+    """
+    version = session.execute(_BUMP_VERSION, {'name': name}).scalar_one()
+    session.info.setdefault('reference_changes', set()).add(name)
+    return version
+
+
+def reference_version(name):
+    """رقم الإصدار الحالي لقائمة - Current version (0 if never bumped)"""
+    cached = _versions.get(name)
+    now = time.monotonic()
+    if cached is not None and now - cached[1] < REFERENCE_VERSION_TTL:
+        return cached[0]
+
+    version = db.session.execute(_SELECT_VERSION, {'name': name}).scalar() or 0
+    _versions[name] = (version, now)
+    return version
+
+
+def forget_reference_versions(names):
+    """إلغاء أرقام الإصدار المحفوظة - Drop cached versions so the next read hits the DB"""
+    for name in names:
+        _versions.pop(name, None)
+
+
+def _forget_committed_changes(session):
+    forget_reference_versions(session.info.pop('reference_changes', ()))
+
+
+def _discard_rolled_back_changes(session, previous_transaction):
+    session.info.pop('reference_changes', None)
+
+
+def register_reference_events():
+    """إلغاء النسخ المحلية بعد commit أي تغيير - Invalidate local versions on commit (idempotent)"""
+    if not event.contains(db.session, 'after_commit', _forget_committed_changes):
+        event.listen(db.session, 'after_commit', _forget_committed_changes)
+        event.listen(db.session, 'after_soft_rollback', _discard_rolled_back_changes)
+
+
+def json_bytes(data):
+    """نص JSON كما يرجعه jsonify - Serialize data exactly like jsonify would"""
+    return current_app.json.response(data).get_data()
+
+
+def _reference_body(name, build):
+    """نص JSON و ETag للإصدار الحالي - Serialized body and ETag for the current version"""
+    version = reference_version(name)
+    cached = _bodies.get(name)
+    if cached is not None and cached[0] == version:
+        return cached[1], cached[2]
+
+    with _lock:
+        cached = _bodies.get(name)
+        if cached is not None and cached[0] == version:
+            return cached[1], cached[2]
+
+        body = build()
+        etag = hashlib.sha256(body).hexdigest()[:32]
+        _bodies[name] = (version, etag, body)
+        return etag, body
+
+
+def reference_response(name, build):
+    """
+    استجابة قائمة مرجعية - 200 with the cached JSON bytes, or 304 on a matching ETag
+
+    build: دالة بدون معاملات ترجع نص JSON (bytes) للقائمة كاملة.
+    """
+    etag, body = _reference_body(name, build)
+
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = REFERENCE_CACHE_CONTROL
+    return response
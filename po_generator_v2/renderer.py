@@ -0,0 +1,340 @@
+# -*- coding: utf-8 -*-
+"""
+خدمة توليد الملفات في عمليات منفصلة
+Multi-process document renderer
+
+توليد PDF و Excel عمل حسابي خالص، وداخل عملية الخادم يتنافس على قفل
+بايثون (GIL) مع كل الطلبات الأخرى. الـ Renderer يرسل التوليد لمجموعة
+عمليات دائمة (ProcessPoolExecutor) تستخدم كل أنوية المعالج:
+
+- كل عملية تُجهّز الخطوط والأنماط وقالب Excel مرة عند بدئها (warm_worker).
+- ضغط زائد: عدد المهام المنتظرة والجارية محدود (max_pending)؛ الطلب الجديد
+  ينتظر مكاناً حتى queue_wait ثانية ثم يُرفض بـ RendererBusy (503).
+- مهلة لكل مهمة: من ينتظر النتيجة يتوقف بعد timeout ثانية (RenderTimeout)،
+  والمهمة إن لم تبدأ بعد تُلغى.
+- كل عملية تُستبدل بعد max_tasks_per_child مهمة (بايثون 3.11 أو أحدث)
+  حتى لا تتراكم الذاكرة (ذاكرة التشكيل، كائنات الخطوط...).
+- إذا ماتت عملية (BrokenProcessPool) تُنشأ المجموعة من جديد عند الطلب التالي.
+- التشكيل العربي يحدث داخل العمليات، فكل عملية تضيف زيادة عدادات ذاكرة
+  التشكيل بعد كل مهمة إلى عدادات مشتركة (shaping_stats) تظهر في /api/metrics.
+- ملفات Excel للطلبات الكبيرة: العملية تقرأ الأصناف من قاعدة البيانات بنفسها
+  وتكتب الملف مباشرة على القرص (render_order_excel_file)، فلا تمر الأصناف
+  ولا الملف كاملاً عبر ذاكرة عملية الخادم.
+
+العمليات تبدأ بـ spawn (كما على Windows) لأن استبدال العمليات لا يعمل مع fork.
+"""
+
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+from db_engine import configure_engine
+from excel_template import get_skeleton, render_excel_bytes, write_template_excel
+from pdf_generator import (SHAPING_CACHE_SIZE, create_merged_pdf, create_pdf_from_order,
+                           preload_pdf_resources, shaping_cache_stats)
+from queries import iter_order_items
+
+# أنواع الملفات - Document kinds
+RENDER_KINDS = ('pdf', 'excel')
+
+# الإعدادات الافتراضية (تُغيّر من create_app عبر configure_renderer)
+DEFAULT_RENDER_TIMEOUT = 60
+DEFAULT_QUEUE_WAIT = 5
+DEFAULT_MAX_TASKS_PER_CHILD = 500
+PENDING_PER_WORKER = 4
+
+_settings = {
+    'workers': None,
+    'max_pending': None,
+    'timeout': DEFAULT_RENDER_TIMEOUT,
+    'queue_wait': DEFAULT_QUEUE_WAIT,
+    'max_tasks_per_child': DEFAULT_MAX_TASKS_PER_CHILD,
+}
+
+_renderer = None
+_renderer_lock = threading.Lock()
+
+# محركات قاعدة البيانات داخل عملية التوليد - Per-worker engines by database URL
+_worker_engines = {}
+
+# عدادات التشكيل المشتركة [hits, misses] وآخر قيم أضافتها هذه العملية
+_shaping_counters = None
+_shaping_reported = (0, 0)
+
+
+class RendererBusy(Exception):
+    """كل أماكن الانتظار مشغولة - The render queue is full"""
+
+
+class RenderTimeout(Exception):
+    """المهمة تجاوزت المهلة - A render did not finish in time"""
+
+
+# === داخل عمليات التوليد - Worker side ===
+
+def warm_worker(shaping_counters=None):
+    """تجهيز عملية توليد جديدة - Register fonts, shape labels, build the Excel skeleton"""
+    global _shaping_counters
+    _shaping_counters = shaping_counters
+    preload_pdf_resources()
+    get_skeleton()
+    _report_shaping()
+
+
+def _report_shaping():
+    """إضافة زيادة عدادات التشكيل للعدادات المشتركة - Publish this worker's shaping deltas"""
+    global _shaping_reported
+    if _shaping_counters is None:
+        return
+    stats = shaping_cache_stats()
+    hits, misses = _shaping_reported
+    with _shaping_counters.get_lock():
+        _shaping_counters[0] += stats['hits'] - hits
+        _shaping_counters[1] += stats['misses'] - misses
+    _shaping_reported = (stats['hits'], stats['misses'])
+
+
+def _run_task(func, args):
+    """تنفيذ مهمة داخل العملية - Run one job, then publish the shaping counters"""
+    try:
+        return func(*args)
+    finally:
+        _report_shaping()
+
+
+def _ready():
+    return os.getpid()
+
+
+def render_document(kind, order_data, items=None):
+    """
+    توليد ملف كـ bytes - Render one document (runs in a worker process)
+
+    items لملفات Excel الكبيرة عندما تُمرر الأصناف منفصلة عن رأس الطلب.
+    """
+    if kind == 'pdf':
+        return create_pdf_from_order(order_data).getvalue()
+    if kind == 'excel':
+        return render_excel_bytes(order_data, items)
+    raise ValueError(f'نوع ملف غير مدعوم: {kind}')
+
+
+def render_merged_pdf(orders_data):
+    """ملف PDF مدمج لعدة طلبات - Merged PDF bytes (runs in a worker process)"""
+    return create_merged_pdf(orders_data).getvalue()
+
+
+def _worker_engine(database_url):
+    """
+    اتصال العملية بقاعدة البيانات - Engine for reading orders inside a worker
+
+    بدون مجموعة اتصالات (NullPool): يُستخدم فقط للطلبات الكبيرة، وعملية
+    التوليد لا يجب أن تحجز اتصالات من حد اتصالات الخادم.
+    """
+    engine = _worker_engines.get(database_url)
+    if engine is None:
+        engine = create_engine(database_url, poolclass=NullPool)
+        configure_engine(engine)
+        _worker_engines[database_url] = engine
+    return engine
+
+
+def render_order_excel_file(database_url, order_id, order_header, path):
+    """
+    ملف Excel لطلب كبير - Stream an order's items from the database into `path` (worker side)
+
+    order_header: بيانات الطلب بدون الأصناف (to_dict(include_items=False)).
+    الأصناف تُقرأ على دفعات وتُكتب صفاً بصف، فالذاكرة ثابتة مهما كان عددها.
+    """
+    with Session(_worker_engine(database_url)) as session:
+        with open(path, 'wb') as output:
+            write_template_excel(order_header, output, iter_order_items(order_id, session=session))
+
+
+# === داخل عملية الخادم - Server side ===
+
+class Renderer:
+    """
+    مجموعة عمليات التوليد - Persistent pool of pre-warmed render workers
+
+    submit() للاستخدام العام (يرجع Future)، و render() لملف واحد بمهلة.
+    """
+
+    def __init__(self, workers=None, max_pending=None, timeout=DEFAULT_RENDER_TIMEOUT,
+                 queue_wait=DEFAULT_QUEUE_WAIT, max_tasks_per_child=DEFAULT_MAX_TASKS_PER_CHILD):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.workers * PENDING_PER_WORKER
+        self.timeout = timeout
+        self.queue_wait = queue_wait
+        self.max_tasks_per_child = max_tasks_per_child
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._context = multiprocessing.get_context('spawn')
+        # تبقى مع إعادة إنشاء المجموعة، فالعدادات تراكمية طول عمر الخادم
+        self._shaping_counters = self._context.Array('q', 2)
+        self._pool = None
+        self._lock = threading.Lock()
+        self._counters = {'submitted': 0, 'completed': 0, 'failed': 0, 'rejected': 0,
+                          'timeouts': 0, 'pool_restarts': 0}
+        self._in_flight = 0
+
+    def _create_pool(self):
+        options = {'max_workers': self.workers, 'initializer': warm_worker,
+                   'initargs': (self._shaping_counters,), 'mp_context': self._context}
+        if self.max_tasks_per_child and sys.version_info >= (3, 11):
+            options['max_tasks_per_child'] = self.max_tasks_per_child
+        return ProcessPoolExecutor(**options)
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = self._create_pool()
+            return self._pool
+
+    def _restart_pool(self, broken):
+        """إعادة إنشاء مجموعة معطلة - Replace a pool that lost a worker"""
+        with self._lock:
+            if self._pool is not broken:
+                return
+            self._pool = None
+            self._counters['pool_restarts'] += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def start(self):
+        """
+        تشغيل كل العمليات الآن - Spawn and warm every worker up front
+
+        بدونه تبدأ العمليات مع أول الطلبات فيتأخر أولها بزمن التجهيز.
+        """
+        pool = self._get_pool()
+        futures = [pool.submit(_ready) for _ in range(self.workers)]
+        return sorted({future.result() for future in futures})
+
+    def submit(self, func, *args, wait=None):
+        """
+        إرسال مهمة - Submit func(*args) to a worker, respecting the pending limit
+
+        wait: أقصى انتظار لمكان فارغ (الافتراضي queue_wait)؛ عند انتهائه
+        RendererBusy. الدالة والمعاملات يجب أن تكون قابلة للـ pickle.
+        """
+        wait = self.queue_wait if wait is None else wait
+        if not self._slots.acquire(timeout=wait):
+            with self._lock:
+                self._counters['rejected'] += 1
+            raise RendererBusy('خدمة توليد الملفات مشغولة، حاول بعد قليل')
+
+        pool = self._get_pool()
+        try:
+            future = pool.submit(_run_task, func, args)
+        except BrokenProcessPool:
+            self._restart_pool(pool)
+            try:
+                future = self._get_pool().submit(_run_task, func, args)
+            except BaseException:
+                self._slots.release()
+                raise
+        except BaseException:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._counters['submitted'] += 1
+            self._in_flight += 1
+        future.add_done_callback(lambda future: self._done(pool, future))
+        return future
+
+    def _done(self, pool, future):
+        self._slots.release()
+        error = None if future.cancelled() else future.exception()
+        with self._lock:
+            self._in_flight -= 1
+            self._counters['failed' if future.cancelled() or error else 'completed'] += 1
+        if isinstance(error, BrokenProcessPool):
+            self._restart_pool(pool)
+
+    def result(self, future, timeout=None):
+        """
+        انتظار نتيجة مهمة - Wait for a submitted job, at most `timeout` seconds
+
+        عند انتهاء المهلة تُلغى المهمة إن لم تبدأ، وإلا تكمل في عمليتها
+        وتُهمل نتيجتها؛ استبدال العمليات يحد من أثر المهام العالقة.
+        """
+        try:
+            return future.result(timeout=self.timeout if timeout is None else timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            with self._lock:
+                self._counters['timeouts'] += 1
+            raise RenderTimeout('انتهت مهلة توليد الملف') from None
+
+    def render(self, kind, order_data, items=None, timeout=None):
+        """توليد ملف واحد وانتظاره - Render one document and return its bytes"""
+        if kind not in RENDER_KINDS:
+            raise ValueError(f'نوع ملف غير مدعوم: {kind}')
+        return self.result(self.submit(render_document, kind, order_data, items), timeout)
+
+    def shutdown(self, wait=True):
+        """إيقاف العمليات - Stop the workers, cancelling queued jobs"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=True)
+
+    def shaping_stats(self):
+        """
+        عدادات ذاكرة التشكيل من كل العمليات - Arabic shaping cache counters summed over workers
+
+        max_size لكل عملية؛ حجم الذاكرة الحالي لا يُجمع لأنه يختلف بين العمليات.
+        """
+        with self._shaping_counters.get_lock():
+            hits, misses = self._shaping_counters[:]
+        lookups = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+            'max_size': SHAPING_CACHE_SIZE,
+            'workers': self.workers,
+        }
+
+    def stats(self):
+        """مؤشرات الخدمة للمراقبة - Renderer counters"""
+        with self._lock:
+            stats = {
+                'workers': self.workers,
+                'max_pending': self.max_pending,
+                'in_flight': self._in_flight,
+                'running': self._pool is not None,
+            }
+            stats.update(self._counters)
+        return stats
+
+
+def configure_renderer(workers=None, max_pending=None, timeout=None, queue_wait=None, max_tasks_per_child=None):
+    """ضبط إعدادات الخدمة قبل أول استخدام - Set renderer options (from the app config)"""
+    values = {'workers': workers, 'max_pending': max_pending, 'timeout': timeout,
+              'queue_wait': queue_wait, 'max_tasks_per_child': max_tasks_per_child}
+    with _renderer_lock:
+        _settings.update({name: value for name, value in values.items() if value is not None})
+
+
+def get_renderer():
+    """خدمة التوليد المشتركة (تُنشأ عند أول استخدام) - The process-wide renderer"""
+    global _renderer
+    with _renderer_lock:
+        if _renderer is None:
+            _renderer = Renderer(**_settings)
+        return _renderer
+
+
+def shutdown_renderer(wait=True):
+    """إيقاف خدمة التوليد عند إغلاق الخادم - Stop the renderer on server shutdown"""
+    global _renderer
+    with _renderer_lock:
+        renderer, _renderer = _renderer, None
+    if renderer is not None:
+        renderer.shutdown(wait=wait)
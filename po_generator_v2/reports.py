@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+"""
+التقارير: جداول ملخصة تُحدّث تدريجياً
+Reporting: incrementally maintained summary tables
+
+بدلاً من جمع كل الطلبات والأصناف عند كل تقرير، يُحدّث ملخص لكل
+(مورد، شهر، حالة) ولكل (صنف، شهر) عند إضافة أو حذف طلب بأمر
+INSERT ... ON CONFLICT DO UPDATE داخل نفس معاملة الطلب.
+التقارير تقرأ من الملخصات فقط، فحجمها ثابت تقريباً مهما زادت الطلبات.
+"""
+
+import re
+from collections import defaultdict
+from sqlalchemy import func, text
+from models import db, Supplier, SupplierMonthReport, ProductMonthReport
+from money import to_float
+
+# أبعاد تقرير المشتريات - Spend report groupings
+SPEND_GROUPINGS = ('supplier', 'month', 'status')
+
+# ترتيب تقرير الأصناف - Top products ordering
+PRODUCT_RANKINGS = ('value', 'quantity')
+
+_MONTH_PATTERN = re.compile(r'^\d{4}-(0[1-9]|1[0-2])$')
+
+_CHUNK_SIZE = 500
+
+_UPSERT_SUPPLIER_MONTH = text(
+    'INSERT INTO report_supplier_month '
+    '(supplier_id, month, status, order_count, subtotal, tax_amount, total) '
+    'VALUES (:supplier_id, :month, :status, :order_count, :subtotal, :tax_amount, :total) '
+    'ON CONFLICT (supplier_id, month, status) DO UPDATE SET '
+    'order_count = report_supplier_month.order_count + excluded.order_count, '
+    'subtotal = report_supplier_month.subtotal + excluded.subtotal, '
+    'tax_amount = report_supplier_month.tax_amount + excluded.tax_amount, '
+    'total = report_supplier_month.total + excluded.total'
+)
+
+_UPSERT_PRODUCT_MONTH = text(
+    'INSERT INTO report_product_month '
+    '(product_key, month, product_code, product_name, line_count, quantity, value) '
+    'VALUES (:product_key, :month, :product_code, :product_name, :line_count, :quantity, :value) '
+    'ON CONFLICT (product_key, month) DO UPDATE SET '
+    'line_count = report_product_month.line_count + excluded.line_count, '
+    'quantity = report_product_month.quantity + excluded.quantity, '
+    'value = report_product_month.value + excluded.value'
+)
+
+
+def _month(po_date):
+    """الشهر YYYY-MM من تاريخ (date أو نص من SQLite) - Month key of a date"""
+    return str(po_date)[:7]
+
+
+def _minor(value):
+    """قيمة عمود مبلغ خام بالقروش - Raw money column value as int"""
+    return int(value or 0)
+
+
+def _apply_orders(conn, order_ids, sign):
+    """
+    إضافة (sign=1) أو طرح (sign=-1) طلبات من الملخصات - Apply orders to the summaries
+
+    تُقرأ الطلبات من قاعدة البيانات داخل نفس المعاملة، لذلك الطرح يجب أن يتم
+    قبل حذف الطلب والإضافة بعد flush الطلب الجديد.
+    """
+    order_ids = list(order_ids)
+    if not order_ids:
+        return
+
+    supplier_months = defaultdict(lambda: [0, 0, 0, 0])
+    product_months = {}
+
+    for start in range(0, len(order_ids), _CHUNK_SIZE):
+        chunk = order_ids[start:start + _CHUNK_SIZE]
+        params = {f'id{i}': order_id for i, order_id in enumerate(chunk)}
+        placeholders = ', '.join(f':{name}' for name in params)
+
+        for supplier_id, po_date, status, subtotal, tax_amount, total in conn.execute(text(
+            'SELECT supplier_id, po_date, status, subtotal, tax_amount, total FROM orders '
+            f'WHERE id IN ({placeholders})'
+        ), params):
+            summary = supplier_months[(supplier_id or 0, _month(po_date), status or '')]
+            summary[0] += 1
+            summary[1] += _minor(subtotal)
+            summary[2] += _minor(tax_amount)
+            summary[3] += _minor(total)
+
+        for po_date, product_code, product_name, quantity, total_price in conn.execute(text(
+            'SELECT o.po_date, i.product_code, i.product_name, i.quantity, i.total_price '
+            'FROM order_items i JOIN orders o ON o.id = i.order_id '
+            f'WHERE i.order_id IN ({placeholders})'
+        ), params):
+            key = (product_code or product_name, _month(po_date))
+            summary = product_months.setdefault(key, {
+                'product_code': product_code,
+                'product_name': product_name,
+                'line_count': 0,
+                'quantity': 0.0,
+                'value': 0,
+            })
+            summary['line_count'] += 1
+            summary['quantity'] += quantity or 0.0
+            summary['value'] += _minor(total_price)
+
+    if supplier_months:
+        conn.execute(_UPSERT_SUPPLIER_MONTH, [
+            {
+                'supplier_id': supplier_id,
+                'month': month,
+                'status': status,
+                'order_count': sign * summary[0],
+                'subtotal': sign * summary[1],
+                'tax_amount': sign * summary[2],
+                'total': sign * summary[3],
+            }
+            for (supplier_id, month, status), summary in supplier_months.items()
+        ])
+
+    if product_months:
+        conn.execute(_UPSERT_PRODUCT_MONTH, [
+            dict(
+                summary,
+                product_key=product_key,
+                month=month,
+                line_count=sign * summary['line_count'],
+                quantity=sign * summary['quantity'],
+                value=sign * summary['value'],
+            )
+            for (product_key, month), summary in product_months.items()
+        ])
+
+    if sign < 0:
+        conn.execute(text('DELETE FROM report_supplier_month WHERE order_count <= 0'))
+        conn.execute(text('DELETE FROM report_product_month WHERE line_count <= 0'))
+
+
+def add_orders_to_reports(conn, order_ids):
+    """إضافة طلبات جديدة للملخصات - Count newly inserted orders"""
+    _apply_orders(conn, order_ids, 1)
+
+
+def remove_orders_from_reports(conn, order_ids):
+    """طرح طلبات قبل حذفها - Uncount orders that are about to be deleted"""
+    _apply_orders(conn, order_ids, -1)
+
+
+def rebuild_reports(conn):
+    """إعادة بناء الملخصات من كل الطلبات - Rebuild the summaries from scratch"""
+    conn.execute(text('DELETE FROM report_supplier_month'))
+    conn.execute(text('DELETE FROM report_product_month'))
+    order_ids = [row[0] for row in conn.execute(text('SELECT id FROM orders'))]
+    add_orders_to_reports(conn, order_ids)
+
+
+# === قراءة التقارير - Report queries ===
+
+def parse_month(value):
+    """التحقق من شهر بصيغة YYYY-MM - Validate an optional YYYY-MM filter"""
+    value = (value or '').strip()
+    if value and not _MONTH_PATTERN.match(value):
+        raise ValueError('صيغة الشهر غير صالحة (YYYY-MM)')
+    return value or None
+
+
+def _filter_months(query, column, month_from, month_to):
+    if month_from:
+        query = query.filter(column >= month_from)
+    if month_to:
+        query = query.filter(column <= month_to)
+    return query
+
+
+def spend_report(group_by='supplier', month_from=None, month_to=None, status='', supplier_id=None):
+    """
+    تقرير المشتريات - Spend grouped by supplier, month or status
+
+    يرجع قائمة قواميس مرتبة (الموردون والحالات حسب الإجمالي، الشهور زمنياً).
+    """
+    report = SupplierMonthReport
+    total = func.sum(report.total).label('total')
+    columns = [
+        func.sum(report.order_count).label('order_count'),
+        func.sum(report.subtotal).label('subtotal'),
+        func.sum(report.tax_amount).label('tax_amount'),
+        total,
+    ]
+
+    if group_by == 'supplier':
+        query = db.session.query(report.supplier_id, Supplier.name, *columns).outerjoin(
+            Supplier, Supplier.id == report.supplier_id
+        ).group_by(report.supplier_id, Supplier.name).order_by(total.desc())
+    elif group_by == 'month':
+        query = db.session.query(report.month, *columns).group_by(report.month).order_by(report.month)
+    else:
+        query = db.session.query(report.status, *columns).group_by(report.status).order_by(total.desc())
+
+    query = _filter_months(query, report.month, month_from, month_to)
+    if status:
+        query = query.filter(report.status == status)
+    if supplier_id:
+        query = query.filter(report.supplier_id == supplier_id)
+
+    rows = []
+    for row in query:
+        data = row._asdict()
+        if group_by == 'supplier':
+            data['supplier_name'] = data.pop('name')
+        data['order_count'] = int(data['order_count'])
+        for name in ('subtotal', 'tax_amount', 'total'):
+            data[name] = to_float(data[name])
+        rows.append(data)
+    return rows
+
+
+def top_products(rank_by='value', month_from=None, month_to=None, limit=10):
+    """أكثر الأصناف شراءً بالقيمة أو الكمية - Top products by value or quantity"""
+    report = ProductMonthReport
+    value = func.sum(report.value).label('value')
+    quantity = func.sum(report.quantity).label('quantity')
+
+    query = db.session.query(
+        report.product_key,
+        func.max(report.product_code).label('product_code'),
+        func.max(report.product_name).label('product_name'),
+        func.sum(report.line_count).label('line_count'),
+        quantity,
+        value,
+    ).group_by(report.product_key)
+    query = _filter_months(query, report.month, month_from, month_to)
+    query = query.order_by((value if rank_by == 'value' else quantity).desc()).limit(limit)
+
+    rows = []
+    for row in query:
+        data = row._asdict()
+        data['line_count'] = int(data['line_count'])
+        data['quantity'] = float(data['quantity'])
+        data['value'] = to_float(data['value'])
+        rows.append(data)
+    return rows
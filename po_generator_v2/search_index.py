@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+"""
+فهرس البحث النصي للطلبات (SQLite FTS5)
+Full-text search index for orders (SQLite FTS5)
+
+الفهرس يحتوي على رقم الطلب واسم المورد وأسماء وأكواد الأصناف والملاحظات
+بعد توحيد الكتابة العربية (الألف والياء والتاء المربوطة وحذف التشكيل)،
+ويتم تحديثه تلقائياً بعد كل flush للجلسة عند إضافة أو تعديل أو حذف طلب.
+"""
+
+import re
+from sqlalchemy import event, text
+from sqlalchemy.exc import OperationalError
+from models import db, Supplier, Order, collect_touched_orders
+
+SEARCH_TABLE = 'orders_fts'
+
+# التشكيل وعلامات القرآن والتطويل - Arabic diacritics, Quranic marks and tatweel
+_ARABIC_DIACRITICS = re.compile('[\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED\u0640]')
+
+_ARABIC_FOLDING = str.maketrans({
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+    'ى': 'ي', 'ئ': 'ي',
+    'ة': 'ه',
+    'ؤ': 'و',
+})
+
+_TOKEN_PATTERN = re.compile(r'\w+')
+
+# None = لم يتم الفحص بعد
+_search_index_enabled = None
+
+
+def normalize_arabic(text_value):
+    """
+    توحيد النص العربي للبحث - Normalize Arabic text for searching
+
+    يحذف التشكيل والتطويل ويوحّد أشكال الألف والياء والتاء المربوطة
+    حتى تتطابق "مؤسسة الأمل" مع "موسسه الامل".
+    """
+    if not text_value:
+        return ''
+    normalized = _ARABIC_DIACRITICS.sub('', str(text_value))
+    return normalized.translate(_ARABIC_FOLDING).lower()
+
+
+def build_match_query(search):
+    """
+    تحويل نص البحث إلى تعبير MATCH - Convert a search string to an FTS5 MATCH query
+
+    كل كلمة تصبح بحثاً بالبادئة ("كلمة"*) والكلمات مرتبطة بـ AND.
+    """
+    tokens = _TOKEN_PATTERN.findall(normalize_arabic(search))
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def create_search_index(conn):
+    """
+    إنشاء جدول الفهرس وملؤه - Create the FTS5 table and backfill it
+
+    يُستدعى من ترحيل المخطط؛ لا يفعل شيئاً إذا لم تكن قاعدة البيانات SQLite
+    أو إذا كانت نسخة SQLite بدون FTS5 (يُستخدم البحث بـ LIKE حينها).
+    """
+    global _search_index_enabled
+    # الحالة تُضبط في كل المسارات، فلا تبقى قيمة قاعدة سابقة في نفس العملية
+    _search_index_enabled = False
+    if conn.dialect.name != 'sqlite':
+        return
+    try:
+        conn.execute(text(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5('
+            'po_number, supplier_name, items, notes, '
+            "tokenize='unicode61 remove_diacritics 2')"
+        ))
+    except OperationalError:
+        return
+    rebuild_search_index(conn)
+    _search_index_enabled = True
+
+
+def reset_search_index_state():
+    """
+    نسيان حالة الفهرس - Forget the cached FTS5 availability
+
+    تُستدعى عند فتح قاعدة بيانات (apply_migrations)، حتى لا تُستخدم حالة
+    قاعدة أخرى فُتحت قبلها في نفس العملية (SQLite ثم PostgreSQL مثلاً).
+    """
+    global _search_index_enabled
+    _search_index_enabled = None
+
+
+def rebuild_search_index(conn):
+    """إعادة بناء الفهرس بالكامل - Rebuild the whole index"""
+    conn.execute(text(f'DELETE FROM {SEARCH_TABLE}'))
+    order_ids = [row[0] for row in conn.execute(text('SELECT id FROM orders'))]
+    index_orders(conn, order_ids)
+
+
+def is_search_index_enabled(conn):
+    """هل جدول FTS5 موجود؟ - Whether the FTS5 table exists on this database"""
+    global _search_index_enabled
+    if _search_index_enabled is None:
+        if conn.dialect.name != 'sqlite':
+            _search_index_enabled = False
+        else:
+            row = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {'name': SEARCH_TABLE}
+            ).first()
+            _search_index_enabled = row is not None
+    return _search_index_enabled
+
+
+def index_orders(conn, order_ids):
+    """
+    تحديث مستندات الفهرس لطلبات معينة - (Re)index the given orders
+
+    تُقرأ البيانات من قاعدة البيانات نفسها داخل المعاملة الحالية، فالطلبات
+    المحذوفة تُزال من الفهرس تلقائياً لأنها لن تُرجع في الاستعلام.
+    """
+    order_ids = list(order_ids)
+    if not order_ids:
+        return
+
+    # SQLite يحد عدد المتغيرات في الاستعلام الواحد
+    for start in range(0, len(order_ids), 500):
+        chunk = order_ids[start:start + 500]
+        params = {f'id{i}': order_id for i, order_id in enumerate(chunk)}
+        placeholders = ', '.join(f':{name}' for name in params)
+
+        conn.execute(text(f'DELETE FROM {SEARCH_TABLE} WHERE rowid IN ({placeholders})'), params)
+
+        documents = {}
+        rows = conn.execute(text(
+            'SELECT o.id, o.po_number, s.name, o.notes FROM orders o '
+            'LEFT JOIN suppliers s ON s.id = o.supplier_id '
+            f'WHERE o.id IN ({placeholders})'
+        ), params)
+        for order_id, po_number, supplier_name, notes in rows:
+            documents[order_id] = {
+                'rowid': order_id,
+                'po_number': po_number or '',
+                'supplier_name': normalize_arabic(supplier_name),
+                'items': [],
+                'notes': normalize_arabic(notes),
+            }
+
+        rows = conn.execute(text(
+            'SELECT order_id, product_code, product_name FROM order_items '
+            f'WHERE order_id IN ({placeholders}) ORDER BY order_id, item_order'
+        ), params)
+        for order_id, product_code, product_name in rows:
+            if order_id in documents:
+                documents[order_id]['items'].append(
+                    f'{product_code or ""} {normalize_arabic(product_name)}'
+                )
+
+        if documents:
+            for document in documents.values():
+                document['items'] = ' '.join(document['items'])
+            conn.execute(
+                text(f'INSERT INTO {SEARCH_TABLE} (rowid, po_number, supplier_name, items, notes) '
+                     'VALUES (:rowid, :po_number, :supplier_name, :items, :notes)'),
+                list(documents.values())
+            )
+
+
+def search_filter(search):
+    """
+    شرط البحث لاستعلامات الطلبات - Search predicate for order queries
+
+    يستخدم الفهرس إن وُجد، وإلا يرجع للبحث القديم بـ LIKE.
+    """
+    connection = db.session.connection()
+    if is_search_index_enabled(connection):
+        match_query = build_match_query(search)
+        if not match_query:
+            return None
+        matching_ids = text(
+            f'SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH :match_query'
+        ).bindparams(match_query=match_query)
+        return Order.id.in_(matching_ids)
+
+    # icontains: LIKE في PostgreSQL حساس لحالة الأحرف بعكس SQLite
+    return (
+        (Order.po_number.icontains(search, autoescape=True)) |
+        (Order.supplier.has(Supplier.name.icontains(search, autoescape=True)))
+    )
+
+
+def _sync_search_index(session, flush_context):
+    """مزامنة الفهرس بعد كل flush - Keep the index in sync after every flush"""
+    order_ids, supplier_ids = collect_touched_orders(session)
+    if not order_ids and not supplier_ids:
+        return
+
+    conn = session.connection()
+    if not is_search_index_enabled(conn):
+        return
+
+    for supplier_id in supplier_ids:
+        rows = conn.execute(text('SELECT id FROM orders WHERE supplier_id = :supplier_id'),
+                            {'supplier_id': supplier_id})
+        order_ids.update(row[0] for row in rows)
+
+    index_orders(conn, order_ids)
+
+
+def register_search_index_events():
+    """تسجيل مستمعي الجلسة - Register the session listeners (idempotent)"""
+    if not event.contains(db.session, 'after_flush', _sync_search_index):
+        event.listen(db.session, 'after_flush', _sync_search_index)
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+تخصيص أرقام الطلبات
+PO number allocation
+
+كل سنة لها عداد في جدول po_sequences يُزاد بأمر UPDATE ... RETURNING واحد
+داخل المعاملة، فلا يحصل موظفان على نفس الرقم مهما تزامنت الطلبات.
+الرقم الذي يظهر في نموذج الطلب الجديد يُحجز لمدة محددة؛ إذا انتهت المدة
+دون إرسال النموذج يُعاد استخدام الرقم في نموذج آخر بدلاً من ضياعه.
+"""
+
+from sqlalchemy import func, text
+from models import db, Order
+from db_engine import retry_on_busy
+from datetime import datetime, timedelta
+
+# مدة حجز الرقم المعروض في النموذج - How long a displayed number stays reserved
+RESERVATION_MINUTES = 60
+
+
+def format_po_number(year, value):
+    """تنسيق الرقم: PO-2026-001 - Format a PO number"""
+    return f'PO-{year}-{value:03d}'
+
+
+def _last_used_value(year):
+    """آخر رقم مستخدم في الطلبات الموجودة - Highest existing sequence value for a year"""
+    # startswith (LIKE 'PO-2026-%') لا يعتمد على ترتيب الأحرف (collation) في
+    # قاعدة البيانات، والترتيب بالطول أولاً يجعل PO-2026-1000 بعد PO-2026-999
+    last_order = Order.query.filter(
+        Order.po_number.startswith(f'PO-{year}-', autoescape=True)
+    ).order_by(func.length(Order.po_number).desc(), Order.po_number.desc()).first()
+
+    if last_order:
+        try:
+            return int(last_order.po_number.split('-')[-1])
+        except ValueError:
+            return 0
+    return 0
+
+
+def _ensure_sequence(year):
+    """إنشاء عداد السنة إن لم يوجد - Create the year's counter, seeded from existing orders"""
+    exists = db.session.execute(
+        text('SELECT 1 FROM po_sequences WHERE year = :year'), {'year': year}
+    ).first()
+    if exists:
+        return
+    db.session.execute(
+        text('INSERT INTO po_sequences (year, last_value) VALUES (:year, :last_value) '
+             'ON CONFLICT (year) DO NOTHING'),
+        {'year': year, 'last_value': _last_used_value(year)}
+    )
+
+
+def allocate_po_numbers(count=1, year=None):
+    """
+    تخصيص أرقام جديدة - Atomically allocate `count` consecutive PO numbers
+
+    لا يعمل commit؛ الأرقام تصبح نهائية مع commit المعاملة الحالية.
+    """
+    year = year or datetime.now().year
+    _ensure_sequence(year)
+    last_value = db.session.execute(
+        text('UPDATE po_sequences SET last_value = last_value + :count '
+             'WHERE year = :year RETURNING last_value'),
+        {'count': count, 'year': year}
+    ).scalar_one()
+    return [format_po_number(year, value) for value in range(last_value - count + 1, last_value + 1)]
+
+
+def allocate_po_number(year=None):
+    """تخصيص رقم واحد - Allocate a single PO number"""
+    return allocate_po_numbers(1, year)[0]
+
+
+def ensure_sequence_at_least(year, value):
+    """رفع العداد ليتجاوز رقماً مستورداً - Move the counter past an imported number"""
+    _ensure_sequence(year)
+    db.session.execute(
+        text('UPDATE po_sequences SET last_value = :value '
+             'WHERE year = :year AND last_value < :value'),
+        {'year': year, 'value': value}
+    )
+
+
+@retry_on_busy
+def reserve_po_number():
+    """
+    حجز رقم لنموذج طلب جديد - Reserve a PO number for a new order form
+
+    يُعاد استخدام أقدم رقم انتهى حجزه أولاً، وإلا يُخصص رقم جديد.
+    """
+    now = datetime.utcnow()
+    year = datetime.now().year
+    expires_at = now + timedelta(minutes=RESERVATION_MINUTES)
+
+    # شرط expires_at يتكرر في WHERE الخارجي حتى لا يستعيد طلبان نفس الرقم
+    po_number = db.session.execute(
+        text('UPDATE po_reservations SET expires_at = :expires_at '
+             'WHERE expires_at < :now AND po_number = ('
+             'SELECT po_number FROM po_reservations '
+             'WHERE year = :year AND expires_at < :now '
+             'ORDER BY po_number LIMIT 1) '
+             'RETURNING po_number'),
+        {'expires_at': expires_at, 'now': now, 'year': year}
+    ).scalar()
+
+    if po_number is None:
+        po_number = allocate_po_number(year)
+        db.session.execute(
+            text('INSERT INTO po_reservations (po_number, year, expires_at) '
+                 'VALUES (:po_number, :year, :expires_at)'),
+            {'po_number': po_number, 'year': year, 'expires_at': expires_at}
+        )
+
+    db.session.commit()
+    return po_number
+
+
+def claim_po_number(po_number):
+    """
+    استخدام الرقم المعروض عند حفظ الطلب - Claim the displayed number for a new order
+
+    حذف الحجز بـ DELETE ... RETURNING عملية ذرية: طلب واحد فقط يحصل على الرقم.
+    إذا لم يكن الرقم محجوزاً (أُرسل النموذج مرتين، أو أخذه موظف آخر بعد انتهاء
+    الحجز) يُخصص رقم جديد. لا يعمل commit؛ يتم مع commit الطلب نفسه.
+    """
+    if po_number:
+        claimed = db.session.execute(
+            text('DELETE FROM po_reservations WHERE po_number = :po_number RETURNING po_number'),
+            {'po_number': po_number}
+        ).scalar()
+        if claimed is not None:
+            return claimed
+
+    return allocate_po_number()
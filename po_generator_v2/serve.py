@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+تشغيل النظام على خادم الإنتاج (waitress)
+Production launcher on the waitress WSGI server
+
+waitress يعمل على Windows و Linux ويخدم الطلبات بعدة خيوط في عملية واحدة،
+فيتشارك كل الخيوط نفس ذاكرة الملفات وطابور المهام وفهرس الأصناف.
+توليد PDF/Excel الثقيل يتم في عمليات خدمة التوليد (renderer)، وتبدأ كلها
+وتُجهّز خطوطها وقوالبها عند تشغيل الخادم قبل أول طلب.
+
+الإيقاف (Ctrl+C أو SIGTERM): يتوقف الخادم عن قبول اتصالات جديدة وينتظر
+الطلبات الجارية، ثم تُغلق مجموعة عمليات التوليد واتصالات قاعدة البيانات.
+
+الاستخدام - Usage:
+    python serve.py [--host 0.0.0.0] [--port 5000] [--threads 8]
+"""
+
+import argparse
+import signal
+from waitress import create_server
+from app import create_app
+from config import ProductionConfig
+from models import db
+from renderer import get_renderer, shutdown_renderer
+
+
+def _stop(signum, frame):
+    # waitress يلتقط SystemExit ويُنهي الطلبات الجارية قبل الخروج
+    raise SystemExit(0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='نظام طلبات التوريد - خادم الإنتاج')
+    parser.add_argument('--host', default=ProductionConfig.SERVER_HOST)
+    parser.add_argument('--port', type=int, default=ProductionConfig.SERVER_PORT)
+    parser.add_argument('--threads', type=int, default=ProductionConfig.SERVER_THREADS)
+    args = parser.parse_args(argv)
+
+    app = create_app(ProductionConfig)
+    workers = get_renderer().start()
+    print(f'⚙️  {len(workers)} render workers ready')
+    server = create_server(app, host=args.host, port=args.port, threads=args.threads)
+
+    signal.signal(signal.SIGTERM, _stop)
+    if hasattr(signal, 'SIGBREAK'):
+        signal.signal(signal.SIGBREAK, _stop)  # Ctrl+Break على Windows
+
+    print(f'🚀 http://{args.host}:{args.port} ({args.threads} threads) - Ctrl+C للإيقاف')
+    try:
+        server.run()
+    finally:
+        server.close()
+        shutdown_renderer()
+        with app.app_context():
+            db.engine.dispose()
+        print('✅ تم إيقاف الخادم')
+
+
+if __name__ == '__main__':
+    main()
@@ -5,12 +5,16 @@
 
 let itemCounter = 0;
 let suppliers = [];
-let products = [];
+
+// نتائج آخر بحث عن الأصناف: النص المعروض -> بيانات الصنف
+const productSuggestions = new Map();
+const PRODUCT_SEARCH_LIMIT = 15;
+const PRODUCT_SEARCH_DELAY_MS = 250;
+let productSearchTimer = null;
 
 // === تحميل البيانات عند فتح الصفحة ===
 document.addEventListener('DOMContentLoaded', async function() {
     await loadSuppliers();
-    await loadProducts();
     loadFormData();
     addItemRow(); // إضافة صف واحد على الأقل
     
@@ -32,13 +36,45 @@ async function loadSuppliers() {
     }
 }
 
-// === تحميل قائمة الأصناف ===
-async function loadProducts() {
-    try {
-        products = await AppHelpers.apiRequest('/api/products');
-    } catch (error) {
-        AppHelpers.showToast('خطأ في تحميل الأصناف', 'error');
+// === البحث عن الأصناف أثناء الكتابة (بدلاً من تحميل الكتالوج كاملاً) ===
+function productLabel(product) {
+    return `${product.code} - ${product.name}`;
+}
+
+function searchProducts(input) {
+    clearTimeout(productSearchTimer);
+    
+    // اختيار صنف من القائمة المقترحة
+    if (productSuggestions.has(input.value)) {
+        loadProductData(input);
+        return;
     }
+    
+    const query = input.value.trim();
+    if (!query) return;
+    
+    productSearchTimer = setTimeout(async () => {
+        try {
+            const params = new URLSearchParams({ q: query, limit: PRODUCT_SEARCH_LIMIT });
+            const results = await AppHelpers.apiRequest('/api/products/search?' + params.toString());
+            
+            // تجاهل النتائج إذا تغير النص أثناء البحث
+            if (input.value.trim() !== query) return;
+            
+            productSuggestions.clear();
+            const datalist = document.getElementById('productSuggestions');
+            datalist.innerHTML = '';
+            results.forEach(product => {
+                const label = productLabel(product);
+                productSuggestions.set(label, product);
+                const option = document.createElement('option');
+                option.value = label;
+                datalist.appendChild(option);
+            });
+        } catch (error) {
+            AppHelpers.showToast('خطأ في البحث عن الأصناف', 'error');
+        }
+    }, PRODUCT_SEARCH_DELAY_MS);
 }
 
 // === تحميل بيانات المورد عند اختياره ===
@@ -66,26 +102,13 @@ function addItemRow() {
     itemCounter++;
     const tbody = document.getElementById('itemsTableBody');
     
-    // إنشاء select للأصناف
-    let productsSelect = '<option value="">-- اختر الصنف --</option>';
-    products.forEach(product => {
-        productsSelect += `<option value="${product.id}" 
-            data-code="${product.code}" 
-            data-name="${product.name}" 
-            data-description="${product.description || ''}" 
-            data-price="${product.default_price}">
-            ${product.code} - ${product.name}
-        </option>`;
-    });
-    
     const row = document.createElement('tr');
     row.className = 'item-row';
     row.innerHTML = `
         <td class="text-center">${itemCounter}</td>
         <td>
-            <select class="form-select product-select" onchange="loadProductData(this)">
-                ${productsSelect}
-            </select>
+            <input type="search" class="form-control product-search" list="productSuggestions"
+                   placeholder="ابحث بالكود أو الاسم..." autocomplete="off" oninput="searchProducts(this)">
         </td>
         <td><input type="text" class="form-control item-code" placeholder="الكود"></td>
         <td><input type="text" class="form-control item-name" placeholder="الاسم" required></td>
@@ -104,15 +127,15 @@ function addItemRow() {
 }
 
 // === تحميل بيانات الصنف عند اختياره ===
-function loadProductData(select) {
-    const row = select.closest('tr');
-    const selectedOption = select.options[select.selectedIndex];
+function loadProductData(input) {
+    const row = input.closest('tr');
+    const product = productSuggestions.get(input.value);
     
-    if (selectedOption.value) {
-        row.querySelector('.item-code').value = selectedOption.dataset.code || '';
-        row.querySelector('.item-name').value = selectedOption.dataset.name || '';
-        row.querySelector('.item-description').value = selectedOption.dataset.description || '';
-        row.querySelector('.item-price').value = selectedOption.dataset.price || '0';
+    if (product) {
+        row.querySelector('.item-code').value = product.code || '';
+        row.querySelector('.item-name').value = product.name || '';
+        row.querySelector('.item-description').value = product.description || '';
+        row.querySelector('.item-price').value = product.default_price || '0';
         calculateTotals();
     }
 }
@@ -328,26 +351,6 @@ async function saveNewProduct() {
         AppHelpers.hideLoading();
         AppHelpers.showToast(result.message, 'success');
         
-        // إعادة تحميل قائمة الأصناف
-        await loadProducts();
-        
-        // إعادة بناء صفوف الأصناف لتحديث القوائم
-        const rows = document.querySelectorAll('.item-row');
-        rows.forEach(row => {
-            const select = row.querySelector('.product-select');
-            let productsSelect = '<option value="">-- اختر الصنف --</option>';
-            products.forEach(product => {
-                productsSelect += `<option value="${product.id}" 
-                    data-code="${product.code}" 
-                    data-name="${product.name}" 
-                    data-description="${product.description || ''}" 
-                    data-price="${product.default_price}">
-                    ${product.code} - ${product.name}
-                </option>`;
-            });
-            select.innerHTML = productsSelect;
-        });
-        
         // إغلاق النافذة ومسح الحقول
         bootstrap.Modal.getInstance(document.getElementById('addProductModal')).hide();
         document.getElementById('addProductForm').reset();
@@ -384,7 +387,7 @@ document.getElementById('orderForm').addEventListener('submit', async function(e
         });
         
         AppHelpers.hideLoading();
-        AppHelpers.showToast('تم حفظ الطلب بنجاح! ✅', 'success');
+        AppHelpers.showToast(`تم حفظ الطلب رقم ${result.order.po_number} بنجاح! ✅`, 'success');
         
         // مسح البيانات المحفوظة
         AppHelpers.removeFromLocalStorage('orderFormDraft');
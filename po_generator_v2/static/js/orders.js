@@ -4,6 +4,8 @@
  */
 
 let allOrders = [];
+let nextCursor = null;
+const ORDERS_PAGE_SIZE = 50;
 
 // === تحميل الطلبات عند فتح الصفحة ===
 document.addEventListener('DOMContentLoaded', function() {
@@ -14,22 +16,21 @@ document.addEventListener('DOMContentLoaded', function() {
     document.getElementById('statusFilter').addEventListener('change', filterOrders);
 });
 
-// === تحميل جميع الطلبات ===
-async function loadOrders() {
+// === تحميل الطلبات (الصفحة الأولى أو الصفحة التالية) ===
+async function loadOrders(append = false) {
     try {
         const search = document.getElementById('searchInput').value;
         const status = document.getElementById('statusFilter').value;
         
-        let url = '/api/orders';
         const params = new URLSearchParams();
+        params.append('limit', ORDERS_PAGE_SIZE);
         if (search) params.append('search', search);
         if (status) params.append('status', status);
+        if (append && nextCursor) params.append('cursor', nextCursor);
         
-        if (params.toString()) {
-            url += '?' + params.toString();
-        }
-        
-        allOrders = await AppHelpers.apiRequest(url);
+        const page = await AppHelpers.apiRequest('/api/orders?' + params.toString());
+        allOrders = append ? allOrders.concat(page.orders) : page.orders;
+        nextCursor = page.next_cursor;
         displayOrders(allOrders);
     } catch (error) {
         AppHelpers.showToast('خطأ في تحميل الطلبات', 'error');
@@ -44,10 +45,18 @@ async function loadOrders() {
     }
 }
 
+// === تحميل الصفحة التالية ===
+function loadMoreOrders() {
+    loadOrders(true);
+}
+
 // === عرض الطلبات في الجدول ===
 function displayOrders(orders) {
     const tbody = document.getElementById('ordersTableBody');
     const noOrdersMsg = document.getElementById('noOrdersMessage');
+    const loadMoreBtn = document.getElementById('loadMoreBtn');
+    
+    loadMoreBtn.classList.toggle('d-none', !nextCursor);
     
     if (orders.length === 0) {
         tbody.innerHTML = '';
@@ -61,7 +70,7 @@ function displayOrders(orders) {
         <tr>
             <td class="text-center fw-bold">${order.po_number}</td>
             <td class="text-center">${AppHelpers.formatDate(order.po_date)}</td>
-            <td>${order.supplier ? order.supplier.name : '-'}</td>
+            <td>${order.supplier_name || '-'}</td>
             <td class="text-center text-currency fw-bold">${AppHelpers.formatCurrency(order.total)}</td>
             <td class="text-center">
                 <span class="badge-status ${order.status}">${order.status}</span>
@@ -96,37 +105,68 @@ function displayOrders(orders) {
 
 // === فلترة الطلبات ===
 function filterOrders() {
+    nextCursor = null;
     loadOrders();
 }
 
+// === حفظ ملف من استجابة الخادم ===
+async function saveResponseAsFile(response, fallbackName) {
+    const blob = await response.blob();
+    const url = window.URL.createObjectURL(blob);
+    const a = document.createElement('a');
+    a.href = url;
+    
+    // الحصول على اسم الملف من الـ header
+    const contentDisposition = response.headers.get('content-disposition');
+    let filename = fallbackName;
+    if (contentDisposition) {
+        const filenameMatch = contentDisposition.match(/filename\*?=['"]?(?:UTF-\d['"]*)?([^;\r\n"']*)['"]?;?/);
+        if (filenameMatch && filenameMatch[1]) {
+            filename = decodeURIComponent(filenameMatch[1]);
+        }
+    }
+    
+    a.download = filename;
+    document.body.appendChild(a);
+    a.click();
+    document.body.removeChild(a);
+    window.URL.revokeObjectURL(url);
+}
+
+// === توليد ملف في الخلفية ثم تحميله (إرسال المهمة ثم متابعة حالتها) ===
+const JOB_POLL_INTERVAL_MS = 500;
+const JOB_TIMEOUT_MS = 5 * 60 * 1000;
+
+async function downloadOrderDocument(orderId, kind, fallbackName) {
+    let job = await AppHelpers.apiRequest(`/api/orders/${orderId}/${kind}/jobs`, {
+        method: 'POST'
+    });
+    
+    const startedAt = Date.now();
+    while (job.status === 'queued' || job.status === 'running') {
+        if (Date.now() - startedAt > JOB_TIMEOUT_MS) {
+            throw new Error('انتهت مهلة إنشاء الملف');
+        }
+        await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+        job = await AppHelpers.apiRequest(`/api/jobs/${job.job_id}`);
+    }
+    
+    if (job.status !== 'done') {
+        throw new Error('فشل في إنشاء الملف');
+    }
+    
+    const response = await fetch(`/api/jobs/${job.job_id}/download`);
+    if (!response.ok) throw new Error('فشل في تحميل الملف');
+    
+    await saveResponseAsFile(response, fallbackName);
+}
+
 // === تحميل Excel ===
 async function downloadExcel(orderId) {
     try {
         AppHelpers.showLoading('جاري إنشاء ملف Excel...');
         
-        const response = await fetch(`/api/orders/${orderId}/excel`);
-        if (!response.ok) throw new Error('فشل في تحميل الملف');
-        
-        const blob = await response.blob();
-        const url = window.URL.createObjectURL(blob);
-        const a = document.createElement('a');
-        a.href = url;
-        
-        // الحصول على اسم الملف من الـ header
-        const contentDisposition = response.headers.get('content-disposition');
-        let filename = `order_${orderId}.xlsx`;
-        if (contentDisposition) {
-            const filenameMatch = contentDisposition.match(/filename\*?=['"]?(?:UTF-\d['"]*)?([^;\r\n"']*)['"]?;?/);
-            if (filenameMatch && filenameMatch[1]) {
-                filename = decodeURIComponent(filenameMatch[1]);
-            }
-        }
-        
-        a.download = filename;
-        document.body.appendChild(a);
-        a.click();
-        document.body.removeChild(a);
-        window.URL.revokeObjectURL(url);
+        await downloadOrderDocument(orderId, 'excel', `order_${orderId}.xlsx`);
         
         AppHelpers.hideLoading();
         AppHelpers.showToast('تم تحميل ملف Excel بنجاح', 'success');
@@ -141,35 +181,45 @@ async function downloadPDF(orderId) {
     try {
         AppHelpers.showLoading('جاري إنشاء ملف PDF...');
         
-        const response = await fetch(`/api/orders/${orderId}/pdf`);
-        if (!response.ok) throw new Error('فشل في تحميل الملف');
+        await downloadOrderDocument(orderId, 'pdf', `order_${orderId}.pdf`);
         
-        const blob = await response.blob();
-        const url = window.URL.createObjectURL(blob);
-        const a = document.createElement('a');
-        a.href = url;
+        AppHelpers.hideLoading();
+        AppHelpers.showToast('تم تحميل ملف PDF بنجاح', 'success');
+    } catch (error) {
+        AppHelpers.hideLoading();
+        AppHelpers.showToast('فشل في تحميل ملف PDF', 'error');
+    }
+}
+
+// === تصدير PDF لعدة طلبات (حسب الفلاتر الحالية) ===
+async function exportOrdersPDF(format) {
+    try {
+        AppHelpers.showLoading('جاري تصدير ملفات PDF...');
+        
+        const params = new URLSearchParams();
+        params.append('format', format);
+        const search = document.getElementById('searchInput').value;
+        const status = document.getElementById('statusFilter').value;
+        const dateFrom = document.getElementById('dateFromFilter').value;
+        const dateTo = document.getElementById('dateToFilter').value;
+        if (search) params.append('search', search);
+        if (status) params.append('status', status);
+        if (dateFrom) params.append('date_from', dateFrom);
+        if (dateTo) params.append('date_to', dateTo);
         
-        // الحصول على اسم الملف من الـ header
-        const contentDisposition = response.headers.get('content-disposition');
-        let filename = `order_${orderId}.pdf`;
-        if (contentDisposition) {
-            const filenameMatch = contentDisposition.match(/filename\*?=['"]?(?:UTF-\d['"]*)?([^;\r\n"']*)['"]?;?/);
-            if (filenameMatch && filenameMatch[1]) {
-                filename = decodeURIComponent(filenameMatch[1]);
-            }
+        const response = await fetch('/api/orders/export/pdf?' + params.toString());
+        if (!response.ok) {
+            const result = await response.json().catch(() => ({}));
+            throw new Error(result.message || 'فشل في تصدير الطلبات');
         }
         
-        a.download = filename;
-        document.body.appendChild(a);
-        a.click();
-        document.body.removeChild(a);
-        window.URL.revokeObjectURL(url);
+        await saveResponseAsFile(response, format === 'zip' ? 'purchase_orders.zip' : 'purchase_orders.pdf');
         
         AppHelpers.hideLoading();
-        AppHelpers.showToast('تم تحميل ملف PDF بنجاح', 'success');
+        AppHelpers.showToast('تم تصدير الطلبات بنجاح', 'success');
     } catch (error) {
         AppHelpers.hideLoading();
-        AppHelpers.showToast('فشل في تحميل ملف PDF', 'error');
+        AppHelpers.showToast(error.message || 'فشل في تصدير الطلبات', 'error');
     }
 }
 
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""
+اختبارات تصدير PDF لعدة طلبات (batch_export.py)
+Batch PDF export tests
+
+الملف المدمج مهمة توليد واحدة، فله حد أصغر من ZIP ومهلة تزيد مع عدد الطلبات.
+"""
+
+from batch_export import MAX_MERGED_ORDERS, merged_timeout
+from bulk_import import import_orders
+from renderer import Renderer
+
+
+def seed_orders(app, count):
+    with app.app_context():
+        result = import_orders((index, {
+            'po_date': '2026-03-01',
+            'supplier_id': 1,
+            'items': [{'product_name': 'ورق تصوير', 'quantity': 1, 'unit_price': 5}],
+        }) for index in range(count))
+    assert not result.errors and len(result.created) == count, result.errors
+
+
+def test_merged_export_uses_timeout_scaled_by_order_count(app, client, monkeypatch):
+    seed_orders(app, 3)
+    timeouts = []
+    original = Renderer.result
+
+    def recording_result(self, future, timeout=None):
+        timeouts.append((timeout, self.timeout))
+        return original(self, future, timeout)
+
+    monkeypatch.setattr(Renderer, 'result', recording_result)
+    response = client.get('/api/orders/export/pdf?format=merged')
+    assert response.status_code == 200, response.data
+    assert response.data.startswith(b'%PDF')
+    [(timeout, base_timeout)] = timeouts
+    assert timeout == merged_timeout(3, base_timeout) > base_timeout
+
+
+def test_merged_export_over_limit_points_to_zip(app, client):
+    seed_orders(app, MAX_MERGED_ORDERS + 1)
+    response = client.get('/api/orders/export/pdf?format=merged')
+    assert response.status_code == 400
+    assert response.json == {
+        'success': False,
+        'message': f'الحد الأقصى للملف المدمج {MAX_MERGED_ORDERS} طلب، استخدم format=zip للأكثر',
+    }
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+اختبارات ذاكرة الملفات المولدة (document_cache.py)
+Document cache size accounting tests
+
+الحجم الكلي يُتابع بعداد، فالمجلد لا يُمسح مع كل ملف جديد إلا عند تجاوز الحد.
+"""
+
+import os
+from document_cache import DocumentCache, EVICT_TARGET_RATIO
+
+FILE_SIZE = 100
+
+
+def add_file(cache, order_id, key):
+    def render(output):
+        output.write(b'x' * FILE_SIZE)
+    return cache.get_or_render(order_id, 'pdf', key, render)
+
+
+def cached_bytes(directory):
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(directory) for name in names)
+
+
+def count_scans(cache, monkeypatch):
+    scans = []
+    original = cache._iter_files
+
+    def counting():
+        scans.append(1)
+        return original()
+
+    monkeypatch.setattr(cache, '_iter_files', counting)
+    return scans
+
+
+def test_commit_under_limit_does_not_scan(tmp_path, monkeypatch):
+    cache = DocumentCache(str(tmp_path), max_bytes=10 * FILE_SIZE)
+    scans = count_scans(cache, monkeypatch)
+    for order_id in range(8):
+        add_file(cache, order_id, f'k{order_id}')
+    # مسح واحد فقط لحساب الحجم عند أول ملف
+    assert len(scans) == 1
+    assert cache._size == cached_bytes(tmp_path) == 8 * FILE_SIZE
+
+    cache.invalidate(3)
+    assert cache._size == cached_bytes(tmp_path) == 7 * FILE_SIZE
+    assert len(scans) == 1
+
+
+def test_crossing_limit_evicts_oldest_down_to_target(tmp_path, monkeypatch):
+    cache = DocumentCache(str(tmp_path), max_bytes=10 * FILE_SIZE)
+    paths = [add_file(cache, order_id, f'k{order_id}') for order_id in range(10)]
+    for age, path in enumerate(paths):
+        os.utime(path, (1000 + age, 1000 + age))
+    scans = count_scans(cache, monkeypatch)
+
+    add_file(cache, 10, 'k10')
+    assert len(scans) == 1
+    assert cache._size == cached_bytes(tmp_path) <= 10 * FILE_SIZE * EVICT_TARGET_RATIO
+    assert not os.path.exists(paths[0]) and not os.path.exists(paths[1])
+    assert os.path.exists(paths[2])
+
+    # بعد الحذف يوجد مكان، فالملف التالي لا يمسح المجلد
+    add_file(cache, 11, 'k11')
+    assert len(scans) == 1
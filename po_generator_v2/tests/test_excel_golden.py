@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+اختبارات الملف المرجعي لتوليد Excel
+Golden-file tests for the unified Excel engine
+
+ملف golden/purchase_order.json يحفظ شكل الورقة المتوقع (القيم وأسماء
+الأنماط والدمج وارتفاعات الصفوف وعرض الأعمدة). كل مسارات التوليد يجب أن
+تطابقه: excel_template مباشرة، ومع أصناف متدفقة، و/generate في الواجهة القديمة.
+
+بعد تغيير مقصود في الشكل (مع زيادة GENERATOR_VERSION) يُحدّث الملف بـ:
+    PO_UPDATE_GOLDEN=1 python -m pytest tests/test_excel_golden.py
+"""
+
+import io
+import json
+import os
+import pytest
+from openpyxl import load_workbook
+from excel_template import render_excel_bytes
+from order_schema import from_legacy_payload
+
+GOLDEN_PATH = os.path.join(os.path.dirname(__file__), 'golden', 'purchase_order.json')
+
+LEGACY_PAYLOAD = {
+    'poNumber': 'PO-2026-042',
+    'poDate': '2026-03-15',
+    'companyTaxId': '100-200-300',
+    'commercialReg': '55231',
+    'supplierName': 'شركة النور للتوريدات',
+    'supplierTaxId': '123-456-789',
+    'supplierPhone': '01012345678',
+    'supplierEmail': 'info@alnoor.com',
+    'supplierAddress': '15 شارع الجمهورية، القاهرة',
+    'deliveryPeriod': '30',
+    'deliveryLocation': 'المخزن الرئيسي',
+    'paymentTerms': 'نقدي عند الاستلام',
+    'notes': 'يرجى الالتزام بمواعيد التسليم <عاجل> & شكراً',
+    'items': [
+        {'code': 'A001', 'name': 'ورق A4 - 80 جرام', 'description': 'رزمة 500 ورقة', 'quantity': 10, 'price': 150},
+        {'code': 'A002', 'name': 'أقلام حبر جاف أزرق', 'description': '', 'quantity': 3, 'price': 10.015},
+        {'code': 'A003', 'name': 'دباسة معدنية كبيرة', 'description': 'سعة 50 ورقة', 'quantity': 2.5, 'price': 45},
+    ],
+}
+
+# نفس الطلب بشكل Order.to_dict - The same order in the render schema
+ORDER = {
+    'po_number': 'PO-2026-042',
+    'po_date': '2026-03-15',
+    'company_tax_id': '100-200-300',
+    'company_commercial_reg': '55231',
+    'supplier': {
+        'name': 'شركة النور للتوريدات',
+        'tax_id': '123-456-789',
+        'phone': '01012345678',
+        'email': 'info@alnoor.com',
+        'address': '15 شارع الجمهورية، القاهرة',
+    },
+    'items': [
+        {'product_code': 'A001', 'product_name': 'ورق A4 - 80 جرام', 'description': 'رزمة 500 ورقة',
+         'quantity': 10, 'unit_price': 150, 'total_price': 1500.0},
+        {'product_code': 'A002', 'product_name': 'أقلام حبر جاف أزرق', 'description': '',
+         'quantity': 3, 'unit_price': 10.015, 'total_price': 30.05},
+        {'product_code': 'A003', 'product_name': 'دباسة معدنية كبيرة', 'description': 'سعة 50 ورقة',
+         'quantity': 2.5, 'unit_price': 45, 'total_price': 112.5},
+    ],
+    'tax_rate': 14,
+    'delivery_period': '30 يوم من تاريخ الطلب',
+    'delivery_location': 'المخزن الرئيسي',
+    'payment_terms': 'نقدي عند الاستلام',
+    'notes': 'يرجى الالتزام بمواعيد التسليم <عاجل> & شكراً',
+}
+
+
+def sheet_snapshot(data):
+    """شكل الورقة كقاموس قابل للمقارنة - Comparable snapshot of an xlsx file"""
+    sheet = load_workbook(io.BytesIO(data)).active
+    cells = {}
+    for row in sheet.iter_rows():
+        for cell in row:
+            if cell.value is not None or cell.style != 'Normal':
+                cells[cell.coordinate] = [cell.value, cell.style]
+    return {
+        'title': sheet.title,
+        'right_to_left': bool(sheet.sheet_view.rightToLeft),
+        'column_widths': {letter: dim.width for letter, dim in sorted(sheet.column_dimensions.items())},
+        'row_heights': {str(number): dim.height for number, dim in sorted(sheet.row_dimensions.items())
+                        if dim.height is not None},
+        'merges': sorted(str(merged) for merged in sheet.merged_cells.ranges),
+        'cells': cells,
+    }
+
+
+@pytest.fixture(scope='module')
+def golden():
+    if os.environ.get('PO_UPDATE_GOLDEN'):
+        with open(GOLDEN_PATH, 'w', encoding='utf-8') as output:
+            json.dump(sheet_snapshot(render_excel_bytes(ORDER)), output, ensure_ascii=False, indent=1)
+            output.write('\n')
+    with open(GOLDEN_PATH, encoding='utf-8') as golden_file:
+        return json.load(golden_file)
+
+
+@pytest.fixture(scope='module')
+def legacy_client():
+    import po_generator_app
+    return po_generator_app.app.test_client()
+
+
+def test_template_matches_golden(golden):
+    assert sheet_snapshot(render_excel_bytes(ORDER)) == golden
+
+
+def test_streamed_items_match_golden(golden):
+    """الطلبات الكبيرة: رأس الطلب والأصناف منفصلة - Header plus an items iterator"""
+    header = {name: value for name, value in ORDER.items() if name != 'items'}
+    assert sheet_snapshot(render_excel_bytes(header, iter(ORDER['items']))) == golden
+
+
+def test_legacy_payload_adapter():
+    assert from_legacy_payload(LEGACY_PAYLOAD) == ORDER
+
+
+def test_legacy_generate_matches_golden(golden, legacy_client):
+    response = legacy_client.post('/generate', json=LEGACY_PAYLOAD)
+    assert response.status_code == 200
+    assert response.mimetype == 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    assert sheet_snapshot(response.data) == golden
+
+
+def test_legacy_launcher_matches_legacy_app(legacy_client):
+    """نسخة المشغل (امانة_طلبات_التوريد.py) تستخدم نفس المسار - The Windows launcher copy"""
+    launcher = __import__('امانة_طلبات_التوريد')
+    expected = sheet_snapshot(legacy_client.post('/generate', json=LEGACY_PAYLOAD).data)
+    response = launcher.app.test_client().post('/generate', json=LEGACY_PAYLOAD)
+    assert sheet_snapshot(response.data) == expected
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+اختبارات إنشاء الطلبات (POST /api/orders)
+Order creation tests: amounts validation and rounding
+"""
+
+from money import calculate_totals, round_money, to_float
+
+
+def post_order(client, items, **fields):
+    return client.post('/api/orders', json={
+        'po_date': '2026-07-01',
+        'supplier_id': 1,
+        'items': items,
+        **fields,
+    })
+
+
+def test_unit_price_is_rounded_before_line_total(client):
+    response = post_order(client, [{'product_name': 'ورق تصوير', 'quantity': 10, 'unit_price': 2.333}])
+    assert response.status_code == 200, response.json
+
+    order = response.json['order']
+    item = order['items'][0]
+    assert item['unit_price'] == 2.33
+    assert item['total_price'] == 23.30
+    assert order['subtotal'] == 23.30
+    assert order['total'] == 26.56
+
+
+def test_same_totals_as_bulk_import(client):
+    items = [{'product_name': 'ورق تصوير', 'quantity': 3, 'unit_price': 1.005},
+             {'product_name': 'أحبار', 'quantity': 7, 'unit_price': 19.999}]
+    order = post_order(client, items).json['order']
+
+    expected = calculate_totals(
+        [dict(item, unit_price=round_money(item['unit_price'])) for item in items])
+    assert [item['total_price'] for item in order['items']] == [to_float(total) for total in expected.line_totals]
+    assert order['total'] == to_float(expected.total)
+
+
+def test_invalid_quantity_returns_400_with_field_message(client):
+    response = post_order(client, [{'product_name': 'ورق تصوير', 'quantity': 'abc', 'unit_price': 5}])
+    assert response.status_code == 400
+    assert response.json == {'success': False, 'message': 'كمية الصنف 1 غير صالح: abc'}
+
+
+def test_invalid_amounts_are_rejected(client):
+    for item, message in (
+        ({'quantity': 'nan', 'unit_price': 5}, 'كمية الصنف 1 غير صالح: nan'),
+        ({'quantity': 1, 'unit_price': 'Infinity'}, 'سعر الصنف 1 غير صالح: Infinity'),
+        ({'quantity': -2, 'unit_price': 5}, 'كمية الصنف 1 لا يمكن أن يكون سالباً'),
+    ):
+        response = post_order(client, [dict(item, product_name='ورق تصوير')])
+        assert response.status_code == 400, item
+        assert response.json['message'] == message
+
+    response = post_order(client, [], tax_rate='x')
+    assert response.status_code == 400
+    assert response.json['message'] == 'نسبة الضريبة غير صالح: x'
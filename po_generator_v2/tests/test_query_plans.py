@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+اختبارات خطط الاستعلام (EXPLAIN QUERY PLAN)
+Query plan regression tests for the order listing and search
+
+الاستعلامات تُلتقط كما ينفذها التطبيق فعلاً (before_cursor_execute) ثم
+تُشرح بنفس المعاملات، فأي تغيير في الاستعلام أو حذف فهرس يفشل هنا.
+"""
+
+import pytest
+from sqlalchemy import event
+from bulk_import import import_orders
+from models import db
+
+ORDERS_COUNT = 40
+
+
+@pytest.fixture
+def orders_client(app, client):
+    """
+    تطبيق فيه طلبات بحالات مختلفة - Client on a database with draft and confirmed orders
+
+    POST /api/orders يحفظ كل طلب "مؤكد"، لذلك الطلبات تُستورد بحالاتها.
+    """
+    with app.app_context():
+        if db.engine.dialect.name != 'sqlite':
+            pytest.skip('EXPLAIN QUERY PLAN خاص بـ SQLite')
+        result = import_orders((index, {
+            'po_date': f'2026-01-{index % 28 + 1:02d}',
+            'supplier_id': index % 3 + 1,
+            'status': 'مسودة' if index % 2 else 'مؤكد',
+            'items': [{'product_name': 'ورق تصوير', 'quantity': 2, 'unit_price': 5}],
+        }) for index in range(ORDERS_COUNT))
+    assert not result.errors and len(result.created) == ORDERS_COUNT, result.errors
+    return client
+
+
+def status_count(client, status):
+    return len(client.get(f'/api/orders?status={status}').json)
+
+
+def query_plans(app, client, url):
+    """
+    خطط استعلامات طلب واحد - [(sql, plan)] for every SELECT run while serving `url`
+
+    plan نص واحد يجمع أسطر EXPLAIN QUERY PLAN.
+    """
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT') and 'sqlite_master' not in statement:
+            statements.append((statement, parameters))
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', capture)
+    try:
+        response = client.get(url)
+    finally:
+        event.remove(engine, 'before_cursor_execute', capture)
+    assert response.status_code == 200, response.data
+
+    with app.app_context():
+        with engine.connect() as conn:
+            return [
+                (statement, ' ; '.join(row[-1] for row in conn.exec_driver_sql(
+                    'EXPLAIN QUERY PLAN ' + statement, parameters)))
+                for statement, parameters in statements
+            ]
+
+
+def plan_for(plans, table):
+    """خطة أول استعلام من جدول - Plan of the first statement reading FROM `table`"""
+    for statement, plan in plans:
+        if f'FROM {table}' in statement:
+            return plan
+    raise AssertionError(f'no query on {table}: {[statement for statement, _ in plans]}')
+
+
+def test_page_uses_created_at_index(app, orders_client):
+    plan = plan_for(query_plans(app, orders_client, '/api/orders?limit=10'), 'orders')
+    assert 'USING INDEX ix_orders_created_at_id' in plan
+    assert 'TEMP B-TREE' not in plan
+
+
+def test_cursor_page_uses_created_at_index(app, orders_client):
+    cursor = orders_client.get('/api/orders?limit=5').json['next_cursor']
+    plan = plan_for(query_plans(app, orders_client, f'/api/orders?limit=10&cursor={cursor}'), 'orders')
+    assert 'ix_orders_created_at_id' in plan
+    assert 'TEMP B-TREE' not in plan
+
+
+def test_status_page_uses_status_index(app, orders_client):
+    assert status_count(orders_client, 'مسودة') == ORDERS_COUNT // 2
+    plan = plan_for(query_plans(app, orders_client, '/api/orders?limit=10&status=مسودة'), 'orders')
+    assert 'SEARCH orders USING INDEX ix_orders_status_created_at (status=?)' in plan
+    assert 'TEMP B-TREE' not in plan
+
+
+def test_full_list_loads_items_by_order_index(app, orders_client):
+    assert status_count(orders_client, 'مؤكد') == ORDERS_COUNT // 2
+    plans = query_plans(app, orders_client, '/api/orders?status=مؤكد')
+    assert 'ix_orders_status_created_at' in plan_for(plans, 'orders')
+    assert 'SEARCH order_items USING INDEX ix_order_items_order_id (order_id=?)' in plan_for(plans, 'order_items')
+
+
+def test_search_uses_fts_index(app, orders_client):
+    # supplier_id 1 هو "شركة النور للتوريدات" في البيانات التجريبية
+    matches = orders_client.get('/api/orders?limit=50&search=النور').json['orders']
+    assert len(matches) == len(range(0, ORDERS_COUNT, 3))
+    plan = plan_for(query_plans(app, orders_client, '/api/orders?limit=10&search=النور'), 'orders')
+    assert 'orders_fts VIRTUAL TABLE' in plan
+    # الطلبات المطابقة تُقرأ بالمفتاح الأساسي، بدون مرور على كل الجدول
+    assert 'SEARCH orders USING INTEGER PRIMARY KEY' in plan
+    assert 'SCAN orders ' not in plan + ' '
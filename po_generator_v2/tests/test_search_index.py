@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""
+اختبارات حالة فهرس البحث (search_index.py)
+Search index state tests
+
+حالة FTS5 محفوظة على مستوى العملية، فتطبيق جديد على قاعدة أخرى في نفس
+العملية يجب ألا يرث حالة القاعدة السابقة.
+"""
+
+import search_index
+from app import create_app
+from bulk_import import import_orders
+from conftest import make_config
+from models import db
+
+
+def test_new_app_does_not_inherit_search_index_state(app, tmp_path):
+    with app.app_context():
+        result = import_orders([(1, {
+            'po_date': '2026-03-01',
+            'supplier_id': 1,
+            'items': [{'product_name': 'ورق تصوير', 'quantity': 1, 'unit_price': 5}],
+        })])
+        assert not result.errors, result.errors
+        dialect = db.engine.dialect.name
+        url = db.engine.url.render_as_string(hide_password=False)
+        options = app.config['SQLALCHEMY_ENGINE_OPTIONS']
+
+    # حالة متروكة من قاعدة أخرى في نفس العملية - State left over by another database
+    search_index._search_index_enabled = dialect != 'sqlite'
+    second = create_app(make_config(str(tmp_path / 'second'), url, options))
+    try:
+        response = second.test_client().get('/api/orders?limit=10&search=النور')
+        assert response.status_code == 200, response.data
+        assert len(response.json['orders']) == 1
+        with second.app_context():
+            assert search_index.is_search_index_enabled(db.session.connection()) == (dialect == 'sqlite')
+    finally:
+        with second.app_context():
+            db.session.remove()
+            db.engine.dispose()
+
+
+def test_create_search_index_sets_state_on_every_engine(app):
+    with app.app_context():
+        with db.engine.begin() as conn:
+            search_index._search_index_enabled = None
+            search_index.create_search_index(conn)
+            assert search_index._search_index_enabled is (conn.dialect.name == 'sqlite')
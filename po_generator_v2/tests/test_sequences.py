@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+اختبارات تزامن أرقام الطلبات (sequences.py)
+Concurrency tests for PO number allocation
+
+طلبات متزامنة من عدة threads على نفس القاعدة يجب أن تحصل على أرقام
+مختلفة ومتتالية بدون فجوات، والقراءة أثناءها لا تفشل ولا ترى طلباً ناقصاً.
+"""
+
+import threading
+from models import db
+from sequences import allocate_po_numbers
+
+THREADS = 16
+READERS = 4
+
+
+def run_parallel(target, count=THREADS):
+    """تشغيل target في count thread معاً - Run target concurrently, return results in any order"""
+    results = []
+    errors = []
+    barrier = threading.Barrier(count)
+
+    def worker():
+        barrier.wait()
+        try:
+            results.append(target())
+        except Exception as error:  # noqa: BLE001 - تظهر في رسالة الاختبار
+            errors.append(error)
+
+    threads = [threading.Thread(target=worker) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors, errors
+    return results
+
+
+def sequence_values(po_numbers):
+    """الجزء الرقمي مرتباً - Sorted numeric part of PO-YYYY-NNN numbers"""
+    return sorted(int(po_number.rsplit('-', 1)[-1]) for po_number in po_numbers)
+
+
+def assert_gap_free(po_numbers):
+    values = sequence_values(po_numbers)
+    assert len(set(po_numbers)) == len(po_numbers), po_numbers
+    assert values == list(range(values[0], values[0] + len(values))), po_numbers
+
+
+def test_parallel_create_order_gets_unique_gap_free_numbers(app):
+    def create_order():
+        response = app.test_client().post('/api/orders', json={
+            'po_date': '2026-07-01',
+            'supplier_id': 1,
+            'items': [{'product_name': 'ورق تصوير', 'quantity': 1, 'unit_price': 1}],
+        })
+        assert response.status_code == 200, response.json
+        return response.json['order']['po_number']
+
+    po_numbers = run_parallel(create_order)
+    assert len(po_numbers) == THREADS
+    assert_gap_free(po_numbers)
+
+    # الرقم التالي يكمل التسلسل - The next allocation continues right after the batch
+    with app.app_context():
+        next_number = allocate_po_numbers(1)[0]
+        db.session.rollback()
+    assert sequence_values([next_number]) == [sequence_values(po_numbers)[-1] + 1]
+
+
+def test_parallel_reservations_are_unique(app):
+    def reserve():
+        response = app.test_client().get('/api/next-po-number')
+        assert response.status_code == 200
+        return response.json['po_number']
+
+    po_numbers = run_parallel(reserve)
+    assert_gap_free(po_numbers)
+
+
+def test_parallel_batch_allocation_does_not_overlap(app):
+    def allocate_batch():
+        with app.app_context():
+            numbers = allocate_po_numbers(5)
+            db.session.commit()
+            return numbers
+
+    batches = run_parallel(allocate_batch, count=8)
+    for batch in batches:
+        assert len(batch) == 5
+        assert_gap_free(batch)
+    assert_gap_free([po_number for batch in batches for po_number in batch])
+
+
+def check_orders_page(body):
+    """صفحة متسقة: بدون تكرار وكل صف كامل - A page with unique, complete rows"""
+    ids = [row['id'] for row in body['orders']]
+    assert len(ids) == len(set(ids)), ids
+    assert len(ids) <= 20
+    for row in body['orders']:
+        assert row['po_number'].startswith('PO-') and row['supplier_name'], row
+
+
+def check_full_list(orders):
+    """كل طلب مع أصنافه وإجمالياته من نفس المعاملة - Each order committed whole"""
+    ids = [order['id'] for order in orders]
+    assert len(ids) == len(set(ids)), ids
+    for order in orders:
+        assert order['items'], order
+        assert round(sum(item['total_price'] for item in order['items']), 2) == order['subtotal'], order
+        assert round(order['subtotal'] + order['tax_amount'], 2) == order['total'], order
+
+
+def test_readers_during_parallel_create_order(app):
+    """القراءة أثناء الكتابة لا ترجع 5xx ولا ترى طلباً نصف محفوظ - Readers alongside writers"""
+    writers_done = threading.Event()
+    barrier = threading.Barrier(THREADS + READERS)
+    po_numbers = []
+    reads = []
+    errors = []
+
+    def create_order():
+        barrier.wait()
+        response = app.test_client().post('/api/orders', json={
+            'po_date': '2026-07-01',
+            'supplier_id': 1,
+            'items': [{'product_name': 'ورق تصوير', 'quantity': 3, 'unit_price': 2.5}],
+        })
+        assert response.status_code == 200, response.json
+        po_numbers.append(response.json['order']['po_number'])
+
+    def read_orders():
+        client = app.test_client()
+        barrier.wait()
+        seen = 0
+        while True:
+            finished = writers_done.is_set()
+            for url in ('/api/orders?limit=20', '/api/orders'):
+                response = client.get(url)
+                assert response.status_code < 500, (url, response.status_code, response.data)
+                assert 'database is locked' not in response.get_data(as_text=True)
+                if url == '/api/orders':
+                    check_full_list(response.json)
+                    # الطلبات تُضاف فقط، فالعدد لا ينقص بين قراءتين
+                    assert len(response.json) >= seen
+                    seen = len(response.json)
+                else:
+                    check_orders_page(response.json)
+                reads.append(url)
+            if finished:
+                return
+
+    def guarded(target):
+        def run():
+            try:
+                target()
+            except Exception as error:  # noqa: BLE001 - تظهر في رسالة الاختبار
+                errors.append(error)
+        return threading.Thread(target=run)
+
+    writers = [guarded(create_order) for _ in range(THREADS)]
+    readers = [guarded(read_orders) for _ in range(READERS)]
+    for thread in writers + readers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    writers_done.set()
+    for thread in readers:
+        thread.join()
+
+    assert not errors, errors
+    assert len(reads) >= READERS * 2
+    assert_gap_free(po_numbers)
@@ -20,7 +20,7 @@ if errorlevel 1 (
     echo ❌ خطأ: تأكد من تثبيت Python و Flask و openpyxl
     echo.
     echo للتثبيت، شغل الأمر التالي:
-    echo pip install flask openpyxl
+    echo pip install -r po_generator_v2\requirements.txt
     echo.
     pause
 )